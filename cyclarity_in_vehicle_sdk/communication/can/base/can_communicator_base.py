@@ -1,11 +1,17 @@
+import time
 from abc import abstractmethod
-from typing import Optional, Sequence, Type, TypeAlias, Union
+from typing import Callable, Iterator, Optional, Sequence, Type, TypeAlias, Union
 
 import can
 from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
 
 CanMessage: TypeAlias = can.Message
 BusABC: TypeAlias = can.BusABC
+CyclicSendTask: TypeAlias = can.broadcastmanager.CyclicSendTaskABC
+RxListener: TypeAlias = Callable[[Sequence[CanMessage]], None]
+
+DEFAULT_BATCH_SIZE = 256
+SNIFF_POLL_INTERVAL = 0.1
 
 class CanCommunicatorBase(ParsableModel):
     """Base class for CAN communicators python-can based
@@ -36,13 +42,16 @@ class CanCommunicatorBase(ParsableModel):
     def send_periodically(self, 
                           msgs:      Union[CanMessage, Sequence[CanMessage]],
                           period:    float,
-                          duration:  Optional[float] = None):
+                          duration:  Optional[float] = None) -> CyclicSendTask:
         """Send periodically CAN message(s)
 
         Args:
             msgs (Union[CanMessage, Sequence[CanMessage]]): single message or sequence of messages to be sent periodically
             period (float): time period in seconds between sending of the message(s)
             duration (Optional[float], optional): duration time in seconds tp be sending the message(s) periodically. None means indefinitely.
+
+        Returns:
+            CyclicSendTask: handle of the periodic task, allowing to stop it or modify its data
         """
         raise NotImplementedError
     
@@ -58,6 +67,27 @@ class CanCommunicatorBase(ParsableModel):
         """
         raise NotImplementedError
     
+    def receive_batch(self, max_frames: int, timeout: Optional[float] = None) -> list[CanMessage]:
+        """receive all the CAN messages pending on the channel in a single operation.
+        By default the messages are received one by one with `receive`, communicators should override it with a batched reception
+
+        Args:
+            max_frames (int): maximal amount of CAN messages to return
+            timeout (Optional[float], optional): timeout in seconds to wait for the first message. None means indefinably.
+
+        Returns:
+            list[CanMessage]: CAN messages received, empty list if timeout has reached.
+        """
+        msgs: list[CanMessage] = []
+        msg = self.receive(timeout=timeout)
+        while msg is not None:
+            msgs.append(msg)
+            if len(msgs) >= max_frames:
+                break
+            # the pending messages are drained without waiting
+            msg = self.receive(timeout=0)
+        return msgs
+
     @abstractmethod
     def sniff(self, sniff_time: float) -> Optional[list[CanMessage]]:
         """sniff CAN messages from the channel for specific time
@@ -70,6 +100,29 @@ class CanCommunicatorBase(ParsableModel):
         """
         raise NotImplementedError
     
+    def iter_sniff(self, sniff_time: Optional[float] = None, batches: bool = False) -> Iterator[Union[CanMessage, list[CanMessage]]]:
+        """sniff CAN messages from the channel, yielding them as they arrive.
+        By default the messages are read with `receive_batch`
+
+        Args:
+            sniff_time (Optional[float], optional): time in seconds to be sniffing the channel. None means indefinitely.
+            batches (bool, optional): yield lists of CAN messages instead of single messages. Defaults to False.
+
+        Yields:
+            Union[CanMessage, list[CanMessage]]: sniffed CAN message, or a batch of CAN messages
+        """
+        start_time = time.time()
+        while True:
+            time_passed = time.time() - start_time
+            if sniff_time is not None and time_passed >= sniff_time:
+                break
+            time_left = SNIFF_POLL_INTERVAL if sniff_time is None else min(SNIFF_POLL_INTERVAL, sniff_time - time_passed)
+            msgs = self.receive_batch(max_frames=DEFAULT_BATCH_SIZE, timeout=time_left)
+            if batches and msgs:
+                yield msgs
+            elif not batches:
+                yield from msgs
+
     @abstractmethod
     def add_to_blacklist(self, canids: Sequence[int]):
         """adds can IDs to a list of blacklist IDs to be ignore when sniffing or receiving
@@ -79,6 +132,36 @@ class CanCommunicatorBase(ParsableModel):
         """
         raise NotImplementedError
 
+    def add_to_allowlist(self, canids: Sequence[int]):
+        """adds can IDs to a list of allowed IDs, once set only these IDs are received when sniffing or receiving
+
+        Args:
+            canids (Sequence[int]): CAN IDs to be added to the allowlist
+
+        :raises NotImplementedError: If the communicator does not support an allowlist
+        """
+        raise NotImplementedError
+
+    def add_rx_listener(self, listener: RxListener):
+        """adds a callback to be called with the CAN messages received by the communicator
+
+        Args:
+            listener (RxListener): callback receiving a sequence of CAN messages
+
+        :raises NotImplementedError: If the communicator does not support RX listeners
+        """
+        raise NotImplementedError
+
+    def remove_rx_listener(self, listener: RxListener):
+        """removes a callback added with `add_rx_listener`
+
+        Args:
+            listener (RxListener): the callback to remove
+
+        :raises NotImplementedError: If the communicator does not support RX listeners
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def get_bus(self) -> Type[BusABC]:
         """get the underling CAN bus 
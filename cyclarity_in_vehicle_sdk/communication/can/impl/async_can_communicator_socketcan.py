@@ -0,0 +1,198 @@
+import asyncio
+import time
+from collections import deque
+from types import TracebackType
+from typing import AsyncIterator, Optional, Sequence, Union
+
+from can.interfaces.socketcan.socketcan import build_can_frame
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import DEFAULT_BATCH_SIZE, CanCommunicatorSocketCan
+
+
+class AsyncCanCommunicatorSocketCan(ParsableModel):
+    """This class handles asyncio based communication over the CAN bus using the SocketCAN interface.
+    The socket is registered for reading on the running event loop, so multiple channels can be
+    served by a single loop without threads.
+    """
+    channel: str = Field(description="Name of CAN interface to work with. (e.g. can0, vcan0, etc...)")
+    support_fd: bool = Field(description="CAN bus supports CAN-FD.")
+    blacklist_ids: set[int] = Field(default=set(), description="Incoming CAN IDs to ignore")
+    allowlist_ids: set[int] = Field(default=set(), description="Incoming CAN IDs to receive exclusively, empty means all IDs are allowed")
+    rx_queue_size: int = Field(default=10000, gt=0, description="Maximal amount of received CAN messages pending to be read, the oldest are dropped beyond it")
+
+    _can_communicator: CanCommunicatorSocketCan = None
+    _loop: asyncio.AbstractEventLoop = None
+    _rx_queue: deque = None
+    _rx_event: asyncio.Event = None
+    _dropped_count: int = 0
+    _rx_error: Optional[Exception] = None
+
+    async def open(self) -> None:
+        """Opens the communicator and registers it on the running event loop. this method must be called before usage.
+        """
+        if self._can_communicator:
+            raise RuntimeError("AsyncCanCommunicatorSocketCan is already open")
+
+        can_communicator = CanCommunicatorSocketCan(channel=self.channel,
+                                                    support_fd=self.support_fd,
+                                                    blacklist_ids=set(self.blacklist_ids),
+                                                    allowlist_ids=set(self.allowlist_ids))
+        can_communicator.open()
+        self._can_communicator = can_communicator
+        self._loop = asyncio.get_running_loop()
+        self._rx_queue = deque()
+        self._rx_event = asyncio.Event()
+        self._dropped_count = 0
+        self._rx_error = None
+        self._loop.add_reader(can_communicator.get_bus().fileno(), self._on_readable)
+
+    async def close(self) -> None:
+        """Closes the communicator.
+        """
+        if self._can_communicator:
+            self._loop.remove_reader(self._can_communicator.get_bus().fileno())
+            self._can_communicator.close()
+            self._can_communicator = None
+            # wake up pending readers
+            self._rx_event.set()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exception_type: Optional[type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
+        await self.close()
+        return False
+
+    async def send(self, can_msg: CanMessage, timeout: Optional[float] = None):
+        """Transmit a message to the CAN bus.
+
+        Args:
+            can_msg (CanMessage): CAN message in the python-can format `CanMessage`
+            timeout (Optional[float], optional): time out in seconds. Defaults to None.
+        """
+        if not self._can_communicator:
+            raise RuntimeError("AsyncCanCommunicatorSocketCan has not been opened")
+
+        sock = self._can_communicator.get_bus().socket
+        await asyncio.wait_for(self._loop.sock_sendall(sock, build_can_frame(can_msg)), timeout=timeout)
+
+    async def receive(self, timeout: Optional[float] = None) -> Optional[CanMessage]:
+        """receive a CAN message over the channel
+
+        Args:
+            timeout (Optional[float], optional): timeout in seconds to try and receive. None means indefinably.
+
+        Returns:
+            Optional[CanMessage]: CAN message if a message was received, None otherwise.
+        """
+        msgs = await self.receive_batch(max_frames=1, timeout=timeout)
+        return msgs[0] if msgs else None
+
+    async def receive_batch(self, max_frames: int = DEFAULT_BATCH_SIZE, timeout: Optional[float] = None) -> list[CanMessage]:
+        """receive all the pending CAN messages
+
+        Args:
+            max_frames (int, optional): maximal amount of CAN messages to return. Defaults to DEFAULT_BATCH_SIZE.
+            timeout (Optional[float], optional): timeout in seconds to wait for the first message. None means indefinably.
+
+        Returns:
+            list[CanMessage]: CAN messages received, empty list if timeout has reached.
+
+        Raises:
+            Exception: the error that stopped the reading from the channel, once the messages received before it were read.
+        """
+        if not self._can_communicator:
+            raise RuntimeError("AsyncCanCommunicatorSocketCan has not been opened")
+
+        start_time = time.time()
+        while not self._rx_queue:
+            if self._rx_error:
+                raise self._rx_error
+            self._rx_event.clear()
+            time_left = None if timeout is None else timeout - (time.time() - start_time)
+            if time_left is not None and time_left <= 0:
+                return []
+            try:
+                await asyncio.wait_for(self._rx_event.wait(), timeout=time_left)
+            except asyncio.TimeoutError:
+                return []
+            if not self._can_communicator:
+                return []
+
+        return [self._rx_queue.popleft() for _ in range(min(max_frames, len(self._rx_queue)))]
+
+    async def iter_sniff(self, sniff_time: Optional[float] = None, batches: bool = False) -> AsyncIterator[Union[CanMessage, list[CanMessage]]]:
+        """sniff CAN messages from the channel, yielding them as they arrive
+
+        Args:
+            sniff_time (Optional[float], optional): time in seconds to be sniffing the channel. None means indefinitely.
+            batches (bool, optional): yield lists of CAN messages instead of single messages. Defaults to False.
+
+        Yields:
+            Union[CanMessage, list[CanMessage]]: sniffed CAN message, or a batch of CAN messages
+        """
+        start_time = time.time()
+        while self._can_communicator:
+            time_left = None
+            if sniff_time is not None:
+                time_left = sniff_time - (time.time() - start_time)
+                if time_left <= 0:
+                    break
+            msgs = await self.receive_batch(timeout=time_left)
+            if batches and msgs:
+                yield msgs
+            elif not batches:
+                for msg in msgs:
+                    yield msg
+
+    def add_to_blacklist(self, canids: Sequence[int]):
+        """adds can IDs to a list of blacklist IDs to be ignore when sniffing or receiving
+
+        Args:
+            canids (Sequence[int]): CAN IDs to be added to the blacklist
+        """
+        self.blacklist_ids.update(canids)
+        if self._can_communicator:
+            self._can_communicator.add_to_blacklist(canids)
+
+    def add_to_allowlist(self, canids: Sequence[int]):
+        """adds can IDs to a list of allowed IDs, once set only these IDs are received when sniffing or receiving
+
+        Args:
+            canids (Sequence[int]): CAN IDs to be added to the allowlist
+        """
+        self.allowlist_ids.update(canids)
+        if self._can_communicator:
+            self._can_communicator.add_to_allowlist(canids)
+
+    def get_dropped_count(self) -> int:
+        """get the amount of received CAN messages dropped due to the RX queue being full
+
+        Returns:
+            int: amount of CAN messages dropped
+        """
+        return self._dropped_count
+
+    def _on_readable(self) -> None:
+        try:
+            msgs = self._can_communicator.receive_batch(max_frames=DEFAULT_BATCH_SIZE, timeout=0)
+        except Exception as ex:
+            # errors such as ENETDOWN persist, the socket would be reported readable again and again
+            self.logger.error(f"Failed reading from {self.channel}: {ex}, stopped reading")
+            self._loop.remove_reader(self._can_communicator.get_bus().fileno())
+            self._rx_error = ex
+            self._rx_event.set()
+            return
+        if not msgs:
+            return
+        self._rx_queue.extend(msgs)
+        overflow = len(self._rx_queue) - self.rx_queue_size
+        if overflow > 0:
+            self._dropped_count += overflow
+            for _ in range(overflow):
+                self._rx_queue.popleft()
+        self._rx_event.set()
@@ -0,0 +1,196 @@
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanCommunicatorBase, CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_capture_buffer import CAN_CAPTURE_MAX_PAYLOAD
+from cyclarity_in_vehicle_sdk.communication.can.models.can_models import CAN_BUS_STATISTICS, CAN_ID_STATISTICS
+
+# frame overhead in bits (SOF, arbitration, control, CRC, ACK, EOF, IFS), stuff bits are not accounted
+CAN_STANDARD_FRAME_OVERHEAD_BITS = 47
+CAN_EXTENDED_FRAME_OVERHEAD_BITS = 67
+
+_PAYLOAD_BITS = CAN_CAPTURE_MAX_PAYLOAD * 8
+
+
+class _IdStatistics():
+    """Running statistics of a single arbitration ID, updated in constant memory
+    """
+    __slots__ = ("count", "first_seen", "last_seen", "period_count", "period_mean", "period_m2",
+                 "dlc_counts", "max_dlc", "max_data_length", "bit_ones", "bit_flips", "last_payload")
+
+    def __init__(self):
+        self.count = 0
+        self.first_seen = 0.0
+        self.last_seen = 0.0
+        self.period_count = 0
+        self.period_mean = 0.0
+        self.period_m2 = 0.0
+        self.dlc_counts = np.zeros(CAN_CAPTURE_MAX_PAYLOAD + 1, dtype=np.int64)
+        self.max_dlc = 0
+        # differs from the DLC for remote frames, which carry no data
+        self.max_data_length = 0
+        self.bit_ones = np.zeros(_PAYLOAD_BITS, dtype=np.int64)
+        self.bit_flips = np.zeros(_PAYLOAD_BITS, dtype=np.int64)
+        self.last_payload: Optional[np.ndarray] = None
+
+    def update(self, timestamps: np.ndarray, dlcs: np.ndarray, data_lengths: np.ndarray, payloads: np.ndarray) -> None:
+        if self.count:
+            periods = np.diff(timestamps, prepend=self.last_seen)
+        else:
+            self.first_seen = float(timestamps[0])
+            periods = np.diff(timestamps)
+
+        if len(periods):
+            # merge the periods of the batch into the running mean/variance (Chan et al.)
+            batch_mean = float(periods.mean())
+            batch_m2 = float(((periods - batch_mean) ** 2).sum())
+            total = self.period_count + len(periods)
+            delta = batch_mean - self.period_mean
+            self.period_mean += delta * len(periods) / total
+            self.period_m2 += batch_m2 + delta ** 2 * self.period_count * len(periods) / total
+            self.period_count = total
+
+        self.dlc_counts += np.bincount(dlcs, minlength=CAN_CAPTURE_MAX_PAYLOAD + 1)
+        self.max_dlc = max(self.max_dlc, int(dlcs.max()))
+        self.max_data_length = max(self.max_data_length, int(data_lengths.max()))
+        self.bit_ones += np.unpackbits(payloads, axis=1).sum(axis=0, dtype=np.int64)
+        if self.last_payload is not None:
+            payloads_chain = np.vstack((self.last_payload, payloads))
+        else:
+            payloads_chain = payloads
+        self.bit_flips += np.unpackbits(payloads_chain[1:] ^ payloads_chain[:-1], axis=1).sum(axis=0, dtype=np.int64)
+
+        self.last_payload = payloads[-1].copy()
+        self.last_seen = float(timestamps[-1])
+        self.count += len(timestamps)
+
+    def to_model(self, arbitration_id: int) -> CAN_ID_STATISTICS:
+        duration = self.last_seen - self.first_seen
+        bits_count = self.max_data_length * 8
+        probabilities = self.bit_ones[:bits_count] / self.count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bit_entropies = -(probabilities * np.log2(probabilities) + (1 - probabilities) * np.log2(1 - probabilities))
+        return CAN_ID_STATISTICS(
+            arbitration_id=arbitration_id,
+            count=self.count,
+            first_seen=self.first_seen,
+            last_seen=self.last_seen,
+            rate=(self.count - 1) / duration if duration > 0 else 0.0,
+            mean_period=self.period_mean if self.period_count else None,
+            period_jitter=float(np.sqrt(self.period_m2 / self.period_count)) if self.period_count else None,
+            dlc_distribution={dlc: int(count) for dlc, count in enumerate(self.dlc_counts.tolist()) if count},
+            bit_flip_counts=self.bit_flips[:bits_count].tolist(),
+            payload_entropy=float(np.nansum(bit_entropies)),
+        )
+
+
+class CanBusStatistics():
+    """Incremental per arbitration ID statistics of CAN traffic:
+    rate, period jitter, DLC distribution, per bit flip counts and payload entropy.
+    Frames are not stored, every update costs constant time and memory per frame,
+    batches are processed with vectorized operations per arbitration ID.
+    """
+    def __init__(self, bitrate: Optional[int] = None):
+        """
+        Args:
+            bitrate (Optional[int], optional): the bus bitrate, used for estimating the bus load. Defaults to None.
+        """
+        self.bitrate = bitrate
+        self._ids: dict[int, _IdStatistics] = {}
+        self._total_frames = 0
+        self._total_bits = 0
+        self._first_seen: Optional[float] = None
+        self._last_seen: Optional[float] = None
+        self._lock = threading.Lock()
+        self._attached: list[CanCommunicatorBase] = []
+
+    def attach(self, communicator: CanCommunicatorBase) -> None:
+        """update the statistics with every CAN message received by the communicator
+
+        Args:
+            communicator (CanCommunicatorBase): the communicator to attach to
+        """
+        communicator.add_rx_listener(self.update_batch)
+        self._attached.append(communicator)
+
+    def detach(self) -> None:
+        """stop updating the statistics from the attached communicators
+        """
+        for communicator in self._attached:
+            communicator.remove_rx_listener(self.update_batch)
+        self._attached.clear()
+
+    def update(self, msg: CanMessage) -> None:
+        """update the statistics with a single CAN message
+
+        Args:
+            msg (CanMessage): the received CAN message
+        """
+        self.update_batch([msg])
+
+    def update_batch(self, msgs: Sequence[CanMessage]) -> None:
+        """update the statistics with a batch of CAN messages
+
+        Args:
+            msgs (Sequence[CanMessage]): the received CAN messages, in reception order
+        """
+        msgs = [msg for msg in msgs if not msg.is_error_frame]
+        if not msgs:
+            return
+        count = len(msgs)
+        ids = np.fromiter((msg.arbitration_id for msg in msgs), dtype=np.uint32, count=count)
+        timestamps = np.fromiter((msg.timestamp for msg in msgs), dtype=np.float64, count=count)
+        dlcs = np.fromiter((msg.dlc for msg in msgs), dtype=np.int64, count=count)
+        data_lengths = np.fromiter((len(msg.data) for msg in msgs), dtype=np.int64, count=count)
+        extended = np.fromiter((msg.is_extended_id for msg in msgs), dtype=bool, count=count)
+        payloads = np.frombuffer(b"".join(bytes(msg.data).ljust(CAN_CAPTURE_MAX_PAYLOAD, b"\x00") for msg in msgs),
+                                 dtype=np.uint8).reshape(count, CAN_CAPTURE_MAX_PAYLOAD)
+        frame_bits = int(data_lengths.sum()) * 8 + int(np.where(extended, CAN_EXTENDED_FRAME_OVERHEAD_BITS, CAN_STANDARD_FRAME_OVERHEAD_BITS).sum())
+
+        order = np.argsort(ids, kind="stable")
+        unique_ids, group_starts = np.unique(ids[order], return_index=True)
+        groups = np.split(order, group_starts[1:])
+        with self._lock:
+            for canid, rows in zip(unique_ids.tolist(), groups):
+                id_statistics = self._ids.get(canid)
+                if id_statistics is None:
+                    id_statistics = self._ids[canid] = _IdStatistics()
+                id_statistics.update(timestamps[rows], dlcs[rows], data_lengths[rows], payloads[rows])
+
+            self._total_frames += count
+            self._total_bits += frame_bits
+            if self._first_seen is None:
+                self._first_seen = float(timestamps[0])
+            self._last_seen = float(timestamps[-1])
+
+    def reset(self) -> None:
+        """clear all the collected statistics
+        """
+        with self._lock:
+            self._ids.clear()
+            self._total_frames = 0
+            self._total_bits = 0
+            self._first_seen = None
+            self._last_seen = None
+
+    def snapshot(self) -> CAN_BUS_STATISTICS:
+        """get the current statistics
+
+        Returns:
+            CAN_BUS_STATISTICS: statistics of the bus and of each arbitration ID
+        """
+        with self._lock:
+            duration = (self._last_seen - self._first_seen) if self._total_frames else 0.0
+            bus_load = None
+            if self.bitrate and duration > 0:
+                bus_load = self._total_bits / (duration * self.bitrate)
+            return CAN_BUS_STATISTICS(
+                total_frames=self._total_frames,
+                first_seen=self._first_seen,
+                last_seen=self._last_seen,
+                frames_per_second=self._total_frames / duration if duration > 0 else 0.0,
+                bus_load=bus_load,
+                ids={canid: id_statistics.to_model(canid) for canid, id_statistics in self._ids.items()},
+            )
@@ -0,0 +1,214 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+
+CAN_CAPTURE_MAX_PAYLOAD = 64
+
+# bits of the `flags` column
+FLAG_EXTENDED_ID = 0x01
+FLAG_REMOTE_FRAME = 0x02
+FLAG_ERROR_FRAME = 0x04
+FLAG_FD = 0x08
+FLAG_BITRATE_SWITCH = 0x10
+FLAG_ERROR_STATE_INDICATOR = 0x20
+FLAG_RX = 0x40
+
+_INDEX_INITIAL_SIZE = 64
+
+
+class _RowIndex():
+    """Growable array of row offsets of a single arbitration ID
+    """
+    def __init__(self):
+        self.rows = np.empty(_INDEX_INITIAL_SIZE, dtype=np.int64)
+        self.count = 0
+
+    def extend(self, rows: np.ndarray) -> None:
+        required = self.count + len(rows)
+        if required > len(self.rows):
+            grown = np.empty(max(required, 2 * len(self.rows)), dtype=np.int64)
+            grown[:self.count] = self.rows[:self.count]
+            self.rows = grown
+        self.rows[self.count:required] = rows
+        self.count = required
+
+    def view(self) -> np.ndarray:
+        return self.rows[:self.count]
+
+
+class CanCaptureBuffer():
+    """Columnar, preallocated storage for captured CAN frames.
+    Each frame takes a row in the timestamp, arbitration_id, dlc, data_length, flags and payload arrays,
+    and an index from arbitration ID to its rows is maintained as frames are added,
+    allowing per-ID queries to be performed as vectorized slices.
+    Frames added after the buffer is full are dropped and counted in `dropped_count`.
+    """
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("CanCaptureBuffer capacity must be positive")
+        self.capacity = capacity
+        self.timestamp = np.zeros(capacity, dtype=np.float64)
+        self.arbitration_id = np.zeros(capacity, dtype=np.uint32)
+        self.dlc = np.zeros(capacity, dtype=np.uint8)
+        # remote frames have a DLC but no data
+        self.data_length = np.zeros(capacity, dtype=np.uint8)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.data = np.zeros((capacity, CAN_CAPTURE_MAX_PAYLOAD), dtype=np.uint8)
+        self.dropped_count = 0
+        self._count = 0
+        self._id_index: dict[int, _RowIndex] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def is_full(self) -> bool:
+        return self._count >= self.capacity
+
+    def append(self, msg: CanMessage) -> bool:
+        """add a single CAN message to the buffer
+
+        Args:
+            msg (CanMessage): the CAN message to add
+
+        Returns:
+            bool: True if the message was stored, False if the buffer is full
+        """
+        return self.extend([msg]) == 1
+
+    def extend(self, msgs: Sequence[CanMessage]) -> int:
+        """add CAN messages to the buffer
+
+        Args:
+            msgs (Sequence[CanMessage]): the CAN messages to add
+
+        Returns:
+            int: amount of messages stored, messages exceeding the capacity are dropped
+        """
+        stored = min(len(msgs), self.capacity - self._count)
+        self.dropped_count += len(msgs) - stored
+        if stored <= 0:
+            return 0
+
+        msgs = msgs[:stored]
+        start, end = self._count, self._count + stored
+        self.timestamp[start:end] = [msg.timestamp for msg in msgs]
+        ids = np.fromiter((msg.arbitration_id for msg in msgs), dtype=np.uint32, count=stored)
+        self.arbitration_id[start:end] = ids
+        self.dlc[start:end] = [msg.dlc for msg in msgs]
+        self.data_length[start:end] = [len(msg.data) for msg in msgs]
+        self.flags[start:end] = [self._pack_flags(msg) for msg in msgs]
+        payloads = b"".join(bytes(msg.data).ljust(CAN_CAPTURE_MAX_PAYLOAD, b"\x00") for msg in msgs)
+        self.data[start:end] = np.frombuffer(payloads, dtype=np.uint8).reshape(stored, CAN_CAPTURE_MAX_PAYLOAD)
+        self._count = end
+
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        for i, canid in enumerate(unique_ids.tolist()):
+            rows = np.flatnonzero(inverse == i) + start
+            self._id_index.setdefault(canid, _RowIndex()).extend(rows)
+
+        return stored
+
+    def clear(self) -> None:
+        """remove all the frames from the buffer, keeping the allocated arrays
+        """
+        self._count = 0
+        self.dropped_count = 0
+        self._id_index.clear()
+
+    def get_ids(self) -> list[int]:
+        """get the arbitration IDs captured
+
+        Returns:
+            list[int]: sorted list of the captured arbitration IDs
+        """
+        return sorted(self._id_index.keys())
+
+    def count_by_id(self) -> dict[int, int]:
+        """get the amount of frames captured per arbitration ID
+
+        Returns:
+            dict[int, int]: arbitration ID to amount of frames
+        """
+        return {canid: index.count for canid, index in self._id_index.items()}
+
+    def select(self,
+               arbitration_id: Optional[int] = None,
+               start_time: Optional[float] = None,
+               end_time: Optional[float] = None) -> np.ndarray:
+        """get the row offsets of frames matching the query
+
+        Args:
+            arbitration_id (Optional[int], optional): arbitration ID of the frames, None for all IDs.
+            start_time (Optional[float], optional): minimal timestamp (inclusive), None for no lower bound.
+            end_time (Optional[float], optional): maximal timestamp (inclusive), None for no upper bound.
+
+        Returns:
+            np.ndarray: row offsets of the matching frames, in capture order
+        """
+        if arbitration_id is None:
+            rows = np.arange(self._count)
+        elif arbitration_id in self._id_index:
+            rows = self._id_index[arbitration_id].view()
+        else:
+            return np.empty(0, dtype=np.int64)
+
+        if start_time is None and end_time is None:
+            return rows
+        timestamps = self.timestamp[rows]
+        mask = np.ones(len(rows), dtype=bool)
+        if start_time is not None:
+            mask &= timestamps >= start_time
+        if end_time is not None:
+            mask &= timestamps <= end_time
+        return rows[mask]
+
+    def get_payloads(self, rows: np.ndarray) -> list[bytes]:
+        """get the payloads of the given rows, trimmed to their length
+
+        Args:
+            rows (np.ndarray): row offsets as returned by `select`
+
+        Returns:
+            list[bytes]: the payload of each row
+        """
+        return [self.data[row, :length].tobytes() for row, length in zip(rows.tolist(), self.data_length[rows].tolist())]
+
+    def to_messages(self, rows: Optional[np.ndarray] = None) -> list[CanMessage]:
+        """convert rows back into CAN messages
+
+        Args:
+            rows (Optional[np.ndarray], optional): row offsets as returned by `select`, None for all rows.
+
+        Returns:
+            list[CanMessage]: the CAN messages
+        """
+        if rows is None:
+            rows = np.arange(self._count)
+        msgs = []
+        for row, payload in zip(rows.tolist(), self.get_payloads(rows)):
+            flags = int(self.flags[row])
+            msgs.append(CanMessage(timestamp=float(self.timestamp[row]),
+                                   arbitration_id=int(self.arbitration_id[row]),
+                                   is_extended_id=bool(flags & FLAG_EXTENDED_ID),
+                                   is_remote_frame=bool(flags & FLAG_REMOTE_FRAME),
+                                   is_error_frame=bool(flags & FLAG_ERROR_FRAME),
+                                   is_fd=bool(flags & FLAG_FD),
+                                   bitrate_switch=bool(flags & FLAG_BITRATE_SWITCH),
+                                   error_state_indicator=bool(flags & FLAG_ERROR_STATE_INDICATOR),
+                                   is_rx=bool(flags & FLAG_RX),
+                                   dlc=int(self.dlc[row]),
+                                   data=payload))
+        return msgs
+
+    @staticmethod
+    def _pack_flags(msg: CanMessage) -> int:
+        return ((FLAG_EXTENDED_ID if msg.is_extended_id else 0)
+                | (FLAG_REMOTE_FRAME if msg.is_remote_frame else 0)
+                | (FLAG_ERROR_FRAME if msg.is_error_frame else 0)
+                | (FLAG_FD if msg.is_fd else 0)
+                | (FLAG_BITRATE_SWITCH if msg.bitrate_switch else 0)
+                | (FLAG_ERROR_STATE_INDICATOR if msg.error_state_indicator else 0)
+                | (FLAG_RX if msg.is_rx else 0))
@@ -1,9 +1,79 @@
+import ctypes
+import errno
+import fcntl
+import select
+import socket
+import struct
+import threading
 import time
+from collections import deque
 from types import TracebackType
-from pydantic import Field
-from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanCommunicatorBase, CanMessage, BusABC
+from pydantic import Field, PrivateAttr, model_validator
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import DEFAULT_BATCH_SIZE, SNIFF_POLL_INTERVAL, CanCommunicatorBase, CanMessage, BusABC, CyclicSendTask, RxListener
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_capture_buffer import CanCaptureBuffer
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_ring_buffer import CanRingBuffer
+from cyclarity_in_vehicle_sdk.communication.can.models.can_models import CAN_LATENCY_STATISTICS, CAN_RESPONSE_LATENCY
+from cyclarity_in_vehicle_sdk.utils.latency.latency_histogram import LatencyHistogram
+from can import CanOperationError
 from can.interfaces.socketcan import SocketcanBus
-from typing import Optional, Sequence, Type, Union
+from can.interfaces.socketcan.socketcan import capture_message, dissect_can_frame
+from can.interfaces.socketcan.constants import CAN_EFF_FLAG, CAN_ERR_FLAG, CAN_RTR_FLAG, CANFD_BRS, CANFD_ESI, CANFD_MTU, CAN_RAW_FILTER, MSK_ARBID, SO_TIMESTAMPNS, SOL_CAN_RAW
+from typing import Callable, Iterator, Optional, Sequence, Type, Union
+
+# SocketCAN definitions that are not exposed by python-can
+CAN_INV_FILTER = 0x20000000
+CAN_RAW_JOIN_FILTERS = 6
+CAN_RAW_FILTER_MAX = 512
+CAN_ID_MAX_11_BITS = 0x7FF
+
+# Linux timestamping definitions (linux/net_tstamp.h), not exposed by the socket module
+SO_TIMESTAMPING = 37
+SOF_TIMESTAMPING_RX_HARDWARE = 1 << 2
+SOF_TIMESTAMPING_RX_SOFTWARE = 1 << 3
+SOF_TIMESTAMPING_SOFTWARE = 1 << 4
+SOF_TIMESTAMPING_RAW_HARDWARE = 1 << 6
+SIOCSHWTSTAMP = 0x89B0
+SIOCGHWTSTAMP = 0x89B1
+HWTSTAMP_TX_ON = 1
+HWTSTAMP_FILTER_ALL = 1
+
+_TIMESPEC_STRUCT = struct.Struct("@ll")
+_SCM_TIMESTAMPING_STRUCT = struct.Struct("@llllll")
+_TIMESTAMPING_ANCILLARY_BUFFER_SIZE = socket.CMSG_SPACE(_TIMESPEC_STRUCT.size) + socket.CMSG_SPACE(_SCM_TIMESTAMPING_STRUCT.size)
+# send requests awaiting their TX echo, per arbitration ID
+PENDING_TX_MAX = 1024
+_HWTSTAMP_CONFIG_STRUCT = struct.Struct("@iii")
+
+
+class _TimestampingSocketcanBus(SocketcanBus):
+    """SocketCAN bus reading its frames along with their timestamping control messages,
+    so that the readers of the bus are not handed the TX echoes of the frames sent over it
+    """
+    def __init__(self, capture: Callable[[socket.socket], Optional[CanMessage]], **kwargs):
+        self._capture = capture
+        super().__init__(**kwargs)
+
+    def _recv_internal(self, timeout: Optional[float]) -> tuple[Optional[CanMessage], bool]:
+        start_time = time.time()
+        while True:
+            time_left = None if timeout is None else max(0.0, timeout - (time.time() - start_time))
+            try:
+                ready_sockets, _, _ = select.select([self.socket], [], [], time_left)
+            except OSError as error:
+                raise CanOperationError(f"Failed to receive: {error.strerror}", error.errno) from error
+            if not ready_sockets:
+                return None, self._is_filtered
+            try:
+                msg = self._capture(self.socket)
+            except CanOperationError as ex:
+                # another reader of the socket may have drained it
+                if ex.error_code in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    continue
+                raise
+            if msg is not None:
+                msg.channel = self.channel
+                return msg, self._is_filtered
+
 
 class CanCommunicatorSocketCan(CanCommunicatorBase):
     """This class handles the communication over the CAN bus using the SocketCAN interface."
@@ -11,8 +81,30 @@ class CanCommunicatorSocketCan(CanCommunicatorBase):
     channel: str = Field(description="Name of CAN interface to work with. (e.g. can0, vcan0, etc...)")
     support_fd: bool = Field(description="CAN bus supports CAN-FD.")
     blacklist_ids: set[int] = Field(default=set(), description="Incoming CAN IDs to ignore")
+    allowlist_ids: set[int] = Field(default=set(), description="Incoming CAN IDs to receive exclusively, empty means all IDs are allowed")
+    timestamping: bool = Field(default=False, description="Enable kernel timestamping of received and transmitted frames, and latency measurement")
+    hardware_timestamping: bool = Field(default=False, description="Enable hardware timestamping on the interface where supported, requires timestamping and CAP_NET_ADMIN. "
+                                                                   "This is an interface-wide setting, the previous configuration is restored on close")
 
     _bus: SocketcanBus = None
+    _kernel_filtering: bool = False
+    _delivered_frames: int = 0
+    _rx_packets_baseline: int = 0
+    _rx_listeners: list[RxListener] = PrivateAttr(default_factory=list)
+    _hardware_timestamps: bool = False
+    _saved_hwtstamp_config: Optional[bytes] = None
+    _latency_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _pending_tx: dict[int, deque] = PrivateAttr(default_factory=dict)
+    _last_tx_timestamps: dict[int, float] = PrivateAttr(default_factory=dict)
+    _tx_latency: dict[int, LatencyHistogram] = PrivateAttr(default_factory=dict)
+    _latency_pairs: dict[tuple[int, int], LatencyHistogram] = PrivateAttr(default_factory=dict)
+    _pending_requests: dict[tuple[int, int], tuple[float, Optional[float]]] = PrivateAttr(default_factory=dict)
+
+    @model_validator(mode="after")
+    def validate_hardware_timestamping(self) -> "CanCommunicatorSocketCan":
+        if self.hardware_timestamping and not self.timestamping:
+            raise ValueError("Hardware timestamping requires timestamping to be enabled")
+        return self
 
     def open(self) -> None:
         """Opens the communicator. this method must be called before usage.
@@ -20,14 +112,26 @@ class CanCommunicatorSocketCan(CanCommunicatorBase):
         if self._bus:
             raise RuntimeError("CanCommunicatorSocketCan is already open")
         
-        self._bus = SocketcanBus(channel=self.channel, fd=self.support_fd)
+        if self.timestamping:
+            # the TX echoes are needed for the latency measurement, they are consumed on every read of the bus
+            self._bus = _TimestampingSocketcanBus(capture=self._capture_timestamped_message, channel=self.channel, fd=self.support_fd, receive_own_messages=True)
+        else:
+            self._bus = SocketcanBus(channel=self.channel, fd=self.support_fd)
+        # python-can always selects before reading, a non-blocking socket allows draining it in batches
+        self._bus.socket.setblocking(False)
+        self._apply_kernel_filters()
+        if self.timestamping:
+            self._enable_timestamping()
 
     def close(self) -> None:
         """Closes the communicator.
         """
         if self._bus:
+            if self._saved_hwtstamp_config is not None:
+                self._restore_hardware_timestamping()
             self._bus.shutdown()
             self._bus = None
+            self._kernel_filtering = False
 
     def __enter__(self):
         self.open()
@@ -47,23 +151,46 @@ class CanCommunicatorSocketCan(CanCommunicatorBase):
         if not self._bus:
             raise RuntimeError("CanCommunicatorSocketCan has not been opened")
         
-        self._bus.send(msg=can_msg, timeout=timeout)
+        if not self.timestamping:
+            self._bus.send(msg=can_msg, timeout=timeout)
+            return
+        # queued before sending, as the echo may be received before the send returns
+        tx_time = time.time()
+        with self._latency_lock:
+            pending_tx = self._pending_tx.get(can_msg.arbitration_id)
+            if pending_tx is None:
+                pending_tx = self._pending_tx[can_msg.arbitration_id] = deque(maxlen=PENDING_TX_MAX)
+            pending_tx.append(tx_time)
+        try:
+            self._bus.send(msg=can_msg, timeout=timeout)
+        except Exception:
+            # a frame that was not sent has no echo, its timestamp would be matched to the echo of the next one
+            with self._latency_lock:
+                try:
+                    pending_tx.remove(tx_time)
+                except ValueError:
+                    pass
+            raise
 
     def send_periodically(self,
                           msgs: Union[CanMessage, Sequence[CanMessage]],
                           period:    float,
-                          duration:  Optional[float] = None):
+                          duration:  Optional[float] = None) -> CyclicSendTask:
         """Send periodically CAN message(s)
+        The messages are scheduled by the kernel broadcast manager (CAN_BCM).
 
         Args:
             msgs (Union[CanMessage, Sequence[CanMessage]]): single message or sequence of messages to be sent periodically
             period (float): time period in seconds between sending of the message(s)
             duration (Optional[float], optional): duration time in seconds tp be sending the message(s) periodically. None means indefinitely.
+
+        Returns:
+            CyclicSendTask: handle of the periodic task, allowing to stop it or modify its data
         """
         if not self._bus:
             raise RuntimeError("CanCommunicatorSocketCan has not been opened")
         
-        self._bus.send_periodic(msgs=msgs, period=period, duration=duration)
+        return self._bus.send_periodic(msgs=msgs, period=period, duration=duration)
 
     def receive(self, timeout: Optional[float] = None) -> Optional[CanMessage]:
         """receive a CAN message over the channel
@@ -77,9 +204,15 @@ class CanCommunicatorSocketCan(CanCommunicatorBase):
         if not self._bus:
             raise RuntimeError("CanCommunicatorSocketCan has not been opened")
         
+        if self.timestamping:
+            # python-can's reception does not parse the timestamping control messages
+            ret_msgs = self.receive_batch(max_frames=1, timeout=timeout or None)
+            return ret_msgs[0] if ret_msgs else None
+
         if not timeout:
             ret_msg = self._bus.recv()
-            if ret_msg and ret_msg.arbitration_id not in self.blacklist_ids:
+            if ret_msg and self._is_accepted(ret_msg):
+                self._notify_rx_listeners([ret_msg])
                 return ret_msg
             else:
                 return None
@@ -88,11 +221,55 @@ class CanCommunicatorSocketCan(CanCommunicatorBase):
         start_time = time.time()
         while time_past < timeout:
             ret_msg = self._bus.recv(timeout=timeout)
-            if ret_msg and ret_msg.arbitration_id not in self.blacklist_ids:
+            if ret_msg and self._is_accepted(ret_msg):
+                self._notify_rx_listeners([ret_msg])
                 return ret_msg
             time_past = time.time() - start_time
         return None
 
+    def receive_batch(self, max_frames: int = DEFAULT_BATCH_SIZE, timeout: Optional[float] = None) -> list[CanMessage]:
+        """receive all the CAN messages pending on the channel in a single operation
+        Waits for the socket to become readable once, and then drains it without blocking.
+
+        Args:
+            max_frames (int, optional): maximal amount of CAN messages to return. Defaults to DEFAULT_BATCH_SIZE.
+            timeout (Optional[float], optional): timeout in seconds to wait for the first message. None means indefinably.
+
+        Returns:
+            list[CanMessage]: CAN messages received, empty list if timeout has reached.
+        """
+        if not self._bus:
+            raise RuntimeError("CanCommunicatorSocketCan has not been opened")
+
+        sock = self._bus.socket
+        ret_msgs: list[CanMessage] = []
+        start_time = time.time()
+        while True:
+            time_left = None if timeout is None else max(0.0, timeout - (time.time() - start_time))
+            ready_sockets, _, _ = select.select([sock], [], [], time_left)
+            if not ready_sockets:
+                return ret_msgs
+
+            while len(ret_msgs) < max_frames:
+                try:
+                    msg = self._capture_timestamped_message(sock) if self.timestamping else capture_message(sock)
+                except CanOperationError as ex:
+                    if ex.error_code in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        break
+                    raise
+                if msg is None:
+                    continue
+                msg.channel = self.channel
+                if self._is_accepted(msg):
+                    ret_msgs.append(msg)
+
+            if ret_msgs:
+                self._notify_rx_listeners(ret_msgs)
+                return ret_msgs
+            # all pending frames may have been filtered out, keep waiting for the remaining time
+            if (timeout is not None and time.time() - start_time >= timeout):
+                return ret_msgs
+
     def sniff(self, sniff_time: float) -> Optional[list[CanMessage]]:
         """sniff CAN messages from the channel for specific time
 
@@ -109,20 +286,196 @@ class CanCommunicatorSocketCan(CanCommunicatorBase):
         start_time = time.time()
         time_passed = 0
         while time_passed < sniff_time:
-            m = self.receive(timeout=(sniff_time - time_passed))
-            if m:
-                ret_msgs.append(m)
+            ret_msgs.extend(self.receive_batch(timeout=(sniff_time - time_passed)))
             time_passed = time.time() - start_time
         return ret_msgs
 
+    def iter_sniff(self,
+                   sniff_time: Optional[float] = None,
+                   batches: bool = False,
+                   ring_buffer: Optional[CanRingBuffer] = None) -> Iterator[Union[CanMessage, list[CanMessage]]]:
+        """sniff CAN messages from the channel, yielding them as they arrive
+        When a ring buffer is provided, the channel is read by a background thread into the buffer,
+        so a slow consumer causes messages to be dropped according to the buffer's overflow policy
+        (and counted in `ring_buffer.dropped_count`) instead of unbounded memory growth.
+
+        Args:
+            sniff_time (Optional[float], optional): time in seconds to be sniffing the channel. None means indefinitely.
+            batches (bool, optional): yield lists of CAN messages instead of single messages. Defaults to False.
+            ring_buffer (Optional[CanRingBuffer], optional): bounded buffer between the channel and the consumer. Defaults to None.
+
+        Yields:
+            Union[CanMessage, list[CanMessage]]: sniffed CAN message, or a batch of CAN messages
+        """
+        if not self._bus:
+            raise RuntimeError("CanCommunicatorSocketCan has not been opened")
+
+        if ring_buffer is not None:
+            reader_stop_event = threading.Event()
+            reader_thread = threading.Thread(target=self._fill_ring_buffer,
+                                             args=(ring_buffer, sniff_time, reader_stop_event),
+                                             daemon=True)
+            reader_thread.start()
+
+        start_time = time.time()
+        try:
+            while True:
+                if ring_buffer is not None:
+                    if ring_buffer.closed and not len(ring_buffer):
+                        break
+                    msgs = ring_buffer.get(max_msgs=DEFAULT_BATCH_SIZE, timeout=SNIFF_POLL_INTERVAL)
+                else:
+                    time_passed = time.time() - start_time
+                    if sniff_time is not None and time_passed >= sniff_time:
+                        break
+                    time_left = SNIFF_POLL_INTERVAL if sniff_time is None else min(SNIFF_POLL_INTERVAL, sniff_time - time_passed)
+                    msgs = self.receive_batch(timeout=time_left)
+
+                if batches and msgs:
+                    yield msgs
+                elif not batches:
+                    yield from msgs
+        finally:
+            if ring_buffer is not None:
+                reader_stop_event.set()
+                reader_thread.join()
+
+    def sniff_into(self, capture_buffer: CanCaptureBuffer, sniff_time: Optional[float] = None) -> int:
+        """sniff CAN messages from the channel directly into a columnar capture buffer
+        Sniffing stops when the sniff time has passed or the capture buffer is full.
+
+        Args:
+            capture_buffer (CanCaptureBuffer): the buffer to store the sniffed messages in
+            sniff_time (Optional[float], optional): time in seconds to be sniffing the channel. None means until the buffer is full.
+
+        Returns:
+            int: amount of CAN messages stored in the capture buffer
+        """
+        stored = 0
+        for msgs in self.iter_sniff(sniff_time=sniff_time, batches=True):
+            stored += capture_buffer.extend(msgs)
+            if capture_buffer.is_full:
+                break
+        return stored
+
     def add_to_blacklist(self, canids: Sequence[int]):
         """adds can IDs to a list of blacklist IDs to be ignore when sniffing or receiving
+        If the communicator is open, the kernel filters of the socket are updated accordingly.
 
         Args:
             canids (Sequence[int]): CAN IDs to be added to the blacklist
         """
         for canid in canids:
             self.blacklist_ids.add(canid)
+        if self._bus:
+            self._apply_kernel_filters()
+
+    def add_to_allowlist(self, canids: Sequence[int]):
+        """adds can IDs to a list of allowed IDs, once set only these IDs are received when sniffing or receiving
+        If the communicator is open, the kernel filters of the socket are updated accordingly.
+
+        Args:
+            canids (Sequence[int]): CAN IDs to be added to the allowlist
+        """
+        for canid in canids:
+            self.allowlist_ids.add(canid)
+        if self._bus:
+            self._apply_kernel_filters()
+
+    def remove_from_allowlist(self, canids: Sequence[int]):
+        """removes can IDs from the list of allowed IDs, an empty allowlist means all IDs are allowed
+        If the communicator is open, the kernel filters of the socket are updated accordingly.
+
+        Args:
+            canids (Sequence[int]): CAN IDs to be removed from the allowlist
+        """
+        for canid in canids:
+            self.allowlist_ids.discard(canid)
+        if self._bus:
+            self._apply_kernel_filters()
+
+    def add_rx_listener(self, listener: RxListener):
+        """adds a callback to be called with the CAN messages received by the communicator
+        The callback is called in the context of the receiving thread, thus it shall be short.
+
+        Args:
+            listener (RxListener): callback receiving a sequence of CAN messages
+        """
+        self._rx_listeners.append(listener)
+
+    def remove_rx_listener(self, listener: RxListener):
+        """removes a callback added with `add_rx_listener`
+
+        Args:
+            listener (RxListener): the callback to remove
+        """
+        if listener in self._rx_listeners:
+            self._rx_listeners.remove(listener)
+
+    def get_kernel_filtered_count(self) -> int:
+        """get the amount of frames received by the interface that were dropped by the kernel filters,
+        since the filters were last applied. The value is derived from the interface RX statistics,
+        thus frames transmitted locally over a virtual interface are counted as well.
+
+        Returns:
+            int: amount of frames filtered in the kernel, 0 if kernel filtering is not active.
+        """
+        if not self._kernel_filtering:
+            return 0
+        rx_packets = self._read_rx_packets()
+        if rx_packets is None:
+            return 0
+        return max(0, rx_packets - self._rx_packets_baseline - self._delivered_frames)
+
+    def add_latency_pair(self, request_id: int, response_id: int):
+        """measure the latency between frames transmitted with a request ID and the first frame received with a response ID following each of them
+        Requires timestamping, the measurements are taken by the receive operations of the communicator.
+
+        Args:
+            request_id (int): arbitration ID of the transmitted request frames
+            response_id (int): arbitration ID of the received response frames
+        """
+        if not self.timestamping:
+            raise RuntimeError("Latency measurement requires timestamping to be enabled")
+        with self._latency_lock:
+            self._latency_pairs.setdefault((request_id, response_id), LatencyHistogram())
+
+    def get_tx_timestamp(self, arbitration_id: int) -> Optional[float]:
+        """get the kernel timestamp of the last frame transmitted with an arbitration ID, taken from its TX echo
+        Requires timestamping, the TX echoes are processed by the receive operations of the communicator.
+
+        Args:
+            arbitration_id (int): the arbitration ID
+
+        Returns:
+            Optional[float]: the transmission timestamp, None if no transmission was seen
+        """
+        with self._latency_lock:
+            return self._last_tx_timestamps.get(arbitration_id)
+
+    def get_latency_statistics(self) -> CAN_LATENCY_STATISTICS:
+        """get the TX latency per arbitration ID and the latency of each request and response pair
+
+        Returns:
+            CAN_LATENCY_STATISTICS: the latencies measured
+        """
+        with self._latency_lock:
+            return CAN_LATENCY_STATISTICS(
+                hardware_timestamps=self._hardware_timestamps,
+                tx_latency={canid: histogram.to_model() for canid, histogram in self._tx_latency.items()},
+                response_latency=[CAN_RESPONSE_LATENCY(request_id=request_id, response_id=response_id, latency=histogram.to_model())
+                                  for (request_id, response_id), histogram in sorted(self._latency_pairs.items())],
+            )
+
+    def reset_latency_statistics(self):
+        """clear the latencies measured, the request and response pairs are kept
+        """
+        with self._latency_lock:
+            self._tx_latency.clear()
+            self._pending_tx.clear()
+            self._pending_requests.clear()
+            for histogram in self._latency_pairs.values():
+                histogram.reset()
 
     def get_bus(self) -> Type[BusABC]:
         """get the underling CAN bus 
@@ -132,4 +485,193 @@ class CanCommunicatorSocketCan(CanCommunicatorBase):
         """
         if not self._bus:
             raise RuntimeError("CanCommunicatorSocketCan has not been opened")
-        return self._bus
\ No newline at end of file
+        return self._bus
+
+    def _fill_ring_buffer(self, ring_buffer: CanRingBuffer, sniff_time: Optional[float], stop_event: threading.Event) -> None:
+        start_time = time.time()
+        try:
+            while not stop_event.is_set():
+                time_passed = time.time() - start_time
+                if sniff_time is not None and time_passed >= sniff_time:
+                    break
+                time_left = SNIFF_POLL_INTERVAL if sniff_time is None else min(SNIFF_POLL_INTERVAL, sniff_time - time_passed)
+                ring_buffer.put(self.receive_batch(timeout=time_left))
+        except Exception as ex:
+            self.logger.error(f"Stopped sniffing into ring buffer: {ex}")
+        finally:
+            ring_buffer.close()
+
+    def _hwtstamp_ioctl(self, request: int, config: bytes) -> bytes:
+        hwtstamp_config = ctypes.create_string_buffer(config, _HWTSTAMP_CONFIG_STRUCT.size)
+        fcntl.ioctl(self._bus.socket, request, struct.pack("@16sP", self.channel.encode(), ctypes.addressof(hwtstamp_config)))
+        return hwtstamp_config.raw
+
+    def _enable_hardware_timestamping(self) -> bool:
+        try:
+            # the driver's configuration is interface-wide, it is saved to be restored on close
+            previous_config = self._hwtstamp_ioctl(SIOCGHWTSTAMP, bytes(_HWTSTAMP_CONFIG_STRUCT.size))
+            self._hwtstamp_ioctl(SIOCSHWTSTAMP, _HWTSTAMP_CONFIG_STRUCT.pack(0, HWTSTAMP_TX_ON, HWTSTAMP_FILTER_ALL))
+        except OSError as ex:
+            self.logger.warning(f"Hardware timestamping is not available on {self.channel}: {ex}")
+            return False
+        self._saved_hwtstamp_config = previous_config
+        return True
+
+    def _restore_hardware_timestamping(self) -> None:
+        try:
+            self._hwtstamp_ioctl(SIOCSHWTSTAMP, self._saved_hwtstamp_config)
+        except OSError as ex:
+            self.logger.warning(f"Failed restoring the hardware timestamping configuration of {self.channel}: {ex}")
+        self._saved_hwtstamp_config = None
+        self._hardware_timestamps = False
+
+    def _enable_timestamping(self) -> None:
+        sock = self._bus.socket
+        self._hardware_timestamps = self.hardware_timestamping and self._enable_hardware_timestamping()
+
+        flags = SOF_TIMESTAMPING_RX_SOFTWARE | SOF_TIMESTAMPING_SOFTWARE
+        if self._hardware_timestamps:
+            flags |= SOF_TIMESTAMPING_RX_HARDWARE | SOF_TIMESTAMPING_RAW_HARDWARE
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPING, flags)
+        except OSError as ex:
+            # the timestamps provided by SO_TIMESTAMPNS are still used
+            self.logger.warning(f"Failed enabling SO_TIMESTAMPING on {self.channel}: {ex}")
+            self._hardware_timestamps = False
+
+    def _capture_timestamped_message(self, sock: socket.socket) -> Optional[CanMessage]:
+        """read a frame along with its timestamps, TX echoes of frames sent by this communicator are consumed for the latency measurement
+
+        Returns:
+            Optional[CanMessage]: the received CAN message, None if the frame was a TX echo
+        """
+        try:
+            frame, ancillary_data, msg_flags, _ = sock.recvmsg(CANFD_MTU, _TIMESTAMPING_ANCILLARY_BUFFER_SIZE)
+        except OSError as error:
+            raise CanOperationError(f"Error receiving: {error.strerror}", error.errno) from error
+
+        timestamp = None
+        hardware_timestamp = None
+        for cmsg_level, cmsg_type, cmsg_data in ancillary_data:
+            if cmsg_level != socket.SOL_SOCKET:
+                continue
+            if cmsg_type == SO_TIMESTAMPING and len(cmsg_data) >= _SCM_TIMESTAMPING_STRUCT.size:
+                software_sec, software_nsec, _, _, hardware_sec, hardware_nsec = _SCM_TIMESTAMPING_STRUCT.unpack_from(cmsg_data)
+                if software_sec or software_nsec:
+                    timestamp = software_sec + software_nsec * 1e-9
+                if hardware_sec or hardware_nsec:
+                    hardware_timestamp = hardware_sec + hardware_nsec * 1e-9
+            elif cmsg_type == SO_TIMESTAMPNS and timestamp is None and len(cmsg_data) >= _TIMESPEC_STRUCT.size:
+                seconds, nanoseconds = _TIMESPEC_STRUCT.unpack_from(cmsg_data)
+                timestamp = seconds + nanoseconds * 1e-9
+        if timestamp is None:
+            timestamp = time.time()
+
+        can_id, can_dlc, flags, data = dissect_can_frame(frame)
+        msg = CanMessage(timestamp=timestamp,
+                         arbitration_id=can_id & (0x1FFFFFFF if can_id & CAN_EFF_FLAG else 0x7FF),
+                         is_extended_id=bool(can_id & CAN_EFF_FLAG),
+                         is_remote_frame=bool(can_id & CAN_RTR_FLAG),
+                         is_error_frame=bool(can_id & CAN_ERR_FLAG),
+                         is_fd=len(frame) == CANFD_MTU,
+                         is_rx=not msg_flags & socket.MSG_DONTROUTE,
+                         bitrate_switch=bool(flags & CANFD_BRS),
+                         error_state_indicator=bool(flags & CANFD_ESI),
+                         dlc=can_dlc,
+                         data=data)
+
+        if msg_flags & socket.MSG_CONFIRM:
+            self._on_tx_echo(msg, hardware_timestamp)
+            return None
+        self._on_timestamped_rx(msg, hardware_timestamp)
+        return msg
+
+    def _on_tx_echo(self, msg: CanMessage, hardware_timestamp: Optional[float]) -> None:
+        with self._latency_lock:
+            self._last_tx_timestamps[msg.arbitration_id] = msg.timestamp
+            pending_tx = self._pending_tx.get(msg.arbitration_id)
+            if pending_tx:
+                histogram = self._tx_latency.get(msg.arbitration_id)
+                if histogram is None:
+                    histogram = self._tx_latency[msg.arbitration_id] = LatencyHistogram()
+                histogram.record(msg.timestamp - pending_tx.popleft())
+            for request_id, response_id in self._latency_pairs:
+                if request_id == msg.arbitration_id:
+                    self._pending_requests[(request_id, response_id)] = (msg.timestamp, hardware_timestamp)
+
+    def _on_timestamped_rx(self, msg: CanMessage, hardware_timestamp: Optional[float]) -> None:
+        if not self._pending_requests:
+            return
+        with self._latency_lock:
+            for request_id, response_id in list(self._pending_requests):
+                if response_id != msg.arbitration_id:
+                    continue
+                request_timestamp, request_hardware_timestamp = self._pending_requests.pop((request_id, response_id))
+                if hardware_timestamp is not None and request_hardware_timestamp is not None:
+                    latency = hardware_timestamp - request_hardware_timestamp
+                else:
+                    latency = msg.timestamp - request_timestamp
+                self._latency_pairs[(request_id, response_id)].record(latency)
+
+    def _notify_rx_listeners(self, msgs: list[CanMessage]) -> None:
+        for listener in self._rx_listeners:
+            try:
+                listener(msgs)
+            except Exception as ex:
+                self.logger.error(f"RX listener failed: {ex}")
+
+    def _is_accepted(self, msg: CanMessage) -> bool:
+        # every frame reaching this point has passed the kernel filters
+        self._delivered_frames += 1
+        if self._kernel_filtering:
+            return True
+        if self.allowlist_ids and msg.arbitration_id not in self.allowlist_ids:
+            return False
+        return msg.arbitration_id not in self.blacklist_ids
+
+    def _build_kernel_filters(self) -> tuple[list[tuple[int, int]], bool]:
+        """compile the allowlist and blacklist into SocketCAN `can_filter` entries
+
+        Returns:
+            tuple[list[tuple[int, int]], bool]: list of (can_id, can_mask) pairs, and whether the filters shall be joined (logical AND)
+        """
+        if self.allowlist_ids:
+            return [self._kernel_filter(canid) for canid in sorted(self.allowlist_ids - self.blacklist_ids)], False
+        if self.blacklist_ids:
+            return [self._kernel_filter(canid, inverted=True) for canid in sorted(self.blacklist_ids)], True
+        return [(0, 0)], False
+
+    @staticmethod
+    def _kernel_filter(canid: int, inverted: bool = False) -> tuple[int, int]:
+        # the frame format is matched as well, so an 11 bits ID does not match the 29 bits ID of the same value
+        filter_id = canid | CAN_EFF_FLAG if canid > CAN_ID_MAX_11_BITS else canid
+        return (filter_id | CAN_INV_FILTER if inverted else filter_id), MSK_ARBID | CAN_EFF_FLAG
+
+    def _apply_kernel_filters(self) -> None:
+        filters, join = self._build_kernel_filters()
+        kernel_filtering = True
+        if len(filters) > CAN_RAW_FILTER_MAX:
+            self.logger.warning(f"Too many CAN IDs for kernel filtering ({len(filters)}), falling back to software filtering")
+            filters, join = [(0, 0)], False
+            kernel_filtering = False
+
+        sock = self._bus.socket
+        try:
+            sock.setsockopt(SOL_CAN_RAW, CAN_RAW_JOIN_FILTERS, 1 if join else 0)
+            sock.setsockopt(SOL_CAN_RAW, CAN_RAW_FILTER,
+                            struct.pack(f"={2 * len(filters)}I", *(value for can_filter in filters for value in can_filter)))
+        except OSError as ex:
+            self.logger.warning(f"Failed setting kernel CAN filters, falling back to software filtering: {ex}")
+            self._kernel_filtering = False
+            return
+
+        self._kernel_filtering = kernel_filtering
+        self._delivered_frames = 0
+        self._rx_packets_baseline = self._read_rx_packets() or 0
+
+    def _read_rx_packets(self) -> Optional[int]:
+        try:
+            with open(f"/sys/class/net/{self.channel}/statistics/rx_packets") as rx_stats:
+                return int(rx_stats.read())
+        except (OSError, ValueError):
+            return None
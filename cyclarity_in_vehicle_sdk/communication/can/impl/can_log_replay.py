@@ -0,0 +1,123 @@
+import copy
+import threading
+import time
+from typing import Iterable, Optional
+
+import can
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanCommunicatorBase, CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.models.can_models import CAN_REPLAY_RESULT
+from cyclarity_in_vehicle_sdk.utils.latency.latency_histogram import LatencyHistogram
+
+
+class CanLogReplay(ParsableModel):
+    """Replays recorded CAN traffic (candump, ASC, BLF and the other formats supported by python-can) over a CAN communicator.
+    The log is read in a streaming fashion, frames are scheduled against a monotonic clock according to
+    their recorded timestamps, sleeping until shortly before each frame is due and busy waiting the rest
+    for sub millisecond accuracy.
+    """
+    can_communicator: CanCommunicatorBase = Field(description="CAN Communicator to replay the traffic over")
+    speed_factor: float = Field(default=1.0, gt=0, description="Replay speed relative to the recording, e.g. 2.0 replays twice as fast")
+    id_remap: dict[int, int] = Field(default={}, description="Arbitration IDs to be replaced when replaying, recorded ID -> replayed ID")
+    allowed_ids: set[int] = Field(default=set(), description="Recorded CAN IDs to replay exclusively, empty means all IDs are replayed")
+    blocked_ids: set[int] = Field(default=set(), description="Recorded CAN IDs not to replay")
+    channels: set[str] = Field(default=set(), description="Recorded channels to replay exclusively, empty means all channels are replayed")
+    busy_wait_threshold: float = Field(default=0.002, ge=0, description="Time in seconds before a frame is due from which the replay busy waits instead of sleeping")
+
+    _stop_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+
+    def replay(self, log_file: str, max_frames: Optional[int] = None) -> CAN_REPLAY_RESULT:
+        """replay a CAN log file, the format is detected by the file extension (.log, .asc, .blf, etc...)
+
+        Args:
+            log_file (str): path to the log file
+            max_frames (Optional[int], optional): maximal amount of frames to transmit. None means the whole log.
+
+        Returns:
+            CAN_REPLAY_RESULT: amount of frames transmitted and the timing error distribution
+        """
+        with can.LogReader(log_file) as reader:
+            return self.replay_messages(reader, max_frames=max_frames)
+
+    def replay_messages(self, msgs: Iterable[CanMessage], max_frames: Optional[int] = None) -> CAN_REPLAY_RESULT:
+        """replay recorded CAN messages, keeping the time differences between their timestamps
+
+        Args:
+            msgs (Iterable[CanMessage]): the recorded CAN messages, in timestamp order
+            max_frames (Optional[int], optional): maximal amount of frames to transmit. None means all the messages.
+
+        Returns:
+            CAN_REPLAY_RESULT: amount of frames transmitted and the timing error distribution
+        """
+        self._stop_event.clear()
+        timing_error = LatencyHistogram()
+        frames_sent = 0
+        frames_skipped = 0
+        send_errors = 0
+        first_timestamp: Optional[float] = None
+        start_time = time.perf_counter()
+
+        for msg in msgs:
+            if self._stop_event.is_set() or (max_frames is not None and frames_sent + send_errors >= max_frames):
+                break
+            if not self._should_replay(msg):
+                frames_skipped += 1
+                continue
+
+            if first_timestamp is None:
+                first_timestamp = msg.timestamp
+                start_time = time.perf_counter()
+            due_time = start_time + (msg.timestamp - first_timestamp) / self.speed_factor
+            tx_msg = self._prepare_message(msg)
+
+            if not self._wait_until(due_time):
+                break
+            send_time = time.perf_counter()
+            try:
+                self.can_communicator.send(tx_msg)
+            except Exception as ex:
+                self.logger.warning(f"Failed replaying frame with ID {hex(msg.arbitration_id)}: {ex}")
+                send_errors += 1
+                continue
+            timing_error.record(send_time - due_time)
+            frames_sent += 1
+
+        return CAN_REPLAY_RESULT(frames_sent=frames_sent,
+                                 frames_skipped=frames_skipped,
+                                 send_errors=send_errors,
+                                 duration=time.perf_counter() - start_time,
+                                 timing_error=timing_error.to_model())
+
+    def stop(self) -> None:
+        """stop an ongoing replay, e.g. from another thread
+        """
+        self._stop_event.set()
+
+    def _should_replay(self, msg: CanMessage) -> bool:
+        if msg.is_error_frame:
+            return False
+        if msg.arbitration_id in self.blocked_ids:
+            return False
+        if self.allowed_ids and msg.arbitration_id not in self.allowed_ids:
+            return False
+        if self.channels and str(msg.channel) not in self.channels:
+            return False
+        return True
+
+    def _prepare_message(self, msg: CanMessage) -> CanMessage:
+        tx_msg = copy.copy(msg)
+        tx_msg.arbitration_id = self.id_remap.get(msg.arbitration_id, msg.arbitration_id)
+        # the recorded channel must not redirect the transmission to another interface
+        tx_msg.channel = None
+        tx_msg.is_rx = False
+        return tx_msg
+
+    def _wait_until(self, due_time: float) -> bool:
+        sleep_time = due_time - time.perf_counter() - self.busy_wait_threshold
+        if sleep_time > 0 and self._stop_event.wait(sleep_time):
+            return False
+        while time.perf_counter() < due_time:
+            pass
+        return True
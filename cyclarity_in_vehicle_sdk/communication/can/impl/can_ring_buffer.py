@@ -0,0 +1,77 @@
+import threading
+from collections import deque
+from enum import Enum
+from typing import Optional, Sequence
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+
+
+class OverflowPolicy(str, Enum):
+    DropOldest = "DropOldest"
+    DropNewest = "DropNewest"
+
+
+class CanRingBuffer():
+    """Bounded, thread safe FIFO of CAN messages.
+    Once full, messages are dropped according to the overflow policy and counted.
+    """
+    def __init__(self, size: int, overflow_policy: OverflowPolicy = OverflowPolicy.DropOldest):
+        if size <= 0:
+            raise ValueError("CanRingBuffer size must be positive")
+        self.size = size
+        self.overflow_policy = overflow_policy
+        self.dropped_count = 0
+        self.total_count = 0
+        self._msgs: deque[CanMessage] = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._msgs)
+
+    def put(self, msgs: Sequence[CanMessage]) -> None:
+        """push CAN messages to the buffer
+
+        Args:
+            msgs (Sequence[CanMessage]): CAN messages to push
+        """
+        if not msgs:
+            return
+        with self._cond:
+            self.total_count += len(msgs)
+            overflow = len(self._msgs) + len(msgs) - self.size
+            if overflow > 0:
+                self.dropped_count += overflow
+                if self.overflow_policy == OverflowPolicy.DropNewest:
+                    msgs = msgs[:len(msgs) - overflow]
+                else:
+                    for _ in range(min(overflow, len(self._msgs))):
+                        self._msgs.popleft()
+                    msgs = msgs[max(0, len(msgs) - self.size):]
+            self._msgs.extend(msgs)
+            self._cond.notify()
+
+    def get(self, max_msgs: int, timeout: Optional[float] = None) -> list[CanMessage]:
+        """pop the pending CAN messages from the buffer
+
+        Args:
+            max_msgs (int): maximal amount of CAN messages to pop
+            timeout (Optional[float], optional): timeout in seconds to wait for messages. None means indefinably.
+
+        Returns:
+            list[CanMessage]: CAN messages popped, empty list if timeout has reached or the buffer was closed.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._msgs or self._closed, timeout=timeout)
+            return [self._msgs.popleft() for _ in range(min(max_msgs, len(self._msgs)))]
+
+    def close(self) -> None:
+        """mark the buffer as closed, waking up any waiting consumer
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
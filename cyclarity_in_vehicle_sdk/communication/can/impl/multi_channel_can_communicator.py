@@ -0,0 +1,212 @@
+import heapq
+import itertools
+import selectors
+import time
+from collections import deque
+from types import TracebackType
+from typing import Iterator, Optional, Sequence, Union
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import DEFAULT_BATCH_SIZE, SNIFF_POLL_INTERVAL, CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.can.models.can_models import CAN_ROUTING_LATENCY
+
+
+class RoutedFrameCorrelator():
+    """Correlates frames with the same arbitration ID and payload seen on different channels,
+    measuring the routing delay between the channel a frame was first seen on and the channels it was routed to.
+    Frames must be fed in timestamp order (e.g. from `MultiChannelCanCommunicator.iter_sniff`).
+    """
+    def __init__(self, max_delay: float = 0.05):
+        """
+        Args:
+            max_delay (float, optional): maximal delay in seconds for frames to be considered as routed. Defaults to 0.05.
+        """
+        self.max_delay = max_delay
+        # (arbitration ID, payload) -> (origin channel, origin timestamp, channels already matched)
+        self._origins: dict[tuple[int, bytes], tuple[str, float, set[str]]] = {}
+        self._origins_order: deque[tuple[float, tuple[int, bytes]]] = deque()
+        # (arbitration ID, source, destination) -> [count, sum, min, max]
+        self._latencies: dict[tuple[int, str, str], list] = {}
+
+    def update(self, msgs: Sequence[CanMessage]) -> None:
+        """correlate CAN messages received from multiple channels
+
+        Args:
+            msgs (Sequence[CanMessage]): CAN messages, tagged with their channel, in timestamp order
+        """
+        for msg in msgs:
+            if msg.is_error_frame:
+                continue
+            self._expire(msg.timestamp)
+            key = (msg.arbitration_id, bytes(msg.data))
+            origin = self._origins.get(key)
+            if origin is None or origin[0] == msg.channel:
+                self._origins[key] = (msg.channel, msg.timestamp, set())
+                self._origins_order.append((msg.timestamp, key))
+                continue
+
+            origin_channel, origin_timestamp, matched_channels = origin
+            if msg.channel in matched_channels:
+                continue
+            matched_channels.add(msg.channel)
+            delay = msg.timestamp - origin_timestamp
+            latency = self._latencies.get((msg.arbitration_id, origin_channel, msg.channel))
+            if latency is None:
+                self._latencies[(msg.arbitration_id, origin_channel, msg.channel)] = [1, delay, delay, delay]
+            else:
+                latency[0] += 1
+                latency[1] += delay
+                latency[2] = min(latency[2], delay)
+                latency[3] = max(latency[3], delay)
+
+    def get_latencies(self) -> list[CAN_ROUTING_LATENCY]:
+        """get the routing latencies measured
+
+        Returns:
+            list[CAN_ROUTING_LATENCY]: routing latency per arbitration ID and channels pair
+        """
+        return [CAN_ROUTING_LATENCY(arbitration_id=canid,
+                                    source_channel=source,
+                                    destination_channel=destination,
+                                    count=count,
+                                    mean_delay=delay_sum / count,
+                                    min_delay=min_delay,
+                                    max_delay=max_delay)
+                for (canid, source, destination), (count, delay_sum, min_delay, max_delay) in sorted(self._latencies.items())]
+
+    def _expire(self, now: float) -> None:
+        while self._origins_order and now - self._origins_order[0][0] > self.max_delay:
+            timestamp, key = self._origins_order.popleft()
+            origin = self._origins.get(key)
+            if origin and origin[1] == timestamp:
+                del self._origins[key]
+
+
+class MultiChannelCanCommunicator(ParsableModel):
+    """This class handles the communication over multiple CAN channels using the SocketCAN interface.
+    All the channels are received using a single poller, and merged to a single stream ordered by the
+    kernel timestamps, each message is tagged with its channel (`CanMessage.channel`).
+    """
+    channels: list[str] = Field(min_length=1, description="Names of CAN interfaces to work with. (e.g. can0, vcan0, etc...)")
+    support_fd: bool = Field(description="CAN buses support CAN-FD.")
+    reorder_window: float = Field(default=0.01, ge=0, description="Time in seconds messages are held for ordering messages received on different channels")
+
+    _communicators: dict[str, CanCommunicatorSocketCan] = PrivateAttr(default_factory=dict)
+    _selector: selectors.BaseSelector = None
+
+    def open(self) -> None:
+        """Opens all the channels. this method must be called before usage.
+        """
+        if self._selector:
+            raise RuntimeError("MultiChannelCanCommunicator is already open")
+
+        self._selector = selectors.DefaultSelector()
+        try:
+            for channel in self.channels:
+                can_communicator = CanCommunicatorSocketCan(channel=channel, support_fd=self.support_fd)
+                can_communicator.open()
+                self._communicators[channel] = can_communicator
+                self._selector.register(can_communicator.get_bus().fileno(), selectors.EVENT_READ, can_communicator)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Closes all the channels.
+        """
+        for can_communicator in self._communicators.values():
+            can_communicator.close()
+        self._communicators.clear()
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exception_type: Optional[type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
+        self.close()
+        return False
+
+    def get_communicator(self, channel: str) -> CanCommunicatorSocketCan:
+        """get the communicator of a single channel, e.g. for sending or setting filters
+
+        Args:
+            channel (str): name of the channel
+
+        Returns:
+            CanCommunicatorSocketCan: the channel's communicator
+        """
+        if channel not in self._communicators:
+            raise RuntimeError(f"Channel {channel} is not open")
+        return self._communicators[channel]
+
+    def send(self, can_msg: CanMessage, channel: str, timeout: Optional[float] = None):
+        """Transmit a message to one of the CAN buses.
+
+        Args:
+            can_msg (CanMessage): CAN message in the python-can format `CanMessage`
+            channel (str): name of the channel to transmit on
+            timeout (Optional[float], optional): time out in seconds. Defaults to None.
+        """
+        self.get_communicator(channel).send(can_msg=can_msg, timeout=timeout)
+
+    def receive_batch(self, max_frames: int = DEFAULT_BATCH_SIZE, timeout: Optional[float] = None) -> list[CanMessage]:
+        """receive the CAN messages pending on all the channels, ordered by their timestamps
+
+        Args:
+            max_frames (int, optional): maximal amount of CAN messages to read per channel. Defaults to DEFAULT_BATCH_SIZE.
+            timeout (Optional[float], optional): timeout in seconds to wait for the first message. None means indefinably.
+
+        Returns:
+            list[CanMessage]: CAN messages received, empty list if timeout has reached.
+        """
+        if not self._selector:
+            raise RuntimeError("MultiChannelCanCommunicator has not been opened")
+
+        ret_msgs: list[CanMessage] = []
+        for can_communicator in self._poll(timeout):
+            ret_msgs.extend(can_communicator.receive_batch(max_frames=max_frames, timeout=0))
+        ret_msgs.sort(key=lambda msg: msg.timestamp)
+        return ret_msgs
+
+    def iter_sniff(self, sniff_time: Optional[float] = None, batches: bool = False) -> Iterator[Union[CanMessage, list[CanMessage]]]:
+        """sniff CAN messages from all the channels as a single stream ordered by the timestamps
+        Messages are held for `reorder_window` seconds, so messages of a channel read later
+        are still ordered correctly relative to the other channels.
+
+        Args:
+            sniff_time (Optional[float], optional): time in seconds to be sniffing the channels. None means indefinitely.
+            batches (bool, optional): yield lists of CAN messages instead of single messages. Defaults to False.
+
+        Yields:
+            Union[CanMessage, list[CanMessage]]: sniffed CAN message, or a batch of CAN messages
+        """
+        pending: list[tuple[float, int, CanMessage]] = []
+        sequence = itertools.count()
+        start_time = time.time()
+        sniffing = True
+        while sniffing or pending:
+            time_passed = time.time() - start_time
+            sniffing = sniff_time is None or time_passed < sniff_time
+            if sniffing:
+                time_left = SNIFF_POLL_INTERVAL if sniff_time is None else min(SNIFF_POLL_INTERVAL, sniff_time - time_passed)
+                poll_timeout = min(time_left, self.reorder_window) if pending else time_left
+                for msg in self.receive_batch(timeout=poll_timeout):
+                    heapq.heappush(pending, (msg.timestamp, next(sequence), msg))
+
+            release_time = time.time() - self.reorder_window if sniffing else float("inf")
+            ready_msgs = []
+            while pending and pending[0][0] <= release_time:
+                ready_msgs.append(heapq.heappop(pending)[2])
+            if batches and ready_msgs:
+                yield ready_msgs
+            elif not batches:
+                yield from ready_msgs
+
+    def _poll(self, timeout: Optional[float]) -> list[CanCommunicatorSocketCan]:
+        return [key.data for key, _ in self._selector.select(timeout)]
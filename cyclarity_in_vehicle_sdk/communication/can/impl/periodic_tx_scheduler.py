@@ -0,0 +1,207 @@
+import copy
+import math
+import threading
+import time
+from typing import Optional, Sequence, Union
+
+from can import ModifiableCyclicTaskABC
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanCommunicatorBase, CanMessage, CyclicSendTask
+from cyclarity_in_vehicle_sdk.communication.can.models.can_models import PERIODIC_TX_STATISTICS
+
+
+class _PeriodicTxEntry():
+    """A scheduled periodic transmission and its observed timing
+    """
+    def __init__(self, task: CyclicSendTask, msgs: list[CanMessage], period: float, duration: Optional[float] = None):
+        self.task = task
+        self.msgs = msgs
+        self.period = period
+        self.end_time = time.monotonic() + duration if duration is not None else None
+        self.sent_count = 0
+        self.last_sent: Optional[float] = None
+        self.period_mean = 0.0
+        self.period_m2 = 0.0
+        self.max_deviation = 0.0
+
+    def on_sent(self, timestamp: float) -> None:
+        if self.last_sent is not None:
+            observed = timestamp - self.last_sent
+            periods_count = self.sent_count
+            delta = observed - self.period_mean
+            self.period_mean += delta / periods_count
+            self.period_m2 += delta * (observed - self.period_mean)
+            self.max_deviation = max(self.max_deviation, abs(observed - self.period))
+        self.last_sent = timestamp
+        self.sent_count += 1
+
+    def is_finished(self, now: float) -> bool:
+        return self.end_time is not None and now >= self.end_time
+
+    def sends(self, msg: CanMessage) -> bool:
+        return any(bytes(sent_msg.data) == bytes(msg.data) for sent_msg in self.msgs)
+
+    def distance_from_next_send(self, timestamp: float) -> float:
+        return abs(timestamp - (self.last_sent + self.period)) if self.last_sent is not None else 0.0
+
+
+class PeriodicTxScheduler(ParsableModel):
+    """Manages periodic transmissions of CAN messages over a CAN communicator, by handles.
+    Over SocketCAN the transmissions are scheduled by the kernel broadcast manager (CAN_BCM),
+    and payload updates are applied in place without restarting the cycle.
+    The achieved periods are measured from the local transmissions seen by the communicator's
+    receive operations (e.g. while sniffing).
+    """
+    can_communicator: CanCommunicatorBase = Field(description="CAN Communicator to transmit over")
+
+    _entries: dict[int, _PeriodicTxEntry] = PrivateAttr(default_factory=dict)
+    _next_handle: int = 1
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _listening: bool = False
+
+    def add(self,
+            msgs: Union[CanMessage, Sequence[CanMessage]],
+            period: float,
+            duration: Optional[float] = None) -> int:
+        """Start sending periodically CAN message(s)
+
+        Args:
+            msgs (Union[CanMessage, Sequence[CanMessage]]): single message or sequence of messages with the same arbitration ID, sent one per period in turn
+            period (float): time period in seconds between sending of the message(s)
+            duration (Optional[float], optional): duration time in seconds to be sending the message(s) periodically. None means indefinitely.
+
+        Returns:
+            int: handle of the periodic transmission
+        """
+        msgs = [msgs] if isinstance(msgs, CanMessage) else list(msgs)
+        if not msgs:
+            raise ValueError("At least one CAN message is required for periodic transmission")
+        if not self._listening:
+            self.can_communicator.add_rx_listener(self._on_rx)
+            self._listening = True
+
+        task = self.can_communicator.send_periodically(msgs=msgs, period=period, duration=duration)
+        if task is None:
+            raise RuntimeError(f"{type(self.can_communicator).__name__} did not provide a periodic task handle")
+
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 1
+            self._entries[handle] = _PeriodicTxEntry(task=task, msgs=msgs, period=period, duration=duration)
+        return handle
+
+    def modify_payload(self, handle: int, data: Union[bytes, Sequence[bytes]]) -> None:
+        """Update the payload(s) of a periodic transmission, keeping its timing
+
+        Args:
+            handle (int): handle of the periodic transmission
+            data (Union[bytes, Sequence[bytes]]): new payload, or a payload per message for multiple messages transmission
+        """
+        entry = self._get_entry(handle)
+        payloads = [data] if isinstance(data, (bytes, bytearray)) else list(data)
+        if len(payloads) != len(entry.msgs):
+            raise ValueError(f"Expected {len(entry.msgs)} payloads for periodic transmission {handle}, got {len(payloads)}")
+        if not isinstance(entry.task, ModifiableCyclicTaskABC):
+            raise RuntimeError(f"Periodic transmission {handle} does not support modifying its payload")
+
+        msgs = []
+        for msg, payload in zip(entry.msgs, payloads):
+            modified_msg = copy.copy(msg)
+            modified_msg.data = bytearray(payload)
+            modified_msg.dlc = len(payload)
+            msgs.append(modified_msg)
+        entry.task.modify_data(msgs)
+        entry.msgs = msgs
+
+    def stop(self, handle: int) -> None:
+        """Stop a periodic transmission
+
+        Args:
+            handle (int): handle of the periodic transmission
+        """
+        entry = self._get_entry(handle)
+        entry.task.stop()
+        with self._lock:
+            self._entries.pop(handle, None)
+
+    def stop_all(self) -> None:
+        """Stop all the periodic transmissions
+        """
+        for handle in self.get_handles():
+            self.stop(handle)
+        if self._listening:
+            self.can_communicator.remove_rx_listener(self._on_rx)
+            self._listening = False
+
+    def get_handles(self) -> list[int]:
+        """get the handles of the active periodic transmissions
+
+        Returns:
+            list[int]: handles of the periodic transmissions
+        """
+        with self._lock:
+            self._drop_finished()
+            return list(self._entries.keys())
+
+    def get_statistics(self, handle: int) -> PERIODIC_TX_STATISTICS:
+        """get the achieved timing of a periodic transmission
+
+        Args:
+            handle (int): handle of the periodic transmission
+
+        Returns:
+            PERIODIC_TX_STATISTICS: the requested and the observed period
+        """
+        entry = self._get_entry(handle)
+        periods_count = entry.sent_count - 1
+        return PERIODIC_TX_STATISTICS(
+            handle=handle,
+            arbitration_id=entry.msgs[0].arbitration_id,
+            requested_period=entry.period,
+            sent_count=entry.sent_count,
+            achieved_period=entry.period_mean if periods_count > 0 else None,
+            period_jitter=math.sqrt(entry.period_m2 / periods_count) if periods_count > 0 else None,
+            max_deviation=entry.max_deviation if periods_count > 0 else None,
+        )
+
+    def _get_entry(self, handle: int) -> _PeriodicTxEntry:
+        with self._lock:
+            self._drop_finished()
+            entry = self._entries.get(handle)
+        if not entry:
+            raise ValueError(f"Unknown periodic transmission handle: {handle}")
+        return entry
+
+    def _drop_finished(self) -> None:
+        # transmissions with a duration end on their own
+        now = time.monotonic()
+        for handle in [handle for handle, entry in self._entries.items() if entry.is_finished(now)]:
+            del self._entries[handle]
+
+    def _on_rx(self, msgs: Sequence[CanMessage]) -> None:
+        with self._lock:
+            self._drop_finished()
+            entries_by_id: dict[int, list[_PeriodicTxEntry]] = {}
+            for entry in self._entries.values():
+                entries_by_id.setdefault(entry.msgs[0].arbitration_id, []).append(entry)
+        if not entries_by_id:
+            return
+        for msg in msgs:
+            if msg.is_rx:
+                continue
+            entry = self._match_entry(entries_by_id.get(msg.arbitration_id), msg)
+            if entry:
+                entry.on_sent(msg.timestamp)
+
+    @staticmethod
+    def _match_entry(entries: Optional[list[_PeriodicTxEntry]], msg: CanMessage) -> Optional[_PeriodicTxEntry]:
+        """find the transmission a local transmission belongs to, among the transmissions on its arbitration ID:
+        by payload, then by the time its next message is due
+        """
+        if not entries:
+            return None
+        if len(entries) > 1:
+            entries = [entry for entry in entries if entry.sends(msg)] or entries
+        return min(entries, key=lambda entry: entry.distance_from_next_send(msg.timestamp))
@@ -0,0 +1,113 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from cyclarity_in_vehicle_sdk.utils.latency.models import LATENCY_DISTRIBUTION
+
+
+class CAN_ID_STATISTICS(BaseModel):
+    """Model containing statistics of a single arbitration ID on the bus
+    """
+    arbitration_id: int = Field(description="The arbitration ID")
+    count: int = Field(description="Amount of frames seen")
+    first_seen: float = Field(description="Timestamp of the first frame seen")
+    last_seen: float = Field(description="Timestamp of the last frame seen")
+    rate: float = Field(description="Frames per second")
+    mean_period: Optional[float] = Field(default=None, description="Mean time in seconds between consecutive frames")
+    period_jitter: Optional[float] = Field(default=None, description="Standard deviation in seconds of the time between consecutive frames")
+    dlc_distribution: dict[int, int] = Field(description="Amount of frames seen per data length")
+    bit_flip_counts: list[int] = Field(description="Amount of value changes between consecutive frames per payload bit, MSB first")
+    payload_entropy: float = Field(description="Sum of the Shannon entropy of the payload bits, in bits")
+
+    def __str__(self):
+        period_str = f", period: {self.mean_period * 1000:.3f}ms, jitter: {self.period_jitter * 1000:.3f}ms" if self.mean_period is not None else ""
+        return (f"ID: {hex(self.arbitration_id)}, count: {self.count}, rate: {self.rate:.2f}Hz{period_str}, "
+                f"DLCs: {self.dlc_distribution}, payload entropy: {self.payload_entropy:.2f} bits")
+
+
+class CAN_BUS_STATISTICS(BaseModel):
+    """Model containing statistics of the CAN bus traffic
+    """
+    total_frames: int = Field(description="Amount of frames seen")
+    first_seen: Optional[float] = Field(default=None, description="Timestamp of the first frame seen")
+    last_seen: Optional[float] = Field(default=None, description="Timestamp of the last frame seen")
+    frames_per_second: float = Field(description="Frames per second on the bus")
+    bus_load: Optional[float] = Field(default=None, description="Estimated bus load ratio (0-1), available only if the bitrate is known")
+    ids: dict[int, CAN_ID_STATISTICS] = Field(description="Statistics per arbitration ID")
+
+    def __str__(self):
+        bus_load_str = f", bus load: {self.bus_load * 100:.1f}%" if self.bus_load is not None else ""
+        return (f"CAN bus statistics: frames: {self.total_frames}, {self.frames_per_second:.2f} frames/s{bus_load_str}\n"
+                + "\n".join(str(self.ids[canid]) for canid in sorted(self.ids)))
+
+
+class PERIODIC_TX_STATISTICS(BaseModel):
+    """Model containing the achieved timing of a periodically transmitted CAN message
+    """
+    handle: int = Field(description="Handle of the periodic transmission")
+    arbitration_id: int = Field(description="The arbitration ID transmitted")
+    requested_period: float = Field(description="The requested period in seconds")
+    sent_count: int = Field(description="Amount of transmissions observed")
+    achieved_period: Optional[float] = Field(default=None, description="Mean observed period in seconds")
+    period_jitter: Optional[float] = Field(default=None, description="Standard deviation in seconds of the observed period")
+    max_deviation: Optional[float] = Field(default=None, description="Maximal absolute difference in seconds between an observed and the requested period")
+
+    def __str__(self):
+        achieved_str = (f", achieved: {self.achieved_period * 1000:.3f}ms, jitter: {self.period_jitter * 1000:.3f}ms,"
+                        f" max deviation: {self.max_deviation * 1000:.3f}ms") if self.achieved_period is not None else ""
+        return (f"Periodic TX #{self.handle}: ID: {hex(self.arbitration_id)}, requested: {self.requested_period * 1000:.3f}ms, "
+                f"sent: {self.sent_count}{achieved_str}")
+
+
+class CAN_ROUTING_LATENCY(BaseModel):
+    """Model containing the latency of frames routed between two CAN channels, e.g. by a gateway
+    """
+    arbitration_id: int = Field(description="The arbitration ID of the routed frames")
+    source_channel: str = Field(description="The channel the frames were first seen on")
+    destination_channel: str = Field(description="The channel the frames were routed to")
+    count: int = Field(description="Amount of routed frames seen")
+    mean_delay: float = Field(description="Mean routing delay in seconds")
+    min_delay: float = Field(description="Minimal routing delay in seconds")
+    max_delay: float = Field(description="Maximal routing delay in seconds")
+
+    def __str__(self):
+        return (f"ID: {hex(self.arbitration_id)}, {self.source_channel} -> {self.destination_channel}, count: {self.count}, "
+                f"delay: mean {self.mean_delay * 1000:.3f}ms, min {self.min_delay * 1000:.3f}ms, max {self.max_delay * 1000:.3f}ms")
+
+
+class CAN_REPLAY_RESULT(BaseModel):
+    """Model containing the outcome of replaying a CAN log
+    """
+    frames_sent: int = Field(description="Amount of frames transmitted")
+    frames_skipped: int = Field(description="Amount of frames filtered out of the replay")
+    send_errors: int = Field(description="Amount of frames that failed to be transmitted")
+    duration: float = Field(description="Time in seconds the replay took")
+    timing_error: LATENCY_DISTRIBUTION = Field(description="Distribution of the delay between the scheduled and the actual transmission times")
+
+    def __str__(self):
+        return (f"CAN replay: sent: {self.frames_sent}, skipped: {self.frames_skipped}, errors: {self.send_errors}, "
+                f"duration: {self.duration:.3f}s, timing error: {self.timing_error}")
+
+
+class CAN_RESPONSE_LATENCY(BaseModel):
+    """Model containing the latency between request frames and the response frames following them
+    """
+    request_id: int = Field(description="The arbitration ID of the request frames")
+    response_id: int = Field(description="The arbitration ID of the response frames")
+    latency: LATENCY_DISTRIBUTION = Field(description="Distribution of the time between a request transmission and the first response following it")
+
+    def __str__(self):
+        return f"{hex(self.request_id)} -> {hex(self.response_id)}: {self.latency}"
+
+
+class CAN_LATENCY_STATISTICS(BaseModel):
+    """Model containing the latencies measured by a timestamping CAN communicator
+    """
+    hardware_timestamps: bool = Field(description="Whether hardware timestamps were available for the measurements")
+    tx_latency: dict[int, LATENCY_DISTRIBUTION] = Field(description="Per arbitration ID distribution of the time between a send request and the transmission of the frame")
+    response_latency: list[CAN_RESPONSE_LATENCY] = Field(description="Latency per request and response arbitration IDs pair")
+
+    def __str__(self):
+        return ("CAN latency statistics" + (" (hardware timestamps)" if self.hardware_timestamps else "") + ":\n"
+                + "\n".join(f"TX {hex(canid)}: {self.tx_latency[canid]}" for canid in sorted(self.tx_latency))
+                + ("\n" if self.tx_latency and self.response_latency else "")
+                + "\n".join(str(response_latency) for response_latency in self.response_latency))
@@ -27,14 +27,14 @@ class DoipCommunicator(CommunicatorBase):
             if not self._initiate_routing_activation_if_needed(timeout=timeout):
                 return 0
          
-        sent_bytes = DoipUtils.send_uds_request(
-            logger=self.logger,
-            communicator=self.tcp_communicator,
-            payload=data,
-            client_logical_address=self.client_logical_address,
-            target_logical_address=self.target_logical_address,
-            timeout=timeout,
-            )
+        sent_bytes = self._send_uds_request(data=data, timeout=timeout)
+        if not reconnected and self._reconnect_tcp_if_needed():
+            # the connection was found lost by this very send or its acknowledgement, e.g. closed by the peer
+            # while idle, in which case the request was accepted by the local stack yet never delivered.
+            # retry once over a new connection
+            if not self._initiate_routing_activation_if_needed(timeout=timeout):
+                return 0
+            sent_bytes = self._send_uds_request(data=data, timeout=timeout)
 
         return sent_bytes
 
@@ -95,7 +95,18 @@ class DoipCommunicator(CommunicatorBase):
             
         return True
 
+    def _send_uds_request(self, data: bytes, timeout: Optional[float]) -> int:
+        return DoipUtils.send_uds_request(
+            logger=self.logger,
+            communicator=self.tcp_communicator,
+            payload=data,
+            client_logical_address=self.client_logical_address,
+            target_logical_address=self.target_logical_address,
+            timeout=timeout,
+            )
+
     def _reconnect_tcp_if_needed(self) -> bool:
+        # the TCP communicator tracks the connection state from its operations, no probing is needed
         if not self.tcp_communicator.is_open():
             self.tcp_communicator.close()
             self.tcp_communicator.open()
@@ -0,0 +1,191 @@
+import queue
+import threading
+from concurrent.futures import Future
+from functools import partial
+from types import TracebackType
+from typing import Optional
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.base.communicator_base import CommunicatorBase, CommunicatorType
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_pipeline import DoipPipeline
+
+
+class DoipSession(ParsableModel):
+    """A single routing activated DoIP connection shared by many target ECUs.
+    The session owns the TCP connection, and vends a communicator per target logical address with `create_target`,
+    the responses are demultiplexed to the targets by their source logical address. Thus UDS utilities of all
+    the ECUs behind a gateway share one connection and one routing activation.
+    """
+    tcp_communicator: TcpCommunicator = Field(description="TCP communicator of the DoIP connection")
+    client_logical_address: int = Field(description="Client's logical address")
+    routing_activation_needed: bool = Field(default=True, description="Whether routing activation is performed when opening")
+    window: int = Field(default=8, gt=0, description="Maximal amount of requests in flight over the connection, a single request is in flight per target")
+
+    _pipeline: DoipPipeline = None
+
+    def model_post_init(self, *args, **kwargs):
+        super().model_post_init(*args, **kwargs)
+        self._pipeline = DoipPipeline(tcp_communicator=self.tcp_communicator,
+                                      client_logical_address=self.client_logical_address,
+                                      routing_activation_needed=self.routing_activation_needed,
+                                      window=self.window)
+
+    def open(self) -> bool:
+        """Opens the DoIP connection and performs the routing activation
+
+        Returns:
+            bool: True if succeeded, False otherwise
+        """
+        return self._pipeline.open()
+
+    def close(self) -> bool:
+        """Closes the DoIP connection, the requests of all the targets that did not complete fail
+
+        Returns:
+            bool: True if succeeded, False otherwise
+        """
+        return self._pipeline.close()
+
+    def __enter__(self):
+        if not self.open():
+            raise RuntimeError("Failed opening DoipSession")
+        return self
+
+    def __exit__(self, exception_type: Optional[type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
+        self.close()
+        return False
+
+    def create_target(self, target_logical_address: int, response_timeout: float = 5) -> "DoipSessionTarget":
+        """create a communicator of a target ECU over the session
+
+        Args:
+            target_logical_address (int): target's logical address
+            response_timeout (float, optional): time in seconds to wait for the response of each request. Defaults to 5.
+
+        Returns:
+            DoipSessionTarget: the communicator
+        """
+        return DoipSessionTarget(session=self, target_logical_address=target_logical_address, response_timeout=response_timeout)
+
+
+class DoipSessionTarget(CommunicatorBase):
+    """A communicator of a single target ECU over a shared `DoipSession`.
+    The communicator does not own the connection, opening and closing it neither connects nor activates routing.
+    A single request is pending at a time, sending a request abandons the previous one, whose late responses are dropped.
+    """
+    session: DoipSession = Field(description="The session the target is communicating over")
+    target_logical_address: int = Field(description="Target's logical address")
+    response_timeout: float = Field(default=5, gt=0, description="Time in seconds to wait for the response of each request")
+
+    _is_open = False
+    _responses: queue.Queue = PrivateAttr(default_factory=queue.Queue)
+    _lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+    # identifies the pending request, the responses of other requests are dropped
+    _pending_token: Optional[object] = None
+    _pending_future: Optional[Future] = None
+
+    def send(self, data: bytes, timeout: Optional[float] = 1) -> int:
+        """Send data to the target.
+
+        Args:
+            data (bytes): Data to be sent.
+            timeout (Optional[float], optional): Timeout for the send operation in seconds. Defaults to 1.
+
+        Returns:
+            int: Number of bytes sent.
+        """
+        if not self._is_open:
+            raise RuntimeError("DoipSessionTarget has not been opened")
+
+        token = object()
+        with self._lock:
+            self._abandon_pending()
+            self._pending_token = token
+        future = self.session._pipeline.submit(payload=data,
+                                               target_logical_address=self.target_logical_address,
+                                               timeout=self.response_timeout,
+                                               callback=partial(self._on_response, token),
+                                               response_pending_callback=partial(self._on_response_pending, token))
+        with self._lock:
+            if self._pending_token is token:
+                self._pending_future = future
+        if future.done() and isinstance(future.exception(), ConnectionError):
+            # the diagnostic message could not be sent
+            return 0
+        return len(data)
+
+    def recv(self, recv_timeout: float) -> bytes:
+        """Receive data from the target.
+
+        Args:
+            recv_timeout (float): Time to wait for a response.
+
+        Returns:
+            bytes: Received data.
+        """
+        if not self._is_open:
+            raise RuntimeError("DoipSessionTarget has not been opened")
+
+        try:
+            return self._responses.get(timeout=recv_timeout)
+        except queue.Empty:
+            return bytes()
+
+    def open(self) -> bool:
+        """Open the communicator, the session must be opened separately.
+
+        Returns:
+            bool: True on successful initialization, False otherwise.
+        """
+        self._is_open = True
+        return True
+
+    def close(self) -> bool:
+        """Closes the communicator, the session remains open.
+        """
+        self._is_open = False
+        with self._lock:
+            self._abandon_pending()
+        return True
+
+    def get_type(self) -> CommunicatorType:
+        """Get the type of the communicator.
+
+        Returns:
+            CommunicatorType: CommunicatorType.DOIP
+        """
+        return CommunicatorType.DOIP
+
+    def __str__(self):
+        return f"DoIP session target, IP={str(self.session.tcp_communicator.destination_ip)}, logical address={hex(self.target_logical_address)}"
+
+    def _abandon_pending(self) -> None:
+        future = self._pending_future
+        self._pending_token = None
+        self._pending_future = None
+        if future is not None:
+            # a request that was not sent yet is dropped altogether
+            future.cancel()
+        while not self._responses.empty():
+            self._responses.get_nowait()
+
+    def _on_response_pending(self, token: object, response: bytes) -> None:
+        with self._lock:
+            if token is self._pending_token:
+                self._responses.put(response)
+
+    def _on_response(self, token: object, future: Future) -> None:
+        with self._lock:
+            if token is not self._pending_token:
+                return
+            self._pending_token = None
+            self._pending_future = None
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.logger.debug(f"{self}: {future.exception()}")
+                return
+            self._responses.put(future.result())
@@ -196,6 +196,7 @@ class Layer3RawSocket(RawSocketCommunicatorBase):
         if self.ip_version == IpVersion.IPv4:
             self._out_socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_RAW)
             self._out_socket.setsockopt(socket.SOL_IP, socket.IP_HDRINCL, 1)
+            self._out_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         elif self.ip_version == IpVersion.IPv6:
             self._out_socket = socket.socket(socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_RAW)
         else:
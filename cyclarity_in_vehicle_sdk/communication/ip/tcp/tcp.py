@@ -7,11 +7,17 @@ from cyclarity_in_vehicle_sdk.communication.ip.base.ip_communicator_base import
 from cyclarity_in_vehicle_sdk.communication.base.communicator_base import CommunicatorType
 
 SOCK_DATA_RECV_AMOUNT = 4096
+# poll events telling the connection is lost when no data is left to read
+CONNECTION_LOST_EVENTS = select.POLLHUP | select.POLLRDHUP
+CONNECTION_ERROR_EVENTS = select.POLLERR | select.POLLNVAL
 
 class TcpCommunicator(IpConnectionCommunicatorBase):
     """TCP Communicator. The class provides methods to open, close, send, receive data over a TCP connection.
+    The connection state is tracked from the poll events and the results of the send and receive operations.
     """
     _socket: socket.socket = None
+    _poller: select.poll = None
+    _connected: bool = False
 
     def open(self) -> bool:
         """Open the TCP socket for communication.
@@ -33,25 +39,19 @@ class TcpCommunicator(IpConnectionCommunicatorBase):
         self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 1)
         self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 1)
         self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 1)
+        self._poller = select.poll()
+        self._poller.register(self._socket, select.POLLIN | select.POLLRDHUP)
+        self._connected = False
         return True
 
     def is_open(self) -> bool:
-        """inform the state of the TCP socket
+        """inform the state of the TCP connection, as last observed by the send and receive operations.
+        No system call is made, a connection lost while idle is noticed by the next operation
 
         Returns:
-            bool: True if the socket is open and ready for send/receive operations, False otherwise.
+            bool: True if the socket is connected and no failure was observed since, False otherwise.
         """
-        try:
-            data = self._socket.recv(16, socket.MSG_DONTWAIT | socket.MSG_PEEK)
-            return bool(data)
-        except BlockingIOError:
-            return True  # socket is open and reading from it would block
-        except ConnectionResetError:
-            return False  # socket was closed for some other reason
-        except TimeoutError:
-            return True  # socket is open and reading from it would block
-        except Exception as ex:
-            return False
+        return self._connected
 
     def close(self) -> bool:
         """Close the TCP socket.
@@ -59,8 +59,12 @@ class TcpCommunicator(IpConnectionCommunicatorBase):
         Returns:
             bool: True if successful, False otherwise.
         """
-        if self.is_open():
-            self._socket.shutdown(socket.SHUT_RDWR)
+        if self._connected:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # the peer has already closed the connection
+        self._connected = False
         self._socket.close()
         return True
 
@@ -76,6 +80,9 @@ class TcpCommunicator(IpConnectionCommunicatorBase):
         """
         try:
             return self._socket.send(data)
+        except ConnectionError as ex:
+            self._connected = False
+            self.logger.error(str(ex))
         except Exception as ex:
             self.logger.error(str(ex))
 
@@ -93,13 +100,19 @@ class TcpCommunicator(IpConnectionCommunicatorBase):
         """
         recv_data = bytes()
         if recv_timeout > 0:
-            ready = select.select([self._socket], [], [], recv_timeout)
-            if not ready[0]:
+            events = self._poller.poll(recv_timeout * 1000)
+            if not events:
+                return recv_data
+            revents = events[0][1]
+            if revents & CONNECTION_ERROR_EVENTS or (revents & CONNECTION_LOST_EVENTS and not revents & select.POLLIN):
+                self._connected = False
                 return recv_data
         try:
             recv_data = self._socket.recv(size)
+            if not recv_data:
+                self._connected = False  # the peer closed the connection
         except ConnectionResetError:
-            pass
+            self._connected = False
         except TimeoutError:
             pass
         return recv_data
@@ -134,6 +147,7 @@ class TcpCommunicator(IpConnectionCommunicatorBase):
             bool: rue on successful completion.
         """
         self._socket.connect((self.destination_ip.exploded, self.dport))
+        self._connected = True
         return True
 
     def get_type(self) -> CommunicatorType:
@@ -1,11 +1,55 @@
-from typing import Optional
+import socket
+from typing import Optional, Union
 from cyclarity_in_vehicle_sdk.communication.base.communicator_base import CommunicatorType
 from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
 from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import Address, AddressingMode, IsoTpCommunicatorBase
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_profiles import load_profile
 import isotp
-from pydantic import Field
+from isotp.tools import FiniteByteGenerator
+from pydantic import Field, PrivateAttr
 
 CAN_ID_MAX_NORMAL_11_BITS = 0x7FF
+CAN_FD_MAX_DATA_LENGTH = 64
+# link layer flag of CAN-FD frames (linux/can.h)
+CANFD_BRS = 0x01
+# largest payload whose length fits the 12 bits first frame length, larger payloads use the 32 bits escape sequence
+ISOTP_MAX_12_BITS_LENGTH = 0xFFF
+ISOTP_MAX_32_BITS_LENGTH = 0xFFFFFFFF
+
+
+class _MemoryviewByteGenerator(FiniteByteGenerator):
+    """Byte source of a send request slicing the caller's buffer per frame,
+    instead of the byte by byte generator python-can-isotp wraps buffers with
+    """
+    def __init__(self, data: memoryview):
+        # the generator of the base class is never consumed, the chunks are sliced from the buffer
+        super().__init__(gen=(byte for byte in ()), size=len(data))
+        self._view = data
+
+    def consume(self, size: int, enforce_exact: bool = True) -> memoryview:
+        chunk = self._view[self._consumed:self._consumed + size]
+        self._consumed += len(chunk)
+        if len(chunk) < size:
+            self._depleted = True
+            if enforce_exact:
+                raise isotp.BadGeneratorError(f"Did not read the requested amount of data. Tried to read {size}, got {len(chunk)}")
+        return chunk
+
+
+class _SendRequest(isotp.TransportLayerLogic.SendRequest):
+    def __init__(self, data: Union[bytes, bytearray, memoryview, isotp.TransportLayerLogic.SendGenerator], target_address_type: isotp.TargetAddressType):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            super().__init__(data=data, target_address_type=target_address_type)
+            return
+        super().__init__(data=b"", target_address_type=target_address_type)
+        self.generator = _MemoryviewByteGenerator(memoryview(data).cast("B"))
+
+
+class _ZeroCopyCanStack(isotp.CanStack):
+    """python-can-isotp CAN stack sending buffers without copying them byte by byte
+    """
+    SendRequest = _SendRequest
+
 
 class IsoTpCommunicator(IsoTpCommunicatorBase):
     """This class handles communication over IsoTP protocol.
@@ -16,11 +60,17 @@ class IsoTpCommunicator(IsoTpCommunicatorBase):
     padding_byte: Optional[int] = Field(default=None, ge=0, le=0xFF, description="Optional byte to pad TX messages with, defaults to None meaning no padding, should be in range 0x00-0xFF")
     bitrate_switch: Optional[bool] = Field(default=False, description="BRS, defaults to False")
     can_fd: Optional[bool] = Field(default=False, description="whether it is can FD, defaults to False")
+    use_kernel_isotp: bool = Field(default=False, description="Use the Linux kernel CAN_ISOTP socket (can-isotp module) instead of the python ISO-TP stack, defaults to False")
+    profiles_file: Optional[str] = Field(default=None, description="File of tuned per ECU ISO-TP parameters (see IsoTpFlowControlTuner, e.g. DEFAULT_ISOTP_PROFILES_FILE), applied when opening, defaults to None meaning no profiles")
+    max_frame_size: int = Field(default=ISOTP_MAX_12_BITS_LENGTH, gt=0, le=ISOTP_MAX_32_BITS_LENGTH, description="Maximal size of a received payload, payloads larger than 4095 bytes are sent with the 32 bits first frame length of ISO 15765-2:2016, defaults to 4095")
 
     _is_open = False
     _address = None
     _params: dict = {"blocking_send":True}
+    _param_overrides: dict = PrivateAttr(default_factory=dict)
+    _active_params: dict = None
     _can_stack: isotp.CanStack = None
+    _isotp_socket: isotp.socket = None
 
     def teardown(self):
         """Close the communicator.
@@ -37,6 +87,9 @@ class IsoTpCommunicator(IsoTpCommunicatorBase):
             self._params.update({"bitrate_switch":self.bitrate_switch})
         if self.can_fd:
             self._params.update({"can_fd":self.can_fd})
+            # the python stack defaults to 8 bytes frames even over CAN-FD
+            self._params.update({"tx_data_length":CAN_FD_MAX_DATA_LENGTH})
+        self._params.update({"max_frame_size":self.max_frame_size})
 
     def set_address(self, address: Address):
         """Set the address of the communicator.
@@ -46,13 +99,40 @@ class IsoTpCommunicator(IsoTpCommunicatorBase):
         """
         self._address = address
         if self._is_open:
-            self._can_stack.set_address(address=address)
+            if self.use_kernel_isotp:
+                # the kernel socket is bound to its address, thus it is replaced
+                self._isotp_socket.close()
+                self._isotp_socket = self._open_kernel_socket(self._active_params)
+            else:
+                self._can_stack.set_address(address=address)
+
+    def update_params(self, params: dict):
+        """Override ISO-TP parameters (e.g. stmin, blocksize, tx_data_length), taking precedence over the ECU's profile.
+        If the communicator is open, it is reopened with the new parameters.
+
+        Args:
+            params (dict): ISO-TP parameters, as named by python-can-isotp
+        """
+        self._param_overrides.update(params)
+        if self._is_open:
+            self.close()
+            self.open()
+
+    def get_params(self) -> dict:
+        """Get the ISO-TP parameters in use, including the ECU's profile and the overrides.
+
+        Returns:
+            dict: ISO-TP parameters, as named by python-can-isotp
+        """
+        return dict(self._active_params) if self._active_params is not None else self._build_params()
     
-    def send(self, data: bytes, timeout: Optional[float] = 1) -> int:
-        """sends bytes over the communication layer
+    def send(self, data: Union[bytes, bytearray, memoryview], timeout: Optional[float] = 1) -> int:
+        """sends bytes over the communication layer, up to 4GB.
+        The buffer is not copied, sliced into the frames as they are transmitted,
+        thus it must not be modified until the send operation completes.
 
         Args:
-            data (bytes): data to send in bytes format
+            data (Union[bytes, bytearray, memoryview]): data to send in bytes format
             timeout (Optional[float]): timeout in seconds for send operation. defaults to None
 
         Returns:
@@ -61,13 +141,24 @@ class IsoTpCommunicator(IsoTpCommunicatorBase):
         if not self._is_open:
             raise RuntimeError("IsoTpCommunicator has not been opened successfully")
         
+        if self.use_kernel_isotp:
+            try:
+                self._isotp_socket.settimeout(timeout)
+                return self._isotp_socket.send(data)
+            except socket.timeout as ex:
+                self.logger.warning(f"Timeout for send operation: {str(ex)}")
+                return 0
+            except OSError as ex:
+                self.logger.warning(f"Failed sending over ISO-TP socket: {str(ex)}")
+                return 0
+
         try:
             self._can_stack.send(data=data, send_timeout=timeout)
         except isotp.BlockingSendTimeout as ex:
             self.logger.warning(f"Timeout for send operation: {str(ex)}")
             return 0
         
-        return len(data)
+        return memoryview(data).nbytes
 
     def recv(self, recv_timeout: float) -> bytes:
         """Receives data from the socket.
@@ -82,6 +173,16 @@ class IsoTpCommunicator(IsoTpCommunicatorBase):
         if not self._is_open:
             raise RuntimeError("IsoTpCommunicator has not been opened successfully")
         
+        if self.use_kernel_isotp:
+            try:
+                self._isotp_socket.settimeout(recv_timeout)
+                return self._isotp_socket.recv(self.max_frame_size)
+            except socket.timeout:
+                return bytes()
+            except OSError as ex:
+                self.logger.warning(f"Failed receiving over ISO-TP socket: {str(ex)}")
+                return bytes()
+
         received_data = self._can_stack.recv(block=True, timeout=recv_timeout)
         return bytes(received_data) if received_data else bytes()
 
@@ -94,8 +195,14 @@ class IsoTpCommunicator(IsoTpCommunicatorBase):
             self.logger.error("IsoTpCommunicator has not been set with address")
             return False
         
+        self._active_params = self._build_params()
+        if self.use_kernel_isotp:
+            self._isotp_socket = self._open_kernel_socket(self._active_params)
+            self._is_open = True
+            return True
+
         self.can_communicator.open()
-        self._can_stack = isotp.CanStack(bus=self.can_communicator.get_bus(), address=self._address, params=self._params)
+        self._can_stack = _ZeroCopyCanStack(bus=self.can_communicator.get_bus(), address=self._address, params=self._active_params)
         self._can_stack.start()
         self._is_open = True
         return True
@@ -107,13 +214,58 @@ class IsoTpCommunicator(IsoTpCommunicatorBase):
             bool: A boolean indicating if the socket was successfully closed.
         """
         if self._is_open:
-            self._can_stack.stop()
-            self._can_stack.reset()
-            self.can_communicator.close()
+            if self.use_kernel_isotp:
+                self._isotp_socket.close()
+                self._isotp_socket = None
+            else:
+                self._can_stack.stop()
+                self._can_stack.reset()
+                self.can_communicator.close()
             self._is_open = False
 
         return True
 
+    def _build_params(self) -> dict:
+        params = dict(self._params)
+        if self.profiles_file:
+            try:
+                profile = load_profile(self.profiles_file,
+                                       channel=self.can_communicator.channel,
+                                       txid=self._address.get_tx_arbitration_id(),
+                                       rxid=self._address.get_rx_arbitration_id())
+            except Exception as ex:
+                self.logger.warning(f"Failed loading ISO-TP profiles from {self.profiles_file}: {ex}")
+                profile = None
+            if profile:
+                self.logger.debug(f"Applying {profile}")
+                params.update({"stmin": profile.stmin, "blocksize": profile.blocksize})
+                if "can_fd" in self.model_fields_set and bool(self.can_fd) != profile.can_fd:
+                    # the communicator's explicit configuration takes precedence
+                    self.logger.debug(f"Ignoring the frames configuration of the profile, can_fd is explicitly {self.can_fd}")
+                elif not profile.can_fd or self.can_communicator.support_fd:
+                    params.update({"can_fd": profile.can_fd, "tx_data_length": profile.tx_data_length})
+        params.update(self._param_overrides)
+        return params
+
+    def _open_kernel_socket(self, params: dict) -> isotp.socket:
+        """create a kernel ISO-TP socket bound to the current address, with the options mapped from the ISO-TP parameters
+        """
+        isotp_socket = isotp.socket()
+        try:
+            optflag = isotp.socket.flags.WAIT_TX_DONE if params.get("blocking_send") else 0
+            isotp_socket.set_opts(optflag=optflag, txpad=self.padding_byte, rxpad=self.padding_byte)
+            if "blocksize" in params or "stmin" in params:
+                isotp_socket.set_fc_opts(bs=params.get("blocksize"), stmin=params.get("stmin"))
+            if params.get("can_fd"):
+                isotp_socket.set_ll_opts(mtu=isotp.socket.LinkLayerProtocol.CAN_FD,
+                                         tx_dl=params.get("tx_data_length", CAN_FD_MAX_DATA_LENGTH),
+                                         tx_flags=CANFD_BRS if params.get("bitrate_switch") else 0)
+            isotp_socket.bind(self.can_communicator.channel, address=self._address)
+        except Exception:
+            isotp_socket.close()
+            raise
+        return isotp_socket
+
     def get_type(self) -> CommunicatorType:
         return CommunicatorType.ISOTP
     
@@ -0,0 +1,142 @@
+import time
+from typing import Optional
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field
+
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import CAN_FD_MAX_DATA_LENGTH, IsoTpCommunicator
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_profiles import save_profile
+from cyclarity_in_vehicle_sdk.communication.isotp.models.isotp_tuning_models import ISOTP_FLOW_CONTROL_PROFILE
+from cyclarity_in_vehicle_sdk.utils.custom_types.hexbytes import HexBytes
+
+CAN_CLASSIC_DATA_LENGTH = 8
+# candidate values within the ISO 15765-2 constraints, ordered from the fastest
+STMIN_CANDIDATES = [0x00, 0xF1, 0xF3, 0xF5, 0xF9, 0x01, 0x02, 0x05, 0x0A]
+BLOCKSIZE_CANDIDATES = [0, 64, 32, 16, 8, 4, 1]
+CAN_FD_DATA_LENGTH_CANDIDATES = [CAN_FD_MAX_DATA_LENGTH, 32, 16]
+
+
+class IsoTpFlowControlTuner(ParsableModel):
+    """Tunes the ISO-TP transfer parameters of an ECU by measuring the effective throughput and error rate of transfers
+    for each candidate configuration, each parameter measured in the direction it paces:
+    the TX frames length on sending a long request to the ECU (e.g. a download's TransferData), and the flow control
+    block size and STmin, which pace the ECU's sends to us, on receiving a long response from the ECU.
+    The search optimizes one parameter at a time, keeping the best values of the others (coordinate descent),
+    CAN-FD 64 bytes frames are tried first when the CAN channel supports CAN-FD.
+    The best configuration is persisted as the ECU's profile in the communicator's profiles file, applied by IsoTpCommunicator instances later opened with that file.
+    """
+    isotp_communicator: IsoTpCommunicator = Field(description="ISO-TP communicator of the ECU to tune")
+    request: HexBytes = Field(description="Request to measure the reception with (flow control block size and STmin), its response should be long (e.g. reading a long DID or uploading a memory block)")
+    download_request: Optional[HexBytes] = Field(default=None, description="Long request to measure the transmission with (TX frames length), e.g. a TransferData request of a download, defaults to None meaning the TX frames length is not tuned and the longest frames are used")
+    transfers_per_config: int = Field(default=3, gt=0, description="Amount of transfers measured for each configuration")
+    transfer_timeout: float = Field(default=2, gt=0, description="Timeout in seconds for the request and for its response")
+    max_error_rate: float = Field(default=0.0, ge=0, le=1, description="Maximal ratio of failed transfers for a configuration to be acceptable")
+
+    def tune(self) -> Optional[ISOTP_FLOW_CONTROL_PROFILE]:
+        """measure the candidate configurations and persist the best one as the ECU's profile
+
+        Returns:
+            Optional[ISOTP_FLOW_CONTROL_PROFILE]: the best configuration, None if no configuration was acceptable
+        """
+        # start from the stack defaults, not from a previous profile
+        best_config = {"stmin": 0, "blocksize": 8, "can_fd": False, "tx_data_length": CAN_CLASSIC_DATA_LENGTH}
+        frame_configs = [{"can_fd": False, "tx_data_length": CAN_CLASSIC_DATA_LENGTH}]
+        if self.isotp_communicator.can_communicator.support_fd:
+            frame_configs = [{"can_fd": True, "tx_data_length": length} for length in CAN_FD_DATA_LENGTH_CANDIDATES] + frame_configs
+            best_config.update(frame_configs[0])
+
+        measured: dict[tuple, tuple[float, float]] = {}
+        tx_score = None
+        if self.download_request:
+            tx_score = self._measure(best_config, measured, transmit=True)
+            for candidate in frame_configs:
+                config = {**best_config, **candidate}
+                score = self._measure(config, measured, transmit=True)
+                if self._is_better(score, tx_score):
+                    best_config, tx_score = config, score
+
+        rx_score = self._measure(best_config, measured, transmit=False)
+        for candidates in ([{"blocksize": blocksize} for blocksize in BLOCKSIZE_CANDIDATES],
+                           [{"stmin": stmin} for stmin in STMIN_CANDIDATES]):
+            for candidate in candidates:
+                config = {**best_config, **candidate}
+                score = self._measure(config, measured, transmit=False)
+                if self._is_better(score, rx_score):
+                    best_config, rx_score = config, score
+
+        throughput, error_rate = rx_score
+        tx_throughput, tx_error_rate = tx_score if tx_score else (None, 0.0)
+        error_rate = max(error_rate, tx_error_rate)
+        if error_rate > self.max_error_rate:
+            self.logger.warning(f"No acceptable ISO-TP configuration was found for {self.isotp_communicator}")
+            return None
+
+        self.isotp_communicator.update_params(best_config)
+        address = self.isotp_communicator._address
+        profile = ISOTP_FLOW_CONTROL_PROFILE(channel=self.isotp_communicator.can_communicator.channel,
+                                             txid=address.get_tx_arbitration_id(),
+                                             rxid=address.get_rx_arbitration_id(),
+                                             throughput=throughput,
+                                             tx_throughput=tx_throughput,
+                                             error_rate=error_rate,
+                                             **best_config)
+        if self.isotp_communicator.profiles_file:
+            save_profile(self.isotp_communicator.profiles_file, profile)
+        self.logger.info(f"Tuned {profile}")
+        return profile
+
+    def _is_better(self, score: tuple[float, float], best_score: tuple[float, float]) -> bool:
+        throughput, error_rate = score
+        best_throughput, best_error_rate = best_score
+        if (error_rate <= self.max_error_rate) != (best_error_rate <= self.max_error_rate):
+            return error_rate <= self.max_error_rate
+        if error_rate > self.max_error_rate:
+            return error_rate < best_error_rate
+        return throughput > best_throughput
+
+    def _measure(self, config: dict, measured: dict[tuple, tuple[float, float]], transmit: bool) -> tuple[float, float]:
+        """measure the transfers with a configuration, in one direction
+
+        Args:
+            transmit (bool): whether to time sending the download request, otherwise receiving the response to the request
+
+        Returns:
+            tuple[float, float]: effective throughput in bytes per second, and the ratio of failed transfers
+        """
+        config_key = (transmit, *sorted(config.items()))
+        if config_key in measured:
+            return measured[config_key]
+
+        self.isotp_communicator.update_params(config)
+        if not self.isotp_communicator._is_open:
+            self.isotp_communicator.open()
+        request = self.download_request if transmit else self.request
+        transferred = 0
+        failures = 0
+        elapsed = 0.0
+        for _ in range(self.transfers_per_config):
+            try:
+                start_time = time.perf_counter()
+                sent = self.isotp_communicator.send(request, timeout=self.transfer_timeout)
+                if transmit:
+                    # the send blocks until the last frame is transmitted
+                    elapsed += time.perf_counter() - start_time
+                    start_time = time.perf_counter()
+                # the response of the download request is awaited as well, not to be mistaken for the next one
+                response = self.isotp_communicator.recv(recv_timeout=self.transfer_timeout) if sent else None
+                if not transmit:
+                    elapsed += time.perf_counter() - start_time
+            except Exception as ex:
+                self.logger.debug(f"Transfer failed: {ex}")
+                sent, response = 0, None
+            if transmit and sent:
+                transferred += sent
+            elif not transmit and response:
+                transferred += len(response)
+            else:
+                failures += 1
+
+        score = (transferred / elapsed if elapsed > 0 else 0.0, failures / self.transfers_per_config)
+        self.logger.debug(f"ISO-TP configuration {config} {'TX' if transmit else 'RX'}: {score[0]:.0f}B/s, error rate {score[1] * 100:.1f}%")
+        measured[config_key] = score
+        return score
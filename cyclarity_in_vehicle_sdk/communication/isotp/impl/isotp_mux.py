@@ -0,0 +1,329 @@
+import select
+import socket
+import threading
+from collections import deque
+from types import TracebackType
+from typing import Optional
+
+import isotp
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.base.communicator_base import CommunicatorType
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import SNIFF_POLL_INTERVAL, CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import Address, AddressingMode, IsoTpCommunicatorBase
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import CAN_FD_MAX_DATA_LENGTH, CAN_ID_MAX_NORMAL_11_BITS
+
+DISPATCH_RETRY_DELAY_MIN = 0.01
+DISPATCH_RETRY_DELAY_MAX = 1.0
+
+class IsoTpMux(ParsableModel):
+    """Multiplexes many ISO-TP channels over a single CAN bus.
+    The mux owns the CAN communicator and a single dispatcher thread, received frames are routed to the
+    channels by their arbitration ID, and only the channels' IDs pass the kernel filters of the socket.
+    Channels are created with `create_channel`, and do not own any socket or thread.
+    """
+    can_communicator: CanCommunicatorSocketCan = Field(description="CAN Communicator")
+    padding_byte: Optional[int] = Field(default=None, ge=0, le=0xFF, description="Optional byte to pad TX messages with, defaults to None meaning no padding, should be in range 0x00-0xFF")
+    bitrate_switch: Optional[bool] = Field(default=False, description="BRS, defaults to False")
+    can_fd: Optional[bool] = Field(default=False, description="whether it is can FD, defaults to False")
+
+    _channels_by_rxid: dict[int, list["IsoTpMuxChannel"]] = PrivateAttr(default_factory=dict)
+    _lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+    _dispatcher: threading.Thread = None
+    _stop_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+    _wakeup_sockets: tuple[socket.socket, socket.socket] = None
+    # receive IDs added to the allowlist of the CAN communicator by the mux
+    _allowed_rxids: set[int] = PrivateAttr(default_factory=set)
+
+    def open(self) -> None:
+        """Opens the CAN communicator and starts dispatching. this method must be called before usage.
+        """
+        if self._dispatcher:
+            raise RuntimeError("IsoTpMux is already open")
+
+        self.can_communicator.open()
+        self._allowed_rxids.clear()
+        self._update_allowlist()
+        self._wakeup_sockets = socket.socketpair()
+        for wakeup_socket in self._wakeup_sockets:
+            wakeup_socket.setblocking(False)
+        self._stop_event.clear()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def close(self) -> None:
+        """Stops dispatching and closes the CAN communicator.
+        """
+        if self._dispatcher:
+            self._stop_event.set()
+            self._wakeup()
+            self._dispatcher.join()
+            self._dispatcher = None
+            for wakeup_socket in self._wakeup_sockets:
+                wakeup_socket.close()
+            self._wakeup_sockets = None
+            self.can_communicator.close()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exception_type: Optional[type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
+        self.close()
+        return False
+
+    def create_channel(self, rxid: int, txid: int) -> "IsoTpMuxChannel":
+        """create an ISO-TP channel over the mux, the channel is attached to the mux once opened
+
+        Args:
+            rxid (int): Receive CAN id
+            txid (int): Transmit CAN id
+
+        Returns:
+            IsoTpMuxChannel: the channel
+        """
+        return IsoTpMuxChannel(mux=self, rxid=rxid, txid=txid)
+
+    def get_channels(self) -> list["IsoTpMuxChannel"]:
+        """get the channels attached to the mux
+
+        Returns:
+            list[IsoTpMuxChannel]: the open channels
+        """
+        with self._lock:
+            return [channel for channels in self._channels_by_rxid.values() for channel in channels]
+
+    def _attach(self, channel: "IsoTpMuxChannel") -> None:
+        rxid = channel._rx_arbitration_id()
+        with self._lock:
+            channels = self._channels_by_rxid.setdefault(rxid, [])
+            if not any(attached is channel for attached in channels):
+                channels.append(channel)
+            if self._dispatcher:
+                self._update_allowlist()
+
+    def _detach(self, channel: "IsoTpMuxChannel") -> None:
+        with self._lock:
+            for rxid, channels in list(self._channels_by_rxid.items()):
+                channels[:] = [attached for attached in channels if attached is not channel]
+                if not channels:
+                    del self._channels_by_rxid[rxid]
+            if self._dispatcher:
+                self._update_allowlist()
+
+    def _update_allowlist(self) -> None:
+        """narrow the kernel filters to the receive IDs of the attached channels
+        """
+        with self._lock:
+            rxids = set(self._channels_by_rxid.keys())
+            added_rxids = rxids - self.can_communicator.allowlist_ids
+            if added_rxids:
+                self.can_communicator.add_to_allowlist(sorted(added_rxids))
+            self._allowed_rxids |= added_rxids
+            # an empty allowlist would let every ID through, the last IDs are kept until other channels are attached
+            removed_rxids = self._allowed_rxids - rxids
+            if removed_rxids and self.can_communicator.allowlist_ids - removed_rxids:
+                self.can_communicator.remove_from_allowlist(sorted(removed_rxids))
+                self._allowed_rxids -= removed_rxids
+
+    def _wakeup(self) -> None:
+        if self._wakeup_sockets:
+            try:
+                self._wakeup_sockets[1].send(b"\x00")
+            except BlockingIOError:
+                # the dispatcher is already pending a wakeup
+                pass
+
+    def _transmit(self, msg: isotp.CanMessage) -> None:
+        self.can_communicator.send(CanMessage(arbitration_id=msg.arbitration_id,
+                                              data=msg.data,
+                                              is_extended_id=msg.is_extended_id,
+                                              is_fd=msg.is_fd,
+                                              bitrate_switch=msg.bitrate_switch))
+
+    def _dispatch(self) -> None:
+        bus_socket = self.can_communicator.get_bus().socket
+        wakeup_socket = self._wakeup_sockets[0]
+        retry_delay = DISPATCH_RETRY_DELAY_MIN
+        while not self._stop_event.is_set():
+            ready_sockets, _, _ = select.select([bus_socket, wakeup_socket], [], [], self._next_timeout())
+            if wakeup_socket in ready_sockets:
+                try:
+                    wakeup_socket.recv(4096)
+                except BlockingIOError:
+                    pass
+            try:
+                msgs = self.can_communicator.receive_batch(timeout=0) if bus_socket in ready_sockets else []
+            except Exception as ex:
+                # e.g. the bus is temporarily down, the channels keep being served once it is back
+                self.logger.error(f"IsoTpMux failed receiving: {ex}, retrying in {retry_delay} seconds")
+                self._stop_event.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, DISPATCH_RETRY_DELAY_MAX)
+                msgs = []
+            else:
+                retry_delay = DISPATCH_RETRY_DELAY_MIN
+
+            with self._lock:
+                routed_channels: set[int] = set()
+                for msg in msgs:
+                    if msg.is_error_frame or msg.is_remote_frame:
+                        continue
+                    for channel in self._channels_by_rxid.get(msg.arbitration_id, ()):
+                        channel._rx_frames.append(isotp.CanMessage(arbitration_id=msg.arbitration_id,
+                                                                   data=msg.data,
+                                                                   extended_id=msg.is_extended_id,
+                                                                   is_fd=msg.is_fd,
+                                                                   bitrate_switch=msg.bitrate_switch))
+                        routed_channels.add(id(channel))
+                for channels in self._channels_by_rxid.values():
+                    for channel in channels:
+                        if id(channel) in routed_channels or channel._is_active():
+                            try:
+                                channel._transport_layer.process()
+                            except Exception as ex:
+                                self.logger.error(f"ISO-TP channel {channel} failed processing: {ex}")
+
+    def _next_timeout(self) -> float:
+        timeout = SNIFF_POLL_INTERVAL
+        with self._lock:
+            for channels in self._channels_by_rxid.values():
+                for channel in channels:
+                    if not channel._is_active():
+                        continue
+                    transport_layer = channel._transport_layer
+                    cf_delay = transport_layer.next_cf_delay()
+                    timeout = min(timeout, cf_delay if cf_delay is not None else transport_layer.sleep_time())
+        return timeout
+
+
+class IsoTpMuxChannel(IsoTpCommunicatorBase):
+    """An ISO-TP channel of a single address over a shared `IsoTpMux`.
+    The channel holds only the ISO-TP state machine, frames are received and transmitted by the mux.
+    """
+    mux: IsoTpMux = Field(description="The mux the channel is communicating over")
+    rxid: int = Field(description="Receive CAN id.")
+    txid: int = Field(description="Transmit CAN id.")
+
+    _is_open = False
+    _address = None
+    _transport_layer: isotp.TransportLayerLogic = None
+    _rx_frames: deque = PrivateAttr(default_factory=deque)
+
+    def teardown(self):
+        """Close the communicator.
+        """
+        self.close()
+
+    def model_post_init(self, *args, **kwargs):
+        super().model_post_init(*args, **kwargs)
+        mode = AddressingMode.Normal_29bits if (self.rxid > CAN_ID_MAX_NORMAL_11_BITS or self.txid > CAN_ID_MAX_NORMAL_11_BITS) else AddressingMode.Normal_11bits
+        self._address = Address(rxid=self.rxid, txid=self.txid, addressing_mode=mode)
+        params = {"blocking_send": True}
+        if self.mux.padding_byte is not None:
+            params.update({"tx_padding": self.mux.padding_byte})
+        if self.mux.bitrate_switch:
+            params.update({"bitrate_switch": self.mux.bitrate_switch})
+        if self.mux.can_fd:
+            params.update({"can_fd": self.mux.can_fd})
+            # the python stack defaults to 8 bytes frames even over CAN-FD
+            params.update({"tx_data_length": CAN_FD_MAX_DATA_LENGTH})
+        self._transport_layer = isotp.TransportLayerLogic(rxfn=self._read_rx_frame,
+                                                          txfn=self.mux._transmit,
+                                                          address=self._address,
+                                                          error_handler=self._on_error,
+                                                          params=params,
+                                                          post_send_callback=lambda send_request: self.mux._wakeup())
+
+    def set_address(self, address: Address):
+        """Set the address of the communicator.
+
+        Args:
+            address (Address): The address to be set.
+        """
+        with self.mux._lock:
+            self._address = address
+            self._transport_layer.set_address(address)
+            if self._is_open:
+                self.mux._detach(self)
+                self.mux._attach(self)
+
+    def send(self, data: bytes, timeout: Optional[float] = 1) -> int:
+        """sends bytes over the communication layer
+
+        Args:
+            data (bytes): data to send in bytes format
+            timeout (Optional[float]): timeout in seconds for send operation. defaults to None
+
+        Returns:
+            int: amount of bytes sent
+        """
+        if not self._is_open:
+            raise RuntimeError("IsoTpMuxChannel has not been opened successfully")
+
+        try:
+            self._transport_layer.send(data=data, send_timeout=timeout)
+        except isotp.BlockingSendTimeout as ex:
+            self.logger.warning(f"Timeout for send operation: {str(ex)}")
+            return 0
+
+        return len(data)
+
+    def recv(self, recv_timeout: float) -> bytes:
+        """Receives data from the channel.
+
+        Args:
+            recv_timeout (float, optional): The timeout for the receive operation.
+
+        Returns:
+            bytes: The data received.
+        """
+        if not self._is_open:
+            raise RuntimeError("IsoTpMuxChannel has not been opened successfully")
+
+        received_data = self._transport_layer.recv(block=True, timeout=recv_timeout)
+        return bytes(received_data) if received_data else bytes()
+
+    def open(self) -> bool:
+        """Attaches the channel to the mux.
+        Returns:
+            bool: A boolean indicating if the channel was successfully opened.
+        """
+        self.mux._attach(self)
+        self._is_open = True
+        return True
+
+    def close(self) -> bool:
+        """Detaches the channel from the mux.
+
+        Returns:
+            bool: A boolean indicating if the channel was successfully closed.
+        """
+        if self._is_open:
+            self.mux._detach(self)
+            with self.mux._lock:
+                self._transport_layer.reset()
+                self._rx_frames.clear()
+            self._is_open = False
+
+        return True
+
+    def get_type(self) -> CommunicatorType:
+        return CommunicatorType.ISOTP
+
+    def __str__(self):
+        return f"ISO/TP mux channel, rx={hex(self.rxid)}, tx={hex(self.txid)}"
+
+    def _rx_arbitration_id(self) -> int:
+        return self._address.get_rx_arbitration_id(isotp.TargetAddressType.Physical)
+
+    def _read_rx_frame(self, timeout: float) -> Optional[isotp.CanMessage]:
+        # frames are pushed by the mux, thus the read never blocks
+        return self._rx_frames.popleft() if self._rx_frames else None
+
+    def _is_active(self) -> bool:
+        return self._transport_layer.transmitting() or self._transport_layer.is_rx_active()
+
+    def _on_error(self, error: isotp.IsoTpError) -> None:
+        self.logger.warning(f"{self}: {error}")
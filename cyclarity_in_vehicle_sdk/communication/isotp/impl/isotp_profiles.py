@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+from typing import Optional
+
+from cyclarity_in_vehicle_sdk.communication.isotp.models.isotp_tuning_models import ISOTP_FLOW_CONTROL_PROFILE
+
+DEFAULT_ISOTP_PROFILES_FILE = os.path.join(os.path.expanduser("~"), ".cyclarity", "isotp_profiles.json")
+
+
+def _profile_key(channel: str, txid: int, rxid: int) -> str:
+    return f"{channel}/{txid:x}/{rxid:x}"
+
+
+def load_profiles(profiles_file: str) -> dict[str, ISOTP_FLOW_CONTROL_PROFILE]:
+    """load all the ISO-TP profiles persisted in a file
+
+    Args:
+        profiles_file (str): path to the profiles file
+
+    Returns:
+        dict[str, ISOTP_FLOW_CONTROL_PROFILE]: the profiles by their key, empty if the file does not exist
+    """
+    try:
+        with open(profiles_file) as profiles:
+            return {key: ISOTP_FLOW_CONTROL_PROFILE.model_validate(profile) for key, profile in json.load(profiles).items()}
+    except FileNotFoundError:
+        return {}
+
+
+def load_profile(profiles_file: str, channel: str, txid: int, rxid: int) -> Optional[ISOTP_FLOW_CONTROL_PROFILE]:
+    """load the ISO-TP profile of an ECU
+
+    Args:
+        profiles_file (str): path to the profiles file
+        channel (str): the CAN interface
+        txid (int): transmit CAN id
+        rxid (int): receive CAN id
+
+    Returns:
+        Optional[ISOTP_FLOW_CONTROL_PROFILE]: the profile, None if the ECU was not tuned
+    """
+    return load_profiles(profiles_file).get(_profile_key(channel, txid, rxid))
+
+
+def save_profile(profiles_file: str, profile: ISOTP_FLOW_CONTROL_PROFILE) -> None:
+    """persist the ISO-TP profile of an ECU, replacing its previous profile
+
+    Args:
+        profiles_file (str): path to the profiles file
+        profile (ISOTP_FLOW_CONTROL_PROFILE): the profile to persist
+    """
+    profiles = load_profiles(profiles_file)
+    profiles[_profile_key(profile.channel, profile.txid, profile.rxid)] = profile
+    profiles_dir = os.path.dirname(os.path.abspath(profiles_file))
+    os.makedirs(profiles_dir, exist_ok=True)
+    # write to a temporary file first, so concurrent readers never see a partial file
+    fd, temp_file = tempfile.mkstemp(dir=profiles_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as profiles_output:
+            json.dump({key: value.model_dump() for key, value in profiles.items()}, profiles_output, indent=2)
+        os.replace(temp_file, profiles_file)
+    except Exception:
+        os.remove(temp_file)
+        raise
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field
+
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import CAN_FD_MAX_DATA_LENGTH, ISOTP_MAX_32_BITS_LENGTH, IsoTpCommunicator
+from cyclarity_in_vehicle_sdk.communication.isotp.models.isotp_tuning_models import ISOTP_THROUGHPUT_RESULT
+
+CAN_CLASSIC_DATA_LENGTH = 8
+
+
+class IsoTpThroughputBenchmark(ParsableModel):
+    """Measures the ISO-TP payload throughput between two communicators on the same bus (e.g. over vcan),
+    to verify a transfer pipeline (e.g. flashing) saturates the link. Payloads are sent back to back by the sender
+    from a single buffer, while the receiver checks each of them in a separate thread.
+    Payloads larger than 4095 bytes exercise the 32 bits first frame length, thus the receiver's
+    max_frame_size must allow them.
+    """
+    sender: IsoTpCommunicator = Field(description="ISO-TP communicator sending the payloads")
+    receiver: IsoTpCommunicator = Field(description="ISO-TP communicator receiving the payloads, addressed as the peer of the sender")
+    payload_size: int = Field(default=0x10000, gt=0, le=ISOTP_MAX_32_BITS_LENGTH, description="Size in bytes of each payload")
+    transfers: int = Field(default=5, gt=0, description="Amount of payloads to transfer")
+    transfer_timeout: float = Field(default=10, gt=0, description="Timeout in seconds for sending and for receiving each payload")
+
+    def model_post_init(self, *args, **kwargs):
+        super().model_post_init(*args, **kwargs)
+        if self.payload_size > self.receiver.max_frame_size:
+            raise ValueError(f"payload_size {self.payload_size} exceeds the receiver's max_frame_size {self.receiver.max_frame_size}")
+
+    def run(self) -> ISOTP_THROUGHPUT_RESULT:
+        """transfer the payloads and measure the throughput, the communicators are opened if needed
+
+        Returns:
+            ISOTP_THROUGHPUT_RESULT: the achieved throughput
+        """
+        payload = bytes(i & 0xFF for i in range(self.payload_size))
+        for communicator in (self.receiver, self.sender):
+            if not communicator._is_open:
+                communicator.open()
+
+        received = 0
+        end_time = time.perf_counter()
+
+        def receive():
+            nonlocal received, end_time
+            for _ in range(self.transfers):
+                data = self.receiver.recv(recv_timeout=self.transfer_timeout)
+                if not data:
+                    return
+                if data == payload:
+                    received += 1
+                end_time = time.perf_counter()
+
+        receiver_thread = threading.Thread(target=receive, daemon=True)
+        receiver_thread.start()
+        start_time = time.perf_counter()
+        view = memoryview(payload)
+        for _ in range(self.transfers):
+            if not self.sender.send(view, timeout=self.transfer_timeout):
+                break
+        receiver_thread.join(self.transfer_timeout * self.transfers)
+
+        duration = max(end_time - start_time, 0.0)
+        params = self.sender.get_params()
+        result = ISOTP_THROUGHPUT_RESULT(payload_size=self.payload_size,
+                                         transfers=received,
+                                         failures=self.transfers - received,
+                                         duration=duration,
+                                         bytes_per_second=received * self.payload_size / duration if duration > 0 else 0.0,
+                                         tx_data_length=params.get("tx_data_length", CAN_FD_MAX_DATA_LENGTH if params.get("can_fd") else CAN_CLASSIC_DATA_LENGTH),
+                                         can_fd=bool(params.get("can_fd")))
+        self.logger.info(str(result))
+        return result
@@ -0,0 +1,41 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ISOTP_FLOW_CONTROL_PROFILE(BaseModel):
+    """Model containing the tuned ISO-TP transfer parameters of a single ECU
+    """
+    channel: str = Field(description="The CAN interface the ECU was tuned on")
+    txid: int = Field(description="Transmit CAN id")
+    rxid: int = Field(description="Receive CAN id")
+    stmin: int = Field(ge=0, le=0xFF, description="Separation time sent in the flow control frames (ISO 15765-2 encoding)")
+    blocksize: int = Field(ge=0, le=0xFF, description="Block size sent in the flow control frames, 0 means no further flow control")
+    tx_data_length: int = Field(description="Payload length of the transmitted CAN frames")
+    can_fd: bool = Field(description="Whether CAN-FD frames are transmitted")
+    throughput: Optional[float] = Field(default=None, description="Measured effective reception throughput in bytes per second, paced by the flow control")
+    tx_throughput: Optional[float] = Field(default=None, description="Measured effective transmission throughput in bytes per second, None if the transmission was not measured")
+    error_rate: Optional[float] = Field(default=None, description="Ratio of the measured transfers that failed or timed out")
+
+    def __str__(self):
+        throughput_str = f", RX throughput: {self.throughput:.0f}B/s, error rate: {self.error_rate * 100:.1f}%" if self.throughput is not None else ""
+        if self.tx_throughput is not None:
+            throughput_str += f", TX throughput: {self.tx_throughput:.0f}B/s"
+        return (f"ISO-TP profile {self.channel} tx={hex(self.txid)} rx={hex(self.rxid)}: stmin: {hex(self.stmin)}, "
+                f"block size: {self.blocksize}, TX data length: {self.tx_data_length}{' (CAN-FD)' if self.can_fd else ''}{throughput_str}")
+
+
+class ISOTP_THROUGHPUT_RESULT(BaseModel):
+    """Model containing the throughput measured for ISO-TP transfers between two communicators
+    """
+    payload_size: int = Field(description="Size in bytes of each transferred payload")
+    transfers: int = Field(description="Amount of payloads received intact")
+    failures: int = Field(description="Amount of payloads that failed, timed out or were received corrupted")
+    duration: float = Field(description="Time in seconds from the first send to the last reception")
+    bytes_per_second: float = Field(description="Achieved payload throughput in bytes per second")
+    tx_data_length: int = Field(description="Payload length of the transmitted CAN frames")
+    can_fd: bool = Field(description="Whether CAN-FD frames were transmitted")
+
+    def __str__(self):
+        return (f"ISO-TP throughput {'CAN-FD' if self.can_fd else 'CAN'} ({self.tx_data_length} bytes frames): "
+                f"{self.bytes_per_second:.0f}B/s, {self.transfers} transfers of {self.payload_size} bytes in {self.duration:.3f}s, "
+                f"{self.failures} failures")
@@ -0,0 +1,207 @@
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from doipclient import constants, messages
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.ip.base.ip_communicator_base import IpVersion
+from cyclarity_in_vehicle_sdk.plugin.base.plugin_base import BackgroundPluginBase, EventNotifierPluginBase
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import unpack_frame
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_models import DOIP_ENTITY_EVENT, DOIP_ENTITY_RECORD, DOIP_VEHICLE_IDENTIFICATION, DoipEntityEventType
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_utils import DOIP_PORT
+
+DATAGRAM_RECV_SIZE = 4096
+# EIDs of entities that have not been configured with one
+UNSET_EIDS = (bytes(6), b"\xFF" * 6)
+
+
+class DoipAnnouncementListener(EventNotifierPluginBase, BackgroundPluginBase):
+    """Passively listens for DoIP vehicle announcements and identification responses on the DoIP UDP port,
+    and keeps a registry of the DoIP entities seen, so that callers need not send fresh discovery requests.
+    Entities are identified by their EID (by VIN and IP address if the EID is not set).
+
+    Changes are reported as events:
+    a new entity, a changed logical address, and a reboot - a known entity sending a new burst
+    of announcements, as sent after power up (A_DOIP_ANNOUNCE_NUM announcements A_DOIP_ANNOUNCE_INTERVAL apart).
+    Messages closer than `min_announcement_gap` to the previous message of a burst, e.g. responses
+    to identification requests, are not counted as announcements.
+    """
+    if_names: list[str] = Field(description="Interfaces to listen on")
+    ip_version: IpVersion = Field(default=IpVersion.IPv4, description="IP version to listen for")
+    port: int = Field(default=DOIP_PORT, description="UDP port to listen on")
+    announcement_gap: float = Field(default=2 * constants.A_DOIP_ANNOUNCE_INTERVAL, gt=0,
+                                    description="Maximal time in seconds between messages of the same announcement burst")
+    min_announcement_gap: float = Field(default=constants.A_DOIP_ANNOUNCE_INTERVAL / 2, ge=0,
+                                        description="Minimal time in seconds between messages of the same announcement burst")
+    max_events: int = Field(default=1000, gt=0, description="Maximal amount of events kept, the oldest are dropped")
+    poll_interval: float = Field(default=0.1, gt=0, description="Time in seconds between checks for a stop request")
+
+    _sockets: dict[str, socket.socket] = PrivateAttr(default_factory=dict)
+    _entities: dict[str, DOIP_ENTITY_RECORD] = PrivateAttr(default_factory=dict)
+    # entity key -> start time, announcement count and last announcement time of the entity's current burst
+    _bursts: dict[str, list] = PrivateAttr(default_factory=dict)
+    _events: deque = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, *args, **kwargs):
+        super().model_post_init(*args, **kwargs)
+        self._events = deque(maxlen=self.max_events)
+
+    def setup(self) -> None:
+        """open the listening sockets, one per interface
+        """
+        family = socket.AF_INET if self.ip_version == IpVersion.IPv4 else socket.AF_INET6
+        for if_name in self.if_names:
+            if if_name in self._sockets:
+                continue
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, if_name.encode())
+                # bound to any address, as the announcements are broadcast
+                sock.bind(("", self.port) if family == socket.AF_INET else ("::", self.port, 0, 0))
+                sock.setblocking(False)
+            except OSError:
+                sock.close()
+                raise
+            self._sockets[if_name] = sock
+
+    def teardown(self) -> None:
+        """stop listening and close the sockets
+        """
+        self.stop()
+        for sock in self._sockets.values():
+            sock.close()
+        self._sockets.clear()
+
+    def run(self) -> None:
+        """receive the datagrams until stopped, the sockets are opened if needed
+        """
+        if not self._sockets:
+            self.setup()
+        with selectors.DefaultSelector() as selector:
+            for if_name, sock in self._sockets.items():
+                selector.register(sock, selectors.EVENT_READ, if_name)
+            while not self._stop_event.is_set():
+                for key, _ in selector.select(self.poll_interval):
+                    try:
+                        data, address = key.fileobj.recvfrom(DATAGRAM_RECV_SIZE)
+                    except (BlockingIOError, InterruptedError):
+                        continue
+                    except OSError as ex:
+                        self.logger.error(f"Failed receiving on {key.data}: {ex}")
+                        continue
+                    self.process_datagram(data, address[0], key.data)
+
+    def process_datagram(self, data: bytes, ip_address: str, if_name: str, timestamp: Optional[float] = None) -> Optional[DOIP_ENTITY_RECORD]:
+        """update the registry from a received datagram, may also be used to feed datagrams received elsewhere
+
+        Args:
+            data (bytes): the UDP payload
+            ip_address (str): the source IP address
+            if_name (str): the interface the datagram was received on
+            timestamp (Optional[float], optional): receive time in seconds since the epoch. Defaults to now.
+
+        Returns:
+            Optional[DOIP_ENTITY_RECORD]: the updated entity, None if the datagram is not an announcement nor an identification response
+        """
+        message = unpack_frame(data)
+        if type(message) is not messages.VehicleIdentificationResponse:
+            return None
+        if timestamp is None:
+            timestamp = time.time()
+        identification = DOIP_VEHICLE_IDENTIFICATION(vin=message.vin,
+                                                     target_address=message.logical_address,
+                                                     eid=message.eid.hex(),
+                                                     gid=message.gid.hex(),
+                                                     further_action_required=message.further_action_required,
+                                                     vin_gid_sync_status=message.vin_sync_status)
+        key = message.eid.hex() if message.eid not in UNSET_EIDS else f"{message.vin}/{ip_address}"
+        events: list[DOIP_ENTITY_EVENT] = []
+        with self._lock:
+            record = self._entities.get(key)
+            if record is None:
+                record = DOIP_ENTITY_RECORD(identification=identification, ip_address=ip_address, if_name=if_name,
+                                            first_seen=timestamp, last_seen=timestamp)
+                self._entities[key] = record
+                self._bursts[key] = [timestamp, 0, None]
+                events.append(DOIP_ENTITY_EVENT(event_type=DoipEntityEventType.NEW_ENTITY, timestamp=timestamp, entity=record))
+            burst = self._bursts[key]
+            if burst[2] is None or timestamp - burst[2] > self.announcement_gap:
+                burst[:] = [timestamp, 1, timestamp]
+            elif timestamp - burst[2] >= self.min_announcement_gap:
+                burst[1] += 1
+                burst[2] = timestamp
+            # responses to requests may come in any amount, a reboot is a complete new burst of announcements
+            if burst[1] == constants.A_DOIP_ANNOUNCE_NUM and burst[2] == timestamp and burst[0] > record.first_seen:
+                record.reboots += 1
+                events.append(DOIP_ENTITY_EVENT(event_type=DoipEntityEventType.REBOOT, timestamp=timestamp, entity=record))
+            previous_logical_address = record.identification.target_address
+            if previous_logical_address != message.logical_address:
+                events.append(DOIP_ENTITY_EVENT(event_type=DoipEntityEventType.LOGICAL_ADDRESS_CHANGED, timestamp=timestamp,
+                                                entity=record, previous_logical_address=previous_logical_address))
+            record.identification = identification
+            record.ip_address = ip_address
+            record.if_name = if_name
+            record.last_seen = timestamp
+            record.messages_received += 1
+            # the events hold the entity as of the change
+            for event in events:
+                event.entity = record.model_copy(deep=True)
+                self._events.append(event)
+            record = record.model_copy(deep=True)
+
+        for event in events:
+            self.logger.info(str(event))
+            if self._event_notifier_cb:
+                self._event_notifier_cb()
+        return record
+
+    def get_entities(self, max_age: Optional[float] = None) -> list[DOIP_ENTITY_RECORD]:
+        """get the entities in the registry
+
+        Args:
+            max_age (Optional[float], optional): only entities seen within the last max_age seconds. Defaults to None for all.
+
+        Returns:
+            list[DOIP_ENTITY_RECORD]: the entities
+        """
+        min_last_seen = time.time() - max_age if max_age is not None else None
+        with self._lock:
+            return [record.model_copy(deep=True) for record in self._entities.values()
+                    if min_last_seen is None or record.last_seen >= min_last_seen]
+
+    def get_entity(self, logical_address: int) -> Optional[DOIP_ENTITY_RECORD]:
+        """get the entity last seen with a logical address
+
+        Args:
+            logical_address (int): the logical address
+
+        Returns:
+            Optional[DOIP_ENTITY_RECORD]: the entity, None if not seen
+        """
+        with self._lock:
+            records = [record for record in self._entities.values() if record.identification.target_address == logical_address]
+            if not records:
+                return None
+            return max(records, key=lambda record: record.last_seen).model_copy(deep=True)
+
+    def get_events(self, clear: bool = False) -> list[DOIP_ENTITY_EVENT]:
+        """get the events detected, oldest first
+
+        Args:
+            clear (bool, optional): whether to remove the returned events. Defaults to False.
+
+        Returns:
+            list[DOIP_ENTITY_EVENT]: the events
+        """
+        with self._lock:
+            events = list(self._events)
+            if clear:
+                self._events.clear()
+            return events
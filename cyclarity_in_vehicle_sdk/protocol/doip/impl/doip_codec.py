@@ -0,0 +1,119 @@
+import struct
+from typing import Optional
+
+from doipclient import DoIPClient, messages
+
+# protocol version, inverse protocol version, payload type, payload length (ISO 13400-2 generic header)
+DOIP_HEADER = struct.Struct("!BBHL")
+# generic header followed by the source and target logical addresses
+DIAGNOSTIC_MESSAGE_HEADER = struct.Struct("!BBHLHH")
+# source address, target address, ACK/NACK code
+DIAGNOSTIC_MESSAGE_ACK = struct.Struct("!HHB")
+LOGICAL_ADDRESSES = struct.Struct("!HH")
+LOGICAL_ADDRESS = struct.Struct("!H")
+# DoIP ISO 13400-2:2012
+DEFAULT_PROTOCOL_VERSION = 0x02
+
+DIAGNOSTIC_MESSAGE_TYPE = messages.payload_message_to_type[messages.DiagnosticMessage]
+DIAGNOSTIC_MESSAGE_ACK_TYPE = messages.payload_message_to_type[messages.DiagnosticMessagePositiveAcknowledgement]
+DIAGNOSTIC_MESSAGE_NACK_TYPE = messages.payload_message_to_type[messages.DiagnosticMessageNegativeAcknowledgement]
+ALIVE_CHECK_REQUEST_TYPE = messages.payload_message_to_type[messages.AliveCheckRequest]
+ALIVE_CHECK_RESPONSE_TYPE = messages.payload_message_to_type[messages.AliveCheckResponse]
+
+
+def pack_diagnostic_message(source_address: int,
+                            target_address: int,
+                            user_data: bytes,
+                            protocol_version: int = DEFAULT_PROTOCOL_VERSION) -> bytes:
+    """pack a diagnostic message, including the DoIP header
+
+    Args:
+        source_address (int): source logical address
+        target_address (int): target logical address
+        user_data (bytes): the UDS payload
+        protocol_version (int, optional): the DoIP protocol version. Defaults to DEFAULT_PROTOCOL_VERSION.
+
+    Returns:
+        bytes: the packed message
+    """
+    return DIAGNOSTIC_MESSAGE_HEADER.pack(protocol_version, 0xFF ^ protocol_version, DIAGNOSTIC_MESSAGE_TYPE,
+                                         LOGICAL_ADDRESSES.size + len(user_data), source_address, target_address) + user_data
+
+
+def pack_message(message: messages.DoIPMessage, protocol_version: int = DEFAULT_PROTOCOL_VERSION) -> bytes:
+    """pack a DoIP message, including the DoIP header. The frequent messages (diagnostic messages,
+    their acknowledgements and the alive checks) are packed directly, others are packed by doipclient
+
+    Args:
+        message (messages.DoIPMessage): the message
+        protocol_version (int, optional): the DoIP protocol version. Defaults to DEFAULT_PROTOCOL_VERSION.
+
+    Returns:
+        bytes: the packed message
+    """
+    message_type = type(message)
+    if message_type is messages.DiagnosticMessage:
+        return pack_diagnostic_message(message.source_address, message.target_address, message.user_data, protocol_version)
+    if message_type is messages.AliveCheckResponse:
+        return DOIP_HEADER.pack(protocol_version, 0xFF ^ protocol_version, ALIVE_CHECK_RESPONSE_TYPE, LOGICAL_ADDRESS.size) + LOGICAL_ADDRESS.pack(message.source_address)
+    if message_type is messages.AliveCheckRequest:
+        return DOIP_HEADER.pack(protocol_version, 0xFF ^ protocol_version, ALIVE_CHECK_REQUEST_TYPE, 0)
+    if message_type in (messages.DiagnosticMessagePositiveAcknowledgement, messages.DiagnosticMessageNegativeAcknowledgement):
+        code = message.ack_code if message_type is messages.DiagnosticMessagePositiveAcknowledgement else message.nack_code
+        previous_message_data = message.previous_message_data or b""
+        payload_type = DIAGNOSTIC_MESSAGE_ACK_TYPE if message_type is messages.DiagnosticMessagePositiveAcknowledgement else DIAGNOSTIC_MESSAGE_NACK_TYPE
+        return (DOIP_HEADER.pack(protocol_version, 0xFF ^ protocol_version, payload_type, DIAGNOSTIC_MESSAGE_ACK.size + len(previous_message_data))
+                + DIAGNOSTIC_MESSAGE_ACK.pack(message.source_address, message.target_address, code) + previous_message_data)
+    return DoIPClient._pack_doip(protocol_version, messages.payload_message_to_type[message_type], message.pack())
+
+
+def unpack_message(payload_type: int, payload: bytes) -> messages.DoIPMessage:
+    """unpack the payload of a DoIP message. The frequent messages are unpacked directly from the payload,
+    which may be a memoryview of the receive buffer, copying only their data. Others are unpacked by doipclient
+
+    Args:
+        payload_type (int): the payload type from the DoIP header
+        payload (bytes): the payload, without the DoIP header
+
+    Returns:
+        messages.DoIPMessage: the message
+    """
+    if payload_type == DIAGNOSTIC_MESSAGE_TYPE:
+        source_address, target_address = LOGICAL_ADDRESSES.unpack_from(payload)
+        return messages.DiagnosticMessage(source_address, target_address, bytes(payload[LOGICAL_ADDRESSES.size:]))
+    if payload_type == DIAGNOSTIC_MESSAGE_ACK_TYPE:
+        return messages.DiagnosticMessagePositiveAcknowledgement(*DIAGNOSTIC_MESSAGE_ACK.unpack_from(payload), bytes(payload[DIAGNOSTIC_MESSAGE_ACK.size:]))
+    if payload_type == DIAGNOSTIC_MESSAGE_NACK_TYPE:
+        return messages.DiagnosticMessageNegativeAcknowledgement(*DIAGNOSTIC_MESSAGE_ACK.unpack_from(payload), bytes(payload[DIAGNOSTIC_MESSAGE_ACK.size:]))
+    if payload_type == ALIVE_CHECK_REQUEST_TYPE:
+        return messages.AliveCheckRequest()
+    if payload_type == ALIVE_CHECK_RESPONSE_TYPE:
+        return messages.AliveCheckResponse(*LOGICAL_ADDRESS.unpack_from(payload))
+
+    payload = bytearray(payload)
+    message_type = messages.payload_type_to_message.get(payload_type)
+    if message_type is None:
+        return messages.ReservedMessage.unpack(payload_type, payload, len(payload))
+    return message_type.unpack(payload, len(payload))
+
+
+def unpack_frame(data: bytes) -> Optional[messages.DoIPMessage]:
+    """unpack a single DoIP message including its header, e.g. the payload of a UDP datagram
+
+    Args:
+        data (bytes): the DoIP message
+
+    Returns:
+        Optional[messages.DoIPMessage]: the message, None if the data is not a valid and complete DoIP message
+    """
+    if len(data) < DOIP_HEADER.size:
+        return None
+    protocol_version, inverse_protocol_version, payload_type, payload_length = DOIP_HEADER.unpack_from(data)
+    if inverse_protocol_version != 0xFF ^ protocol_version or len(data) < DOIP_HEADER.size + payload_length:
+        return None
+    with memoryview(data) as view:
+        try:
+            return unpack_message(payload_type, view[DOIP_HEADER.size:DOIP_HEADER.size + payload_length])
+        except Exception:
+            return None
+
@@ -0,0 +1,54 @@
+import time
+from typing import Callable
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from doipclient import DoIPClient, messages
+from doipclient.client import Parser
+from pydantic import Field
+
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import DEFAULT_PROTOCOL_VERSION, pack_diagnostic_message, unpack_frame
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_models import DOIP_CODEC_BENCHMARK_RESULT
+
+CLIENT_LOGICAL_ADDRESS = 0x0E80
+TARGET_LOGICAL_ADDRESS = 0x1001
+
+
+class DoipCodecBenchmark(ParsableModel):
+    """Measures the per-message cost of packing and parsing diagnostic messages with the fast DoIP codec,
+    compared to doipclient, as done for every UDS request and response over DoIP.
+    """
+    iterations: int = Field(default=100000, gt=0, description="Amount of messages packed and parsed by each codec")
+    user_data_size: int = Field(default=8, ge=0, description="Size in bytes of the UDS payload of each message")
+
+    def run(self) -> DOIP_CODEC_BENCHMARK_RESULT:
+        """pack and parse the messages with each codec
+
+        Returns:
+            DOIP_CODEC_BENCHMARK_RESULT: the per-message cost
+        """
+        user_data = bytes(i & 0xFF for i in range(self.user_data_size))
+        frame = pack_diagnostic_message(TARGET_LOGICAL_ADDRESS, CLIENT_LOGICAL_ADDRESS, user_data)
+
+        def doipclient_pack():
+            message = messages.DiagnosticMessage(CLIENT_LOGICAL_ADDRESS, TARGET_LOGICAL_ADDRESS, user_data)
+            DoIPClient._pack_doip(DEFAULT_PROTOCOL_VERSION, messages.payload_message_to_type[type(message)], message.pack())
+
+        def doipclient_parse():
+            Parser().read_message(frame)
+
+        result = DOIP_CODEC_BENCHMARK_RESULT(
+            user_data_size=self.user_data_size,
+            iterations=self.iterations,
+            doipclient_pack_ns=self._measure(doipclient_pack),
+            fast_pack_ns=self._measure(lambda: pack_diagnostic_message(CLIENT_LOGICAL_ADDRESS, TARGET_LOGICAL_ADDRESS, user_data)),
+            doipclient_parse_ns=self._measure(doipclient_parse),
+            fast_parse_ns=self._measure(lambda: unpack_frame(frame)),
+        )
+        self.logger.info(str(result))
+        return result
+
+    def _measure(self, operation: Callable[[], object]) -> float:
+        start_time = time.perf_counter_ns()
+        for _ in range(self.iterations):
+            operation()
+        return (time.perf_counter_ns() - start_time) / self.iterations
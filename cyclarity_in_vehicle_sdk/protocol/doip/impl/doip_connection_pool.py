@@ -0,0 +1,295 @@
+import threading
+import time
+from collections import OrderedDict
+from types import TracebackType
+from typing import Optional
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from doipclient import constants, messages
+from pydantic import Field, IPvAnyAddress, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import pack_message
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_models import DOIP_CONNECTION_POOL_STATISTICS
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_stream_reader import get_stream_reader
+
+# the DoIP entity closes connections idle for longer than T_TCP_General_Inactivity
+DEFAULT_IDLE_TIMEOUT = constants.T_TCP_GENERAL_INACTIVITY
+# time in seconds to wait for pending messages of an idle connection on each keepalive round
+KEEPALIVE_READ_TIMEOUT = 0.01
+
+ConnectionKey = tuple[str, str, Optional[int], Optional[int], Optional[int]]
+ActivationType = messages.RoutingActivationRequest.ActivationType
+
+
+class DoipPooledConnection():
+    """A connection held by `DoipConnectionPool`, acquired from the pool and released back to it
+    """
+    __slots__ = ("key", "communicator", "routing_activation", "last_used", "users", "checking")
+
+    def __init__(self, key: ConnectionKey, communicator: TcpCommunicator):
+        self.key = key
+        self.communicator = communicator
+        self.routing_activation: Optional[messages.RoutingActivationResponse] = None
+        self.last_used = time.monotonic()
+        self.users = 0
+        # whether the background keepalive is reading from the connection
+        self.checking = False
+
+
+class DoipConnectionPool(ParsableModel):
+    """Pool of DoIP TCP connections, keyed by the source IP, the target IP and the routing activation parameters.
+    A pooled connection is handed out without probing the socket, instead connections that failed are released
+    as such by their users, and idle connections are checked, kept alive and evicted in the background.
+    The routing activation of a connection is kept along with it, so activating an already activated
+    connection is served from the pool. Connecting, keeping alive and closing are done outside of the pool's lock,
+    which only guards the pool's state.
+    """
+    max_size: int = Field(default=16, gt=0, description="Maximal amount of connections in the pool")
+    idle_timeout: float = Field(default=DEFAULT_IDLE_TIMEOUT, gt=0, description="Time in seconds after which an unused connection is closed")
+    keepalive_interval: Optional[float] = Field(default=1.0, gt=0, description="Interval in seconds in which idle connections are checked and DoIP alive check requests are answered, None disables the background keepalive")
+
+    _connections: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _failed_keys: set = PrivateAttr(default_factory=set)
+    # notified whenever the keepalive of a connection completes
+    _lock: threading.Condition = PrivateAttr(default_factory=threading.Condition)
+    _connecting: int = 0
+    _keepalive_thread: threading.Thread = None
+    _stop_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+    _hits: int = 0
+    _misses: int = 0
+    _reconnects: int = 0
+    _evictions: int = 0
+    _routing_activations_reused: int = 0
+
+    def open(self) -> bool:
+        """Starts the background keepalive of the idle connections, if enabled
+
+        Returns:
+            bool: True if succeeded, False otherwise
+        """
+        if self.keepalive_interval and not self._keepalive_thread:
+            self._stop_event.clear()
+            self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+            self._keepalive_thread.start()
+        return True
+
+    def close(self) -> bool:
+        """Stops the background keepalive and closes all the connections
+
+        Returns:
+            bool: True if succeeded, False otherwise
+        """
+        if self._keepalive_thread:
+            self._stop_event.set()
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._failed_keys.clear()
+        self._close_connections(connections)
+        return True
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exception_type: Optional[type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
+        self.close()
+        return False
+
+    def acquire(self,
+                source_address: IPvAnyAddress,
+                target_address: IPvAnyAddress,
+                client_logical_address: Optional[int] = None,
+                activation_type: Optional[ActivationType] = None,
+                vm_specific: Optional[int] = None) -> DoipPooledConnection:
+        """get a connection from the pool, a new connection is opened if there is none for the key
+
+        Args:
+            source_address (IPvAnyAddress): source IP address
+            target_address (IPvAnyAddress): target IP address
+            client_logical_address (Optional[int], optional): client's logical address of the routing activation. Defaults to None.
+            activation_type (Optional[ActivationType], optional): the routing activation type. Defaults to None.
+            vm_specific (Optional[int], optional): vm specific argument of the routing activation. Defaults to None.
+
+        :raises RuntimeError: If the pool is full and all of its connections are in use
+
+        Returns:
+            DoipPooledConnection: the connection, must be released with `release` after usage
+        """
+        key = (str(source_address), str(target_address), client_logical_address,
+               int(activation_type) if activation_type is not None else None, vm_specific)
+        evicted: list[DoipPooledConnection] = []
+        try:
+            with self._lock:
+                evicted.extend(self._evict_idle(time.monotonic()))
+                connection = self._get_checked(key)
+                if connection:
+                    self._hits += 1
+                    self._connections.move_to_end(key)
+                    return self._use(connection)
+                self._misses += 1
+                if key in self._failed_keys:
+                    self._failed_keys.discard(key)
+                    self._reconnects += 1
+                # connections being opened by other callers count towards the pool's size
+                if len(self._connections) + self._connecting >= self.max_size:
+                    evicted.append(self._evict_least_recently_used())
+                self._connecting += 1
+        finally:
+            self._close_connections(evicted)
+
+        communicator = TcpCommunicator(destination_ip=str(target_address),
+                                       source_ip=str(source_address),
+                                       dport=constants.TCP_DATA_UNSECURED,
+                                       sport=0)
+        try:
+            communicator.open()
+            communicator.connect()
+        except Exception:
+            communicator.close()
+            with self._lock:
+                self._connecting -= 1
+            raise
+        new_connection = DoipPooledConnection(key=key, communicator=communicator)
+        with self._lock:
+            self._connecting -= 1
+            connection = self._get_checked(key)
+            if connection is None:
+                connection = self._connections[key] = new_connection
+            connection = self._use(connection)
+        if connection is not new_connection:
+            # another caller opened a connection for the key meanwhile
+            self._close_connection(new_connection)
+        return connection
+
+    def release(self, connection: DoipPooledConnection, failed: bool = False) -> None:
+        """return a connection to the pool
+
+        Args:
+            connection (DoipPooledConnection): the connection acquired from the pool
+            failed (bool, optional): whether the connection failed, a failed connection is closed and reopened
+                on the next acquisition. Defaults to False.
+        """
+        with self._lock:
+            connection.users = max(connection.users - 1, 0)
+            connection.last_used = time.monotonic()
+            if not failed or self._connections.get(connection.key) is not connection:
+                return
+            self._drop(connection)
+        self._close_connection(connection)
+
+    def get_routing_activation(self, connection: DoipPooledConnection) -> Optional[messages.RoutingActivationResponse]:
+        """get the successful routing activation of a connection, counted as reused
+
+        Args:
+            connection (DoipPooledConnection): the connection
+
+        Returns:
+            Optional[messages.RoutingActivationResponse]: the routing activation response, None if the connection was not activated
+        """
+        with self._lock:
+            if connection.routing_activation is not None:
+                self._routing_activations_reused += 1
+            return connection.routing_activation
+
+    def get_statistics(self) -> DOIP_CONNECTION_POOL_STATISTICS:
+        """get the usage statistics of the pool
+
+        Returns:
+            DOIP_CONNECTION_POOL_STATISTICS: the statistics
+        """
+        with self._lock:
+            return DOIP_CONNECTION_POOL_STATISTICS(hits=self._hits,
+                                                   misses=self._misses,
+                                                   reconnects=self._reconnects,
+                                                   evictions=self._evictions,
+                                                   routing_activations_reused=self._routing_activations_reused,
+                                                   open_connections=len(self._connections))
+
+    def _get_checked(self, key: ConnectionKey) -> Optional[DoipPooledConnection]:
+        # a connection is handed out once the keepalive is done reading from it
+        connection = self._connections.get(key)
+        while connection is not None and connection.checking:
+            self._lock.wait()
+            connection = self._connections.get(key)
+        return connection
+
+    @staticmethod
+    def _use(connection: DoipPooledConnection) -> DoipPooledConnection:
+        connection.users += 1
+        connection.last_used = time.monotonic()
+        return connection
+
+    def _evict_idle(self, now: float) -> list[DoipPooledConnection]:
+        evicted = [connection for connection in self._connections.values()
+                   if not connection.users and not connection.checking and now - connection.last_used > self.idle_timeout]
+        for connection in evicted:
+            self._evictions += 1
+            del self._connections[connection.key]
+        return evicted
+
+    def _evict_least_recently_used(self) -> DoipPooledConnection:
+        for connection in self._connections.values():
+            if not connection.users and not connection.checking:
+                self._evictions += 1
+                del self._connections[connection.key]
+                return connection
+        raise RuntimeError(f"DoipConnectionPool is full, all {self.max_size} connections are in use")
+
+    def _drop(self, connection: DoipPooledConnection) -> None:
+        del self._connections[connection.key]
+        self._failed_keys.add(connection.key)
+
+    def _close_connections(self, connections: list[DoipPooledConnection]) -> None:
+        for connection in connections:
+            self._close_connection(connection)
+
+    def _close_connection(self, connection: DoipPooledConnection) -> None:
+        try:
+            connection.communicator.close()
+        except Exception as ex:
+            self.logger.debug(f"Failed closing DoIP connection to {connection.key[1]}: {ex}")
+
+    def _keepalive_loop(self) -> None:
+        while not self._stop_event.wait(self.keepalive_interval):
+            with self._lock:
+                evicted = self._evict_idle(time.monotonic())
+                idle_connections = [connection for connection in self._connections.values() if not connection.users]
+            self._close_connections(evicted)
+            for connection in idle_connections:
+                with self._lock:
+                    # the connection may have been acquired or evicted meanwhile
+                    if connection.users or connection.checking or self._connections.get(connection.key) is not connection:
+                        continue
+                    connection.checking = True
+                try:
+                    alive = self._keep_alive(connection)
+                except Exception as ex:
+                    self.logger.debug(f"Keepalive of the pooled DoIP connection to {connection.key[1]} failed: {ex}")
+                    alive = False
+                with self._lock:
+                    connection.checking = False
+                    dropped = not alive and self._connections.get(connection.key) is connection
+                    if dropped:
+                        self._drop(connection)
+                    self._lock.notify_all()
+                if dropped:
+                    self.logger.debug(f"Pooled DoIP connection to {connection.key[1]} was closed")
+                    self._close_connection(connection)
+
+    def _keep_alive(self, connection: DoipPooledConnection) -> bool:
+        if not connection.communicator.is_open():
+            return False
+        stream_reader = get_stream_reader(connection.communicator)
+        while True:
+            message = stream_reader.read(timeout=KEEPALIVE_READ_TIMEOUT, message_types=(messages.AliveCheckRequest,))
+            if message is None:
+                # the read notices a connection closed by the gateway
+                return connection.communicator.is_open()
+            if type(message) is messages.AliveCheckRequest and connection.key[2] is not None:
+                data = pack_message(messages.AliveCheckResponse(connection.key[2]))
+                if not connection.communicator.send(data=data):
+                    return False
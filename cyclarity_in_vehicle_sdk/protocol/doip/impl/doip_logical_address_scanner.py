@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from typing import Optional
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from doipclient import messages
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_models import DOIP_LOGICAL_ADDRESS_PROBE, DOIP_LOGICAL_ADDRESS_SCAN_RESULT, DoipLogicalAddressStatus
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_pipeline import DoipNegativeAcknowledgeError, DoipPipeline
+from cyclarity_in_vehicle_sdk.protocol.uds.models.uds_models import UdsSid
+from cyclarity_in_vehicle_sdk.utils.custom_types.range_set import HexNumberRangeSet
+
+TESTER_PRESENT_PROBE = bytes([UdsSid.TesterPresent, 0x00])
+UNKNOWN_TARGET_ADDRESS_NACK = messages.DiagnosticMessageNegativeAcknowledgement.NackCodes.UnknownTargetAddress
+
+
+class _AddressProbe():
+    __slots__ = ("logical_address", "sent_time", "ack_time")
+
+    def __init__(self, logical_address: int):
+        self.logical_address = logical_address
+        self.sent_time = time.perf_counter()
+        self.ack_time: Optional[float] = None
+
+    def on_acknowledge(self) -> None:
+        self.ack_time = time.perf_counter()
+
+
+class DoipLogicalAddressScanner(ParsableModel):
+    """Discovers the target logical addresses answering behind a DoIP entity.
+    A single connection is opened and routing activated, then diagnostic messages are sent to the candidate
+    addresses over a pipeline, up to `window` in flight at once. Each address is classified in a single pass
+    by its positive acknowledge, negative acknowledge (e.g. unknown target address) and UDS response.
+    """
+    tcp_communicator: TcpCommunicator = Field(description="TCP communicator of the DoIP connection, opened by the scanner")
+    client_logical_address: int = Field(description="Client's logical address")
+    target_addresses: HexNumberRangeSet = Field(description="Target logical addresses to probe")
+    routing_activation_needed: bool = Field(default=True, description="Whether routing activation is performed before scanning")
+    probe: bytes = Field(default=TESTER_PRESENT_PROBE, description="UDS request sent to each address, defaults to tester present")
+    window: int = Field(default=16, gt=0, description="Maximal amount of probes in flight")
+    response_timeout: float = Field(default=1.0, gt=0, description="Time in seconds to wait for the UDS response of a probe")
+
+    _stop_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+
+    def scan(self) -> DOIP_LOGICAL_ADDRESS_SCAN_RESULT:
+        """scan the target addresses
+
+        Returns:
+            DOIP_LOGICAL_ADDRESS_SCAN_RESULT: the classified addresses, along with the scan rate
+        """
+        self._stop_event.clear()
+        probes: list[DOIP_LOGICAL_ADDRESS_PROBE] = []
+        # each probe is submitted once a slot is free, hence sent right away and timed from its submission
+        slots = threading.Semaphore(self.window)
+        pipeline = DoipPipeline(tcp_communicator=self.tcp_communicator,
+                                client_logical_address=self.client_logical_address,
+                                routing_activation_needed=self.routing_activation_needed,
+                                window=self.window)
+        start_time = time.perf_counter()
+        with pipeline:
+            for logical_address in self.target_addresses:
+                slots.acquire()
+                if self._stop_event.is_set():
+                    slots.release()
+                    break
+                probe = _AddressProbe(logical_address)
+                pipeline.submit(self.probe,
+                                logical_address,
+                                timeout=self.response_timeout,
+                                callback=partial(self._on_done, probe, probes, slots),
+                                acknowledge_callback=probe.on_acknowledge)
+            # wait for the probes in flight
+            for _ in range(self.window):
+                slots.acquire()
+        duration = time.perf_counter() - start_time
+
+        status_counts = {status: 0 for status in DoipLogicalAddressStatus}
+        for probe in probes:
+            status_counts[probe.status] += 1
+        result = DOIP_LOGICAL_ADDRESS_SCAN_RESULT(probes=sorted((probe for probe in probes if probe.status != DoipLogicalAddressStatus.UNKNOWN_TARGET),
+                                                                key=lambda probe: probe.logical_address),
+                                                  status_counts=status_counts,
+                                                  addresses_scanned=len(probes),
+                                                  duration=duration,
+                                                  scan_rate=len(probes) / duration if duration else 0.0)
+        self.logger.info(str(result))
+        return result
+
+    def stop(self) -> None:
+        """stop an ongoing scan, e.g. from another thread
+        """
+        self._stop_event.set()
+
+    def _on_done(self, probe: _AddressProbe, probes: list[DOIP_LOGICAL_ADDRESS_PROBE], slots: threading.Semaphore, future: Future) -> None:
+        done_time = time.perf_counter()
+        ack_latency = probe.ack_time - probe.sent_time if probe.ack_time is not None else None
+        try:
+            response = future.result()
+            probes.append(DOIP_LOGICAL_ADDRESS_PROBE(logical_address=probe.logical_address,
+                                                     status=DoipLogicalAddressStatus.RESPONDED,
+                                                     uds_response=response.hex(),
+                                                     ack_latency=ack_latency,
+                                                     response_latency=done_time - probe.sent_time))
+        except DoipNegativeAcknowledgeError as ex:
+            probes.append(DOIP_LOGICAL_ADDRESS_PROBE(logical_address=probe.logical_address,
+                                                     status=DoipLogicalAddressStatus.UNKNOWN_TARGET if ex.nack_code == UNKNOWN_TARGET_ADDRESS_NACK else DoipLogicalAddressStatus.REJECTED,
+                                                     nack_code=ex.nack_code,
+                                                     ack_latency=done_time - probe.sent_time))
+        except TimeoutError:
+            probes.append(DOIP_LOGICAL_ADDRESS_PROBE(logical_address=probe.logical_address,
+                                                     status=DoipLogicalAddressStatus.ACKNOWLEDGED if ack_latency is not None else DoipLogicalAddressStatus.NO_ANSWER,
+                                                     ack_latency=ack_latency))
+        except ConnectionError as ex:
+            self.logger.error(f"DoIP connection failed while probing {hex(probe.logical_address)}: {ex}, stopping the scan")
+            self._stop_event.set()
+        finally:
+            slots.release()
@@ -1,3 +1,4 @@
+from enum import Enum
 from typing import Optional
 from pydantic import BaseModel, Field
 
@@ -71,3 +72,139 @@ class DOIP_TARGET(BaseModel):
                 f"{str(self.routing_activation_response) if self.routing_activation_response else ''}"
                 f"{str(self.entity_status_response) if self.entity_status_response else ''}"
                 )
+
+
+class DOIP_CONNECTION_POOL_STATISTICS(BaseModel):
+    """Model containing the usage statistics of a DoIP connection pool
+    """
+    hits: int = Field(description="Amount of lookups served by a pooled connection")
+    misses: int = Field(description="Amount of lookups that opened a new connection")
+    reconnects: int = Field(description="Amount of connections reopened after the pooled one failed")
+    evictions: int = Field(description="Amount of connections closed for being idle or for making room in the pool")
+    routing_activations_reused: int = Field(description="Amount of routing activations served from an already activated connection")
+    open_connections: int = Field(description="Amount of connections currently in the pool")
+
+    def __str__(self):
+        return (f"DoIP connection pool: {self.open_connections} open connections, "
+                f"hits: {self.hits}, misses: {self.misses}, reconnects: {self.reconnects}, "
+                f"evictions: {self.evictions}, routing activations reused: {self.routing_activations_reused}")
+
+
+class DOIP_CODEC_BENCHMARK_RESULT(BaseModel):
+    """Model containing the per-message cost of packing and parsing diagnostic messages
+    """
+    user_data_size: int = Field(description="Size in bytes of the UDS payload of each message")
+    iterations: int = Field(description="Amount of messages packed and parsed by each codec")
+    doipclient_pack_ns: float = Field(description="Nanoseconds per message packed by doipclient")
+    fast_pack_ns: float = Field(description="Nanoseconds per message packed by the fast codec")
+    doipclient_parse_ns: float = Field(description="Nanoseconds per message parsed by doipclient")
+    fast_parse_ns: float = Field(description="Nanoseconds per message parsed by the fast codec")
+
+    def __str__(self):
+        return (f"DoIP codec, {self.user_data_size} bytes diagnostic messages: "
+                f"pack: doipclient {self.doipclient_pack_ns:.0f}ns, fast {self.fast_pack_ns:.0f}ns, "
+                f"parse: doipclient {self.doipclient_parse_ns:.0f}ns, fast {self.fast_parse_ns:.0f}ns")
+
+
+class DOIP_DISCOVERED_ENTITY(BaseModel):
+    """Model containing a DoIP entity found by a vehicle discovery, along with the addresses it answered from
+    """
+    identification: DOIP_VEHICLE_IDENTIFICATION = Field(description="The vehicle identification response of the entity")
+    ip_addresses: list[str] = Field(description="IP addresses the entity answered from")
+    if_names: list[str] = Field(description="Interfaces the entity answered on")
+
+    def __str__(self):
+        return (f"DoIP entity at {', '.join(self.ip_addresses)} (interfaces: {', '.join(self.if_names)}):\n"
+                f"{str(self.identification)}")
+
+
+class DOIP_DISCOVERY_RESULT(BaseModel):
+    """Model containing the DoIP entities found by a vehicle discovery
+    """
+    entities: list[DOIP_DISCOVERED_ENTITY] = Field(description="The entities found, one per EID, VIN and logical address")
+    requests_sent: int = Field(description="Amount of vehicle identification requests sent")
+    responses_received: int = Field(description="Amount of vehicle identification responses and announcements received")
+    duration: float = Field(description="Duration of the discovery in seconds")
+
+    def __str__(self):
+        return (f"DoIP discovery: {len(self.entities)} entities found, {self.responses_received} responses "
+                f"to {self.requests_sent} requests in {self.duration:.3f}s\n" +
+                "".join(str(entity) for entity in self.entities))
+
+
+class DoipEntityEventType(str, Enum):
+    NEW_ENTITY = "new_entity"
+    LOGICAL_ADDRESS_CHANGED = "logical_address_changed"
+    REBOOT = "reboot"
+
+
+class DOIP_ENTITY_RECORD(BaseModel):
+    """Model containing a DoIP entity known from its vehicle announcements and identification responses
+    """
+    identification: DOIP_VEHICLE_IDENTIFICATION = Field(description="The latest vehicle announcement/identification of the entity")
+    ip_address: str = Field(description="IP address the entity was last seen from")
+    if_name: str = Field(description="Interface the entity was last seen on")
+    first_seen: float = Field(description="Time the entity was first seen, in seconds since the epoch")
+    last_seen: float = Field(description="Time the entity was last seen, in seconds since the epoch")
+    messages_received: int = Field(default=0, description="Amount of announcements and identification responses received from the entity")
+    reboots: int = Field(default=0, description="Amount of reboots detected")
+
+    def __str__(self):
+        return (f"DoIP entity {hex(self.identification.target_address)} at {self.ip_address} ({self.if_name}), "
+                f"last seen: {self.last_seen:.3f}, messages: {self.messages_received}, reboots: {self.reboots}\n")
+
+
+class DOIP_ENTITY_EVENT(BaseModel):
+    """Model containing a change of a DoIP entity, detected from its vehicle announcements
+    """
+    event_type: DoipEntityEventType = Field(description="The type of the change")
+    timestamp: float = Field(description="Time of the change, in seconds since the epoch")
+    entity: DOIP_ENTITY_RECORD = Field(description="The entity, as of the change")
+    previous_logical_address: Optional[int] = Field(default=None, description="The logical address before the change, for logical address changes")
+
+    def __str__(self):
+        previous_str = f" (was {hex(self.previous_logical_address)})" if self.previous_logical_address is not None else ""
+        return f"{self.event_type.value}{previous_str}: {str(self.entity)}"
+
+
+class DoipLogicalAddressStatus(str, Enum):
+    RESPONDED = "responded"
+    ACKNOWLEDGED = "acknowledged"
+    UNKNOWN_TARGET = "unknown_target"
+    REJECTED = "rejected"
+    NO_ANSWER = "no_answer"
+
+
+class DOIP_LOGICAL_ADDRESS_PROBE(BaseModel):
+    """Model containing the outcome of probing a target logical address with a diagnostic message
+    """
+    logical_address: int = Field(description="The target logical address")
+    status: DoipLogicalAddressStatus = Field(description="responded - UDS response received, acknowledged - diagnostic message acknowledged without a UDS response,"
+                                                         " unknown_target/rejected - diagnostic message negatively acknowledged, no_answer - neither")
+    nack_code: Optional[int] = Field(default=None, description="The diagnostic message negative acknowledge code, if rejected")
+    uds_response: Optional[str] = Field(default=None, description="The UDS response in hex, if responded")
+    ack_latency: Optional[float] = Field(default=None, description="Time in seconds from sending the probe to its (negative) acknowledge")
+    response_latency: Optional[float] = Field(default=None, description="Time in seconds from sending the probe to its UDS response")
+
+    def __str__(self):
+        details = f", NACK code: {hex(self.nack_code)}" if self.nack_code is not None else ""
+        details += f", UDS response: {self.uds_response}" if self.uds_response is not None else ""
+        details += f", ACK latency: {self.ack_latency * 1000:.1f}ms" if self.ack_latency is not None else ""
+        details += f", response latency: {self.response_latency * 1000:.1f}ms" if self.response_latency is not None else ""
+        return f"Logical address {hex(self.logical_address)}: {self.status.value}{details}\n"
+
+
+class DOIP_LOGICAL_ADDRESS_SCAN_RESULT(BaseModel):
+    """Model containing the outcome of a DoIP logical addresses scan
+    """
+    probes: list[DOIP_LOGICAL_ADDRESS_PROBE] = Field(description="The probed addresses, except those the DoIP entity reported as unknown")
+    status_counts: dict[DoipLogicalAddressStatus, int] = Field(description="Amount of probed addresses per status")
+    addresses_scanned: int = Field(description="Amount of addresses probed")
+    duration: float = Field(description="Duration of the scan in seconds")
+    scan_rate: float = Field(description="Addresses probed per second")
+
+    def __str__(self):
+        counts_str = ", ".join(f"{status.value}: {count}" for status, count in self.status_counts.items())
+        return (f"DoIP logical addresses scan: {self.addresses_scanned} addresses in {self.duration:.3f}s "
+                f"({self.scan_rate:.1f}/s), {counts_str}\n" +
+                "".join(str(probe) for probe in self.probes))
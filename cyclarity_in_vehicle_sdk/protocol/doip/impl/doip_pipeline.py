@@ -0,0 +1,296 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from types import TracebackType
+from typing import Callable, Optional
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from doipclient import messages
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import pack_diagnostic_message, pack_message
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_utils import DoipUtils, RoutingActivationResponse
+from cyclarity_in_vehicle_sdk.protocol.uds.models.uds_models import UDS_NEGATIVE_RESPONSE_SID, UDS_RESPONSE_PENDING_NRC
+
+# interval in seconds in which the receiving thread checks the requests timeouts
+RECEIVE_POLL_INTERVAL = 0.05
+
+
+class DoipNegativeAcknowledgeError(Exception):
+    """The DoIP entity rejected a diagnostic message
+    """
+    nack_code: int
+
+    def __init__(self, nack_code: int, *args, **kwargs):
+        self.nack_code = nack_code
+        super().__init__(f"Diagnostic message negative acknowledge, code: {hex(nack_code)}")
+
+
+class _PipelinedRequest():
+    __slots__ = ("payload", "target_address", "timeout", "response_pending_callback", "acknowledge_callback", "future", "deadline", "acknowledged")
+
+    def __init__(self,
+                 payload: bytes,
+                 target_address: int,
+                 timeout: float,
+                 response_pending_callback: Optional[Callable[[bytes], None]] = None,
+                 acknowledge_callback: Optional[Callable[[], None]] = None):
+        self.payload = payload
+        self.target_address = target_address
+        self.timeout = timeout
+        self.response_pending_callback = response_pending_callback
+        self.acknowledge_callback = acknowledge_callback
+        self.future: Future = Future()
+        self.deadline: Optional[float] = None
+        self.acknowledged = False
+
+
+class DoipPipeline(ParsableModel):
+    """Pipelines UDS requests over a single DoIP connection.
+    Up to `window` diagnostic messages are in flight at once, possibly to different target logical addresses,
+    while a single receiving thread matches the acknowledgements and the responses back to their requests by the
+    logical address of the responding ECU. Each request is represented by a future resolving to its final response.
+    """
+    tcp_communicator: TcpCommunicator = Field(description="TCP communicator of the DoIP connection, opened by the pipeline")
+    client_logical_address: int = Field(description="Client's logical address")
+    routing_activation_needed: bool = Field(default=True, description="Whether routing activation is performed when opening")
+    window: int = Field(default=8, gt=0, description="Maximal amount of requests in flight")
+    serialize_per_target: bool = Field(default=True, description="Whether a single request is in flight per target logical address, as UDS servers process one request at a time")
+    response_pending_timeout: float = Field(default=5.0, gt=0, description="Time in seconds to wait for the final response after a response pending (P2* server)")
+
+    _lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+    _queued: deque = PrivateAttr(default_factory=deque)
+    _in_flight: list[_PipelinedRequest] = PrivateAttr(default_factory=list)
+    _receiver: threading.Thread = None
+    # cleared by the receiving thread once it stops, requests are failed from then on
+    _receiving: bool = False
+    _stop_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+
+    def open(self) -> bool:
+        """Opens the DoIP connection, performs the routing activation and starts receiving
+
+        Returns:
+            bool: True if succeeded, False otherwise
+        """
+        if self._receiver:
+            raise RuntimeError("DoipPipeline is already open")
+
+        self.tcp_communicator.open()
+        self.tcp_communicator.connect()
+        if self.routing_activation_needed:
+            resp = DoipUtils.initiate_routing_activation_req_bound(communicator=self.tcp_communicator,
+                                                                   client_logical_address=self.client_logical_address)
+            if not resp or resp.response_code != RoutingActivationResponse.ResponseCode.Success:
+                self.logger.warning(f"Routing activation failed: {resp.response_code if resp else 'no response'}")
+                self.tcp_communicator.close()
+                return False
+
+        self._stop_event.clear()
+        self._receiving = True
+        self._receiver = threading.Thread(target=self._receive_loop, daemon=True)
+        self._receiver.start()
+        return True
+
+    def close(self) -> bool:
+        """Stops receiving, fails the requests that did not complete and closes the connection
+
+        Returns:
+            bool: True if succeeded, False otherwise
+        """
+        if self._receiver:
+            self._stop_event.set()
+            self._receiver.join()
+            self._receiver = None
+            with self._lock:
+                for request in list(self._in_flight) + list(self._queued):
+                    self._fail(request, ConnectionAbortedError("DoipPipeline was closed"))
+                self._in_flight.clear()
+                self._queued.clear()
+            self.tcp_communicator.close()
+        return True
+
+    def __enter__(self):
+        if not self.open():
+            raise RuntimeError("Failed opening DoipPipeline")
+        return self
+
+    def __exit__(self, exception_type: Optional[type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
+        self.close()
+        return False
+
+    def submit(self,
+               payload: bytes,
+               target_logical_address: int,
+               timeout: float = 2,
+               callback: Optional[Callable[[Future], None]] = None,
+               response_pending_callback: Optional[Callable[[bytes], None]] = None,
+               acknowledge_callback: Optional[Callable[[], None]] = None) -> Future:
+        """queue a UDS request, it is sent as soon as the window allows
+
+        Args:
+            payload (bytes): the UDS request payload
+            target_logical_address (int): target's logical address
+            timeout (float, optional): timeout in seconds for the response, from the time the request is sent. Defaults to 2.
+            callback (Optional[Callable[[Future], None]], optional): called with the future once it is done. Defaults to None.
+            response_pending_callback (Optional[Callable[[bytes], None]], optional): called with each response pending
+                negative response received for the request. Defaults to None.
+            acknowledge_callback (Optional[Callable[[], None]], optional): called once the DoIP entity positively
+                acknowledged the request. Defaults to None.
+
+        Returns:
+            Future: resolves to the UDS response bytes, or raises TimeoutError if no response was received,
+                DoipNegativeAcknowledgeError if the request was rejected, or ConnectionError if it could not be sent
+        """
+        if not self._receiver:
+            raise RuntimeError("DoipPipeline has not been opened")
+
+        request = _PipelinedRequest(payload=bytes(payload),
+                                    target_address=target_logical_address,
+                                    timeout=timeout,
+                                    response_pending_callback=response_pending_callback,
+                                    acknowledge_callback=acknowledge_callback)
+        if callback:
+            request.future.add_done_callback(callback)
+        with self._lock:
+            if not self._receiving:
+                self._fail(request, ConnectionError("DoIP connection receive failed"))
+                return request.future
+            self._queued.append(request)
+            self._send_queued()
+        return request.future
+
+    def request(self, payload: bytes, target_logical_address: int, timeout: float = 2) -> Optional[bytes]:
+        """send a UDS request and wait for its response
+
+        Args:
+            payload (bytes): the UDS request payload
+            target_logical_address (int): target's logical address
+            timeout (float, optional): timeout in seconds for the response. Defaults to 2.
+
+        Returns:
+            Optional[bytes]: the UDS response, None if no response was received or the request was rejected
+        """
+        future = self.submit(payload, target_logical_address, timeout)
+        try:
+            return future.result()
+        except (TimeoutError, DoipNegativeAcknowledgeError, ConnectionError) as ex:
+            self.logger.debug(f"UDS request to {hex(target_logical_address)} failed: {ex}")
+            return None
+
+    def in_flight(self) -> int:
+        """get the amount of requests sent and waiting for their response
+
+        Returns:
+            int: amount of requests in flight
+        """
+        with self._lock:
+            return len(self._in_flight)
+
+    def _send_queued(self) -> None:
+        busy_targets = {request.target_address for request in self._in_flight} if self.serialize_per_target else set()
+        for request in list(self._queued):
+            if len(self._in_flight) >= self.window:
+                return
+            if request.target_address in busy_targets:
+                continue
+            self._queued.remove(request)
+            # once running, the request can no longer be cancelled by the caller
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            data = pack_diagnostic_message(source_address=self.client_logical_address,
+                                           target_address=request.target_address,
+                                           user_data=request.payload)
+            if not self.tcp_communicator.send(data=data, timeout=request.timeout):
+                self._fail(request, ConnectionError("Failed sending the diagnostic message"))
+                continue
+            request.deadline = time.monotonic() + request.timeout
+            self._in_flight.append(request)
+            if self.serialize_per_target:
+                busy_targets.add(request.target_address)
+
+    def _receive_loop(self) -> None:
+        stream_reader = DoipUtils.get_stream_reader(self.tcp_communicator)
+        while not self._stop_event.is_set():
+            try:
+                message = stream_reader.read(timeout=RECEIVE_POLL_INTERVAL)
+                with self._lock:
+                    if message is not None:
+                        self._dispatch(message)
+                    self._expire()
+                    self._send_queued()
+            except Exception as ex:
+                self.logger.error(f"DoipPipeline failed receiving: {ex}")
+                break
+        with self._lock:
+            self._receiving = False
+            for request in list(self._in_flight) + list(self._queued):
+                self._fail(request, ConnectionError("DoIP connection receive failed"))
+            self._in_flight.clear()
+            self._queued.clear()
+
+    def _dispatch(self, message: messages.DoIPMessage) -> None:
+        if type(message) is messages.AliveCheckRequest:
+            self.tcp_communicator.send(data=pack_message(messages.AliveCheckResponse(self.client_logical_address)))
+            return
+        if type(message) not in (messages.DiagnosticMessage,
+                                 messages.DiagnosticMessagePositiveAcknowledgement,
+                                 messages.DiagnosticMessageNegativeAcknowledgement):
+            self.logger.debug(f"Ignoring DoIP message {type(message).__name__}")
+            return
+        if message.target_address != self.client_logical_address:
+            return
+
+        if type(message) is messages.DiagnosticMessage:
+            request = self._oldest_in_flight(message.source_address)
+            if request is None:
+                self.logger.debug(f"Unexpected UDS response from {hex(message.source_address)}")
+                return
+            user_data = bytes(message.user_data)
+            if len(user_data) >= 3 and user_data[0] == UDS_NEGATIVE_RESPONSE_SID and user_data[2] == UDS_RESPONSE_PENDING_NRC:
+                request.deadline = time.monotonic() + self.response_pending_timeout
+                if request.response_pending_callback:
+                    self._run_callback(request.response_pending_callback, user_data)
+                return
+            self._in_flight.remove(request)
+            if not request.future.done():
+                request.future.set_result(user_data)
+            return
+
+        request = self._oldest_in_flight(message.source_address, acknowledged=False)
+        if request is None:
+            return
+        if type(message) is messages.DiagnosticMessagePositiveAcknowledgement:
+            request.acknowledged = True
+            if request.acknowledge_callback:
+                self._run_callback(request.acknowledge_callback)
+        else:
+            self._in_flight.remove(request)
+            self._fail(request, DoipNegativeAcknowledgeError(message.nack_code))
+
+    def _oldest_in_flight(self, target_address: int, acknowledged: Optional[bool] = None) -> Optional[_PipelinedRequest]:
+        for request in self._in_flight:
+            if request.target_address == target_address and (acknowledged is None or request.acknowledged == acknowledged):
+                return request
+        return None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for request in [request for request in self._in_flight if request.deadline < now]:
+            self._in_flight.remove(request)
+            self._fail(request, TimeoutError(f"No UDS response from {hex(request.target_address)}"))
+
+    def _run_callback(self, callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception as ex:
+            self.logger.error(f"DoipPipeline callback failed: {ex}")
+
+    @staticmethod
+    def _fail(request: _PipelinedRequest, ex: Exception) -> None:
+        try:
+            request.future.set_exception(ex)
+        except InvalidStateError:
+            # a queued request may have been cancelled by the caller meanwhile
+            pass
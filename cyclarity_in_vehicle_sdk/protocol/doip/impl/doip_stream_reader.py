@@ -0,0 +1,152 @@
+import time
+from collections import deque
+from typing import Optional, Type
+
+from doipclient import messages
+
+from cyclarity_in_vehicle_sdk.communication.base.communicator_base import CommunicatorBase
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import DOIP_HEADER, unpack_message
+
+DEFAULT_MAX_QUEUED_MESSAGES = 64
+# attribute of a communicator holding the DoIP stream reader of its connection
+STREAM_READER_ATTRIBUTE = "_doip_stream_reader"
+
+
+class DoipStreamReader():
+    """Frames the DoIP messages received over a stream connection (e.g. TCP).
+    A single receive buffer is kept for the whole connection, every complete message found in it is parsed
+    and queued, thus several messages in one TCP segment are never lost, a message split across segments
+    is never re-parsed, and a read returns at once when a matching message is already queued.
+    """
+    def __init__(self, communicator: Type[CommunicatorBase], max_queued_messages: int = DEFAULT_MAX_QUEUED_MESSAGES):
+        """
+        Args:
+            communicator (Type[CommunicatorBase]): the connection to read from
+            max_queued_messages (int, optional): maximal amount of parsed messages waiting to be read,
+                the oldest messages are dropped beyond it. Defaults to DEFAULT_MAX_QUEUED_MESSAGES.
+        """
+        self.communicator = communicator
+        self.logger = communicator.logger
+        self.max_queued_messages = max_queued_messages
+        self._connection = getattr(communicator, "_socket", None)
+        self._buffer = bytearray()
+        self._messages: deque[messages.DoIPMessage] = deque()
+
+    def is_bound_to(self, communicator: Type[CommunicatorBase]) -> bool:
+        """check whether the reader belongs to the current connection of a communicator
+
+        Args:
+            communicator (Type[CommunicatorBase]): the communicator
+
+        Returns:
+            bool: False if the communicator is another one, or was reconnected since the reader was created
+        """
+        return communicator is self.communicator and getattr(communicator, "_socket", None) is self._connection
+
+    def pending(self) -> int:
+        """get the amount of parsed messages waiting to be read
+
+        Returns:
+            int: amount of queued messages
+        """
+        return len(self._messages)
+
+    def reset(self) -> None:
+        """drop the buffered bytes and the queued messages
+        """
+        self._buffer.clear()
+        self._messages.clear()
+
+    def feed(self, data: bytes) -> int:
+        """add received bytes to the buffer, and queue the messages completed by them
+
+        Args:
+            data (bytes): the received bytes
+
+        Returns:
+            int: amount of messages completed
+        """
+        self._buffer += data
+        view = memoryview(self._buffer)
+        offset = 0
+        completed = 0
+        try:
+            while len(view) - offset >= DOIP_HEADER.size:
+                protocol_version, inverse_protocol_version, payload_type, payload_length = DOIP_HEADER.unpack_from(view, offset)
+                if inverse_protocol_version != 0xFF ^ protocol_version:
+                    # there is no way to find the next header in a stream, the connection shall be closed
+                    self.logger.warning("Bad DoIP header - inverse protocol version does not match, dropping the received data")
+                    offset = len(view)
+                    break
+                end = offset + DOIP_HEADER.size + payload_length
+                if end > len(view):
+                    break
+                payload_offset = offset + DOIP_HEADER.size
+                offset = end
+                try:
+                    # the message is parsed from the buffer, only its data is copied
+                    with view[payload_offset:end] as payload:
+                        message = unpack_message(payload_type, payload)
+                except Exception as ex:
+                    self.logger.warning(f"Failed parsing DoIP message of payload type {hex(payload_type)}: {ex}")
+                    continue
+                self._queue(message)
+                completed += 1
+        finally:
+            view.release()
+        if offset:
+            del self._buffer[:offset]
+        return completed
+
+    def read(self, timeout: float, message_types: Optional[tuple[type, ...]] = None) -> Optional[messages.DoIPMessage]:
+        """read the next message, from the queue if available, receiving from the connection otherwise
+
+        Args:
+            timeout (float): timeout in seconds for receiving a message
+            message_types (Optional[tuple[type, ...]], optional): types of the messages to read, other messages remain queued
+                for later reads. A generic DoIP negative acknowledge is always read. None reads any message. Defaults to None.
+
+        Returns:
+            Optional[messages.DoIPMessage]: the message, None if no message was received in time
+        """
+        deadline = time.time() + timeout
+        while True:
+            message = self._pop(message_types)
+            if message is not None:
+                return message
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            data = self.communicator.recv(recv_timeout=remaining)
+            if not data:
+                return None
+            self.feed(data)
+
+    def _pop(self, message_types: Optional[tuple[type, ...]]) -> Optional[messages.DoIPMessage]:
+        for i, message in enumerate(self._messages):
+            if message_types is None or type(message) in message_types or type(message) is messages.GenericDoIPNegativeAcknowledge:
+                del self._messages[i]
+                return message
+        return None
+
+    def _queue(self, message: messages.DoIPMessage) -> None:
+        if len(self._messages) >= self.max_queued_messages:
+            dropped = self._messages.popleft()
+            self.logger.warning(f"DoIP receive queue is full, dropping unread {type(dropped).__name__}")
+        self._messages.append(message)
+
+
+def get_stream_reader(communicator: Type[CommunicatorBase]) -> DoipStreamReader:
+    """get the DoIP stream reader of the communicator's connection, a new reader is attached if the communicator was reconnected
+
+    Args:
+        communicator (Type[CommunicatorBase]): the communicator of the DoIP connection
+
+    Returns:
+        DoipStreamReader: the stream reader of the connection
+    """
+    stream_reader: Optional[DoipStreamReader] = getattr(communicator, STREAM_READER_ATTRIBUTE, None)
+    if stream_reader is None or not stream_reader.is_bound_to(communicator):
+        stream_reader = DoipStreamReader(communicator)
+        setattr(communicator, STREAM_READER_ATTRIBUTE, stream_reader)
+    return stream_reader
@@ -3,14 +3,15 @@ from functools import partial
 import logging
 import time
 from typing import Optional, Type, TypeAlias
-from doipclient import constants, messages, DoIPClient
-from doipclient.client import Parser
+from doipclient import constants, messages
 from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
-from pydantic import IPvAnyAddress
+from pydantic import Field, IPvAnyAddress
 
 from cyclarity_in_vehicle_sdk.communication.base.communicator_base import CommunicatorBase
 from cyclarity_in_vehicle_sdk.communication.ip.raw.raw_socket import Layer3RawSocket
-from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import pack_diagnostic_message, pack_message, unpack_frame
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_connection_pool import DoipConnectionPool
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_stream_reader import DoipStreamReader, get_stream_reader
 
 from py_pcapplusplus import IPv4Layer, IPv6Layer, PayloadLayer, Packet, TcpLayer, UdpLayer, LayerType
 
@@ -30,7 +31,7 @@ DoIPMessage: TypeAlias = messages.DoIPMessage
 
 class DoipUtils(ParsableModel):
     raw_socket: Layer3RawSocket
-    _tcp_communicators_cache: dict[str, TcpCommunicator] = {}
+    connection_pool: DoipConnectionPool = Field(default_factory=DoipConnectionPool, description="Pool of the TCP connections of the routing activation requests")
 
     def setup(self) -> bool:
         """Opens the socket for communicating with the target
@@ -42,7 +43,7 @@ class DoipUtils(ParsableModel):
             self.logger.error("Failed opening raw socket")
             return False
         
-        return True
+        return self.connection_pool.open()
 
     def teardown(self) -> bool:
         """Closes communications with the target
@@ -51,8 +52,7 @@ class DoipUtils(ParsableModel):
             bool: True if succeeded False otherwise
         """
         self.raw_socket.close()
-        for tcp_con in self._tcp_communicators_cache.values():
-            tcp_con.close()
+        self.connection_pool.close()
         return True
     
     def initiate_vehicle_identity_req(self, 
@@ -100,9 +100,7 @@ class DoipUtils(ParsableModel):
         packet.add_layer(doip_layer)
         resp_packet = self.raw_socket.send_receive_packet(packet, is_answer_cb, constants.A_PROCESSING_TIME)
         if resp_packet:
-            parser = Parser()
-            parser.reset()
-            result = parser.read_message(bytes(resp_packet.get_layer(LayerType.PayloadLayer)))
+            result = unpack_frame(bytes(resp_packet.get_layer(LayerType.PayloadLayer)))
             if type(result) is messages.VehicleIdentificationResponse:
                 return result
             elif result:
@@ -131,18 +129,26 @@ class DoipUtils(ParsableModel):
             vm_specific (int, optional): optional vm specific argument. Defaults to None.
 
         Returns:
-            Optional[RoutingActivationResponse]: RoutingActivationResponse if got a response, None otherwise
+            Optional[RoutingActivationResponse]: RoutingActivationResponse if got a response, None otherwise,
+                the response of a successful activation is reused while the pooled connection is alive
         """
-        
-        
-        _, tcp_communicator = self._get_tcp_communicator(source_address=source_address, target_address=target_address)
-
-        return self.initiate_routing_activation_req_bound(communicator=tcp_communicator,
-                                                          client_logical_address=client_logical_address,
-                                                          timeout=timeout,
-                                                          activation_type=activation_type,
-                                                          protocol_version=protocol_version,
-                                                          vm_specific=vm_specific)
+        connection = self.connection_pool.acquire(source_address=source_address,
+                                                  target_address=target_address,
+                                                  client_logical_address=client_logical_address,
+                                                  activation_type=activation_type,
+                                                  vm_specific=vm_specific)
+        response = self.connection_pool.get_routing_activation(connection)
+        if response is None:
+            response = self.initiate_routing_activation_req_bound(communicator=connection.communicator,
+                                                                  client_logical_address=client_logical_address,
+                                                                  timeout=timeout,
+                                                                  activation_type=activation_type,
+                                                                  protocol_version=protocol_version,
+                                                                  vm_specific=vm_specific)
+            if response and response.response_code == RoutingActivationResponse.ResponseCode.Success:
+                connection.routing_activation = response
+        self.connection_pool.release(connection, failed=response is None)
+        return response
     
     @staticmethod
     def initiate_routing_activation_req_bound(communicator: Type[CommunicatorBase],
@@ -173,7 +179,7 @@ class DoipUtils(ParsableModel):
         if not bytes_sent:
             communicator.close()
             return None
-        response = DoipUtils._read_doip(communicator, timeout=timeout)
+        response = DoipUtils._read_doip(communicator, timeout=timeout, message_types=(messages.RoutingActivationResponse,))
         if type(response) is messages.RoutingActivationResponse:
             return response
         return None
@@ -213,9 +219,7 @@ class DoipUtils(ParsableModel):
         packet.add_layer(doip_layer)
         resp_packet = self.raw_socket.send_receive_packet(packet, is_answer_cb, constants.A_PROCESSING_TIME)
         if resp_packet:
-            parser = Parser()
-            parser.reset()
-            result = parser.read_message(bytes(resp_packet.get_layer(LayerType.PayloadLayer)))
+            result = unpack_frame(bytes(resp_packet.get_layer(LayerType.PayloadLayer)))
             if type(result) is messages.EntityStatusResponse:
                 return result
             elif result:
@@ -244,14 +248,13 @@ class DoipUtils(ParsableModel):
         Returns:
             int: number of bytes actually sent
         """
-        message = messages.DiagnosticMessage(
-            source_address=client_logical_address,
-            target_address=target_logical_address,
-            user_data=payload
-            )
-        data = DoipUtils._pack_doip_message(message=message)
+        data = pack_diagnostic_message(source_address=client_logical_address,
+                                       target_address=target_logical_address,
+                                       user_data=payload)
         sent_bytes = communicator.send(data=data, timeout=timeout)
-        response = DoipUtils._read_doip(communicator, timeout=timeout)
+        # the response itself may arrive along with the acknowledgement, it remains queued for read_uds_response
+        response = DoipUtils._read_doip(communicator, timeout=timeout, message_types=(messages.DiagnosticMessagePositiveAcknowledgement,
+                                                                                      messages.DiagnosticMessageNegativeAcknowledgement))
         if type(response) is not messages.DiagnosticMessagePositiveAcknowledgement:
             logger.warning("Did not received DiagnosticMessagePositiveAcknowledgement")
         return sent_bytes        
@@ -267,7 +270,7 @@ class DoipUtils(ParsableModel):
         Returns:
             Optional[bytes]: UDS response in bytes if received a valid response, False otherwise
         """
-        response = DoipUtils._read_doip(communicator, timeout=timeout)
+        response = DoipUtils._read_doip(communicator, timeout=timeout, message_types=(messages.DiagnosticMessage,))
 
         if type(response) is messages.DiagnosticMessage:
             return bytes(response.user_data)
@@ -275,33 +278,8 @@ class DoipUtils(ParsableModel):
 
     @staticmethod
     def _pack_doip_message(message: messages.DoIPMessage, protocol_version: DoipProtocolVersion = DoipProtocolVersion.DoIP_13400_2012,) -> bytes:
-        payload_data = message.pack()
-        payload_type = messages.payload_message_to_type[type(message)]
-
-        return DoIPClient._pack_doip(protocol_version, payload_type, payload_data)
+        return pack_message(message, protocol_version)
     
-    def _get_tcp_communicator(self, source_address: IPvAnyAddress, target_address: IPvAnyAddress) -> tuple[bool, TcpCommunicator]:
-        """Fetch TCP communicator from cache if available and still open, create new one otherwise
-
-        Returns:
-            tuple[bool, TcpCommunicator]: True + communicator if fetched from cache, False + communicator otherwise
-        """
-        tcp_communicator = self._tcp_communicators_cache.get(f"{str(source_address)}_{str(target_address)}", None)
-
-        if tcp_communicator and tcp_communicator.is_open():
-            return (True, tcp_communicator)
-        elif tcp_communicator and not tcp_communicator.is_open():
-            tcp_communicator.close()
-        
-        tcp_communicator = TcpCommunicator(destination_ip=str(target_address),
-                            source_ip=str(source_address),
-                            dport=DOIP_PORT,
-                            sport=0)
-        tcp_communicator.open()
-        tcp_communicator.connect()
-        self._tcp_communicators_cache[f"{str(source_address)}_{str(target_address)}"] = tcp_communicator
-        return (False, tcp_communicator)
-
     @staticmethod
     def _is_answer(other: Packet, expected_source_port: int, l4_type: LayerType, expected_resp_type: Type[messages.DoIPMessage]):
         payload_layer = other.get_layer(LayerType.PayloadLayer)
@@ -318,31 +296,27 @@ class DoipUtils(ParsableModel):
             raise RuntimeError(f"Unsupported layer 4 type received: {l4_type}, expected TCP/UDP")
         
         if received_dst_port and received_dst_port == expected_source_port and payload_layer:
-            parser = Parser()
-            result = parser.read_message(bytes(payload_layer))
+            result = unpack_frame(bytes(payload_layer))
             return True if type(result) is expected_resp_type else False
         return False
 
     @staticmethod
-    def _read_doip(communicator: Type[CommunicatorBase], timeout: float = constants.A_PROCESSING_TIME) -> messages.DoIPMessage:
-        parser = Parser()
-        start_time = time.time()
-        data = bytearray()
-        response = None
-        while (time.time() - start_time) <= timeout:
-            if data:
-                response = parser.read_message(data)
-            data = bytearray()
-            if type(response) is messages.GenericDoIPNegativeAcknowledge:
-                break
-            elif response and type(response) is not messages.DoIPMessage:
-                # We got a response that might actually be interesting to the caller,
-                # so return it.
-                return response
-            else:
-                # There were no responses in the parser, so we need to read off the network
-                # and feed that to the parser until we find another DoIP message
-                data = communicator.recv(recv_timeout=timeout)
-                if len(data) == 0:
-                    break
-        return None
+    def get_stream_reader(communicator: Type[CommunicatorBase]) -> DoipStreamReader:
+        """get the DoIP stream reader of the communicator's connection, a new reader is attached if the communicator was reconnected
+
+        Args:
+            communicator (Type[CommunicatorBase]): the communicator of the DoIP connection
+
+        Returns:
+            DoipStreamReader: the stream reader of the connection
+        """
+        return get_stream_reader(communicator)
+
+    @staticmethod
+    def _read_doip(communicator: Type[CommunicatorBase],
+                   timeout: float = constants.A_PROCESSING_TIME,
+                   message_types: Optional[tuple[type, ...]] = None) -> Optional[messages.DoIPMessage]:
+        response = DoipUtils.get_stream_reader(communicator).read(timeout=timeout, message_types=message_types)
+        if type(response) is messages.GenericDoIPNegativeAcknowledge:
+            return None
+        return response
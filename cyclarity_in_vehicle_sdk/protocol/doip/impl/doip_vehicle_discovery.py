@@ -0,0 +1,158 @@
+import threading
+import time
+from functools import partial
+from ipaddress import IPv6Address, ip_address, ip_network
+from typing import Optional
+
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from doipclient import constants, messages
+from py_pcapplusplus import IPv4Layer, IPv6Layer, LayerType, Packet, PayloadLayer, UdpLayer
+from pydantic import Field, IPvAnyAddress
+
+from cyclarity_in_vehicle_sdk.communication.ip.raw.raw_socket import Layer3RawSocket
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import pack_message, unpack_frame
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_models import DOIP_DISCOVERED_ENTITY, DOIP_DISCOVERY_RESULT, DOIP_VEHICLE_IDENTIFICATION
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_utils import DOIP_PORT, DoipProtocolVersion, DoipUtils
+from cyclarity_in_vehicle_sdk.utils.custom_types.range_set import DecNumberRangeSet
+from cyclarity_in_vehicle_sdk.utils.ip.ip_utils import build_ip
+
+# all nodes link-local multicast address, the IPv6 counterpart of the broadcast
+IPV6_ALL_NODES_ADDRESS = IPv6Address("ff02::1")
+
+
+class DoipDiscoveryInterface(ParsableModel):
+    """A source interface of a DoIP vehicle discovery, and the targets to discover over it
+    """
+    raw_socket: Layer3RawSocket = Field(description="Raw socket of the interface")
+    source_address: IPvAnyAddress = Field(description="Source IP address of the requests")
+    source_port: int = Field(default=DOIP_PORT, description="Source UDP port of the requests, the responses are sent to it. Vehicle announcements are received as well on the DoIP port")
+    network_prefix: int = Field(default=24, ge=0, le=128, description="Network prefix length of the interface's subnet")
+    hosts: Optional[DecNumberRangeSet] = Field(default=None, description="Host parts within the subnet to send unicast requests to, e.g. 1-254, None for no unicast sweep")
+    targets: list[IPvAnyAddress] = Field(default_factory=list, description="Additional IP addresses to send unicast requests to")
+    broadcast: bool = Field(default=True, description="Whether a request is broadcast on the subnet (multicast to all nodes for IPv6)")
+
+    def get_target_addresses(self) -> list[IPvAnyAddress]:
+        """get the addresses the requests are sent to over the interface
+
+        Returns:
+            list[IPvAnyAddress]: the target addresses, without duplicates
+        """
+        addresses: list[IPvAnyAddress] = []
+        if self.broadcast:
+            if self.source_address.version == 4:
+                addresses.append(ip_network((self.source_address, self.network_prefix), strict=False).broadcast_address)
+            else:
+                addresses.append(IPV6_ALL_NODES_ADDRESS)
+        for host_part in self.hosts or []:
+            address = build_ip(self.source_address, self.network_prefix, host_part)
+            if address is None:
+                raise ValueError(f"Host part {host_part} is out of the /{self.network_prefix} subnet of {self.source_address}")
+            if address != self.source_address:
+                addresses.append(address)
+        addresses.extend(ip_address(target) for target in self.targets)
+        return list(dict.fromkeys(addresses))
+
+
+class DoipVehicleDiscovery(ParsableModel):
+    """Discovers the DoIP entities over several interfaces and subnets at once.
+    The vehicle identification requests to all the targets of an interface are sent back to back,
+    and the responses (and vehicle announcements) are collected in a single receive window,
+    concurrently on all the interfaces. Thus a full sweep lasts about one A_PROCESSING_TIME.
+    The entities found are deduplicated by their EID, VIN and logical address.
+    """
+    interfaces: list[DoipDiscoveryInterface] = Field(description="The interfaces to discover over")
+    response_window: float = Field(default=constants.A_PROCESSING_TIME, gt=0, description="Time in seconds to collect the responses after sending the requests")
+    protocol_version: DoipProtocolVersion = Field(default=DoipProtocolVersion.DoIP_13400_2012, description="The DoIP protocol version of the requests")
+
+    def run(self) -> DOIP_DISCOVERY_RESULT:
+        """send the vehicle identification requests and collect the responses, the raw sockets are opened if needed
+
+        Returns:
+            DOIP_DISCOVERY_RESULT: the discovered entities
+        """
+        request = pack_message(messages.VehicleIdentificationRequest(), self.protocol_version)
+        answers: list[tuple[DoipDiscoveryInterface, list[Packet]]] = []
+        requests_sent = 0
+        opened_sockets: list[Layer3RawSocket] = []
+        threads: list[threading.Thread] = []
+
+        def discover(interface: DoipDiscoveryInterface, packets: list[Packet]):
+            is_answer_cb = partial(DoipUtils._is_answer,
+                                   expected_source_port=interface.source_port,
+                                   l4_type=LayerType.UdpLayer,
+                                   expected_resp_type=messages.VehicleIdentificationResponse)
+            try:
+                answers.append((interface, interface.raw_socket.send_receive_packets(packets, is_answer_cb, self.response_window)))
+            except Exception as ex:
+                self.logger.error(f"DoIP discovery over {interface.raw_socket.if_name} failed: {ex}")
+
+        start_time = time.perf_counter()
+        # the layers are referenced as long as their packets, and released after them
+        packets: list[list[Packet]] = []
+        layers = []
+        for interface in self.interfaces:
+            if not interface.raw_socket.is_open():
+                if not interface.raw_socket.open():
+                    self.logger.error(f"Failed opening raw socket of {interface.raw_socket.if_name}")
+                    continue
+                opened_sockets.append(interface.raw_socket)
+            packets.append([self._build_packet(interface, target_address, request, layers)
+                            for target_address in interface.get_target_addresses()])
+            requests_sent += len(packets[-1])
+            thread = threading.Thread(target=discover, args=(interface, packets[-1]), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start_time
+        packets.clear()
+        layers.clear()
+        for raw_socket in opened_sockets:
+            raw_socket.close()
+
+        entities: dict[tuple[str, str, int], DOIP_DISCOVERED_ENTITY] = {}
+        responses_received = 0
+        for interface, interface_answers in answers:
+            for packet in interface_answers:
+                response = unpack_frame(bytes(packet.get_layer(LayerType.PayloadLayer)))
+                if type(response) is not messages.VehicleIdentificationResponse:
+                    continue
+                responses_received += 1
+                ip_layer = packet.get_layer(LayerType.IPv4Layer) or packet.get_layer(LayerType.IPv6Layer)
+                key = (response.eid.hex(), response.vin, response.logical_address)
+                entity = entities.get(key)
+                if entity is None:
+                    entity = DOIP_DISCOVERED_ENTITY(identification=DOIP_VEHICLE_IDENTIFICATION(vin=response.vin,
+                                                                                               target_address=response.logical_address,
+                                                                                               eid=response.eid.hex(),
+                                                                                               gid=response.gid.hex(),
+                                                                                               further_action_required=response.further_action_required,
+                                                                                               vin_gid_sync_status=response.vin_sync_status),
+                                                    ip_addresses=[],
+                                                    if_names=[])
+                    entities[key] = entity
+                if ip_layer and str(ip_layer.src_ip) not in entity.ip_addresses:
+                    entity.ip_addresses.append(str(ip_layer.src_ip))
+                if interface.raw_socket.if_name not in entity.if_names:
+                    entity.if_names.append(interface.raw_socket.if_name)
+
+        result = DOIP_DISCOVERY_RESULT(entities=list(entities.values()),
+                                       requests_sent=requests_sent,
+                                       responses_received=responses_received,
+                                       duration=duration)
+        self.logger.info(str(result))
+        return result
+
+    @staticmethod
+    def _build_packet(interface: DoipDiscoveryInterface, target_address: IPvAnyAddress, request: bytes, layers: list) -> Packet:
+        packet = Packet()
+        if interface.source_address.version == 4:
+            ip_layer = IPv4Layer(src_addr=str(interface.source_address), dst_addr=str(target_address))
+        else:
+            ip_layer = IPv6Layer(src_addr=str(interface.source_address), dst_addr=str(target_address))
+        udp_layer = UdpLayer(src_port=interface.source_port, dst_port=DOIP_PORT)
+        doip_layer = PayloadLayer(request)
+        for layer in (ip_layer, udp_layer, doip_layer):
+            packet.add_layer(layer)
+            layers.append(layer)
+        return packet
@@ -0,0 +1,201 @@
+import errno
+import threading
+import time
+from typing import Iterator, Optional
+
+from can import CanOperationError
+from cyclarity_sdk.expert_builder.runnable.runnable import ParsableModel
+from pydantic import Field, PrivateAttr
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import Address, AddressingMode
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import CAN_ID_MAX_NORMAL_11_BITS
+from cyclarity_in_vehicle_sdk.protocol.isotp.impl.isotp_utils import CAN_CLASSIC_MAX_DATA_LENGTH, PREFIXED_ADDRESSING_MODES, is_likely_response_id
+from cyclarity_in_vehicle_sdk.protocol.isotp.models.isotp_models import ISOTP_PAIR
+from cyclarity_in_vehicle_sdk.protocol.uds.models.uds_models import UDS_NEGATIVE_RESPONSE_SID, UDS_POSITIVE_RESPONSE_OFFSET, UdsSid
+from cyclarity_in_vehicle_sdk.utils.custom_types.range_set import HexNumberRangeSet
+
+NORMAL_ADDRESSING_MODES = (AddressingMode.Normal_11bits, AddressingMode.Normal_29bits)
+ADDRESSING_MODES_29_BITS = (AddressingMode.Normal_29bits, AddressingMode.Extended_29bits, AddressingMode.Mixed_29bits)
+
+TESTER_PRESENT_PROBE = bytes([UdsSid.TesterPresent, 0x00])
+
+# (arbitration ID, address extension byte) of a probe or a response
+_AddressKey = tuple[int, Optional[int]]
+
+
+class IsoTpAddressScanner(ParsableModel):
+    """Discovers the ISO-TP addresses of diagnostic ECUs on a CAN bus.
+    UDS tester present probes are sent back to back for a batch of candidate addresses, while all the
+    responses are collected by a single receive loop. The responders of a batch are then correlated
+    to their probes, by probing the likely pair first and bisecting the batch otherwise.
+    """
+    can_communicator: CanCommunicatorSocketCan = Field(description="CAN Communicator, opened by the scanner")
+    addressing_mode: AddressingMode = Field(default=AddressingMode.Normal_11bits, description="ISO-TP addressing mode of the probes: normal, extended or mixed")
+    candidate_ids: HexNumberRangeSet = Field(description="CAN IDs to send the probes on")
+    address_extensions: HexNumberRangeSet = Field(default=HexNumberRangeSet("00-FF"), description="Target addresses / address extensions to probe with on each CAN ID, for extended and mixed addressing")
+    response_ids: Optional[HexNumberRangeSet] = Field(default=None, description="CAN IDs to accept responses on, None means any CAN ID")
+    padding_byte: Optional[int] = Field(default=None, ge=0, le=0xFF, description="Optional byte to pad the probes to 8 bytes with, defaults to None meaning no padding")
+    batch_size: int = Field(default=64, gt=0, description="Amount of probes sent back to back before waiting for the responses")
+    response_timeout: float = Field(default=0.05, gt=0, description="Time in seconds to wait for responses after the last probe of a batch")
+
+    _stop_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+    _response_ids: Optional[set[int]] = None
+
+    def model_post_init(self, *args, **kwargs):
+        super().model_post_init(*args, **kwargs)
+        if self.addressing_mode not in NORMAL_ADDRESSING_MODES + PREFIXED_ADDRESSING_MODES:
+            raise ValueError(f"Unsupported addressing mode for scanning: {self.addressing_mode.name}")
+
+    def scan(self) -> list[ISOTP_PAIR]:
+        """scan the candidate addresses
+
+        Returns:
+            list[ISOTP_PAIR]: the responding ISO-TP pairs
+        """
+        self._stop_event.clear()
+        self._response_ids = set(self.response_ids) if self.response_ids is not None else None
+        found: dict[_AddressKey, ISOTP_PAIR] = {}
+        with self.can_communicator:
+            for batch in self._iter_batches():
+                if self._stop_event.is_set():
+                    break
+                for response_key in self._probe(batch):
+                    probe_key = self._correlate(batch, response_key)
+                    if probe_key is None:
+                        self.logger.debug(f"Could not correlate the response on {hex(response_key[0])} to a probe")
+                        continue
+                    found[probe_key] = ISOTP_PAIR(rxid=response_key[0],
+                                                  txid=probe_key[0],
+                                                  support_uds=True,
+                                                  addressing_mode=self.addressing_mode,
+                                                  tx_address_extension=probe_key[1],
+                                                  rx_address_extension=response_key[1])
+                    self.logger.info(f"Found ISO-TP pair: {found[probe_key]}")
+        return list(found.values())
+
+    def stop(self) -> None:
+        """stop an ongoing scan, e.g. from another thread
+        """
+        self._stop_event.set()
+
+    def get_address(self, pair: ISOTP_PAIR) -> Address:
+        """get the ISO-TP address of a discovered pair, e.g. for `IsoTpCommunicator.set_address`
+
+        Args:
+            pair (ISOTP_PAIR): a pair found by the scan
+
+        Returns:
+            Address: the address to communicate with the pair
+        """
+        if pair.addressing_mode in NORMAL_ADDRESSING_MODES:
+            return Address(addressing_mode=pair.addressing_mode, rxid=pair.rxid, txid=pair.txid)
+        if pair.addressing_mode in (AddressingMode.Extended_11bits, AddressingMode.Extended_29bits):
+            return Address(addressing_mode=pair.addressing_mode, rxid=pair.rxid, txid=pair.txid,
+                           target_address=pair.tx_address_extension, source_address=pair.rx_address_extension)
+        if pair.addressing_mode == AddressingMode.Mixed_11bits:
+            return Address(addressing_mode=pair.addressing_mode, rxid=pair.rxid, txid=pair.txid,
+                           address_extension=pair.tx_address_extension)
+        # mixed 29 bits IDs are made of the target and source addresses
+        return Address(addressing_mode=pair.addressing_mode, target_address=(pair.txid >> 8) & 0xFF,
+                       source_address=pair.txid & 0xFF, address_extension=pair.tx_address_extension)
+
+    def _iter_batches(self) -> Iterator[list[_AddressKey]]:
+        address_extensions = list(self.address_extensions) if self.addressing_mode in PREFIXED_ADDRESSING_MODES else [None]
+        batch: list[_AddressKey] = []
+        for canid in self.candidate_ids:
+            for address_extension in address_extensions:
+                batch.append((canid, address_extension))
+                if len(batch) == self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _probe(self, probe_keys: list[_AddressKey]) -> set[_AddressKey]:
+        """send probes back to back and collect the responses until the response timeout after the last probe
+
+        Returns:
+            set[_AddressKey]: the addresses that responded
+        """
+        # drop any stale responses of previous probes
+        self._collect(timeout=0)
+        for canid, address_extension in probe_keys:
+            self._send_probe(canid, address_extension)
+        return self._collect(timeout=self.response_timeout)
+
+    def _collect(self, timeout: float) -> set[_AddressKey]:
+        responders: set[_AddressKey] = set()
+        deadline = time.time() + timeout
+        while True:
+            for msg in self.can_communicator.receive_batch(timeout=max(0.0, deadline - time.time())):
+                response_key = self._parse_response(msg)
+                if response_key:
+                    responders.add(response_key)
+            if time.time() >= deadline:
+                return responders
+
+    def _correlate(self, probe_keys: list[_AddressKey], response_key: _AddressKey) -> Optional[_AddressKey]:
+        for probe_key in probe_keys:
+            if self._is_likely_pair(probe_key, response_key) and response_key in self._probe([probe_key]):
+                return probe_key
+
+        candidates = probe_keys
+        while len(candidates) > 1:
+            half = candidates[:len(candidates) // 2]
+            candidates = half if response_key in self._probe(half) else candidates[len(candidates) // 2:]
+        # the last candidate was not probed on its own when the responses came from the second halves
+        if candidates and response_key in self._probe(candidates):
+            return candidates[0]
+        return None
+
+    def _is_likely_pair(self, probe_key: _AddressKey, response_key: _AddressKey) -> bool:
+        return is_likely_response_id(probe_key[0], response_key[0])
+
+    def _send_probe(self, canid: int, address_extension: Optional[int]) -> None:
+        data = (bytes([address_extension]) if address_extension is not None else b"") + bytes([len(TESTER_PRESENT_PROBE)]) + TESTER_PRESENT_PROBE
+        if self.padding_byte is not None:
+            data = data.ljust(CAN_CLASSIC_MAX_DATA_LENGTH, bytes([self.padding_byte]))
+        msg = CanMessage(arbitration_id=canid,
+                         data=data,
+                         is_extended_id=self.addressing_mode in ADDRESSING_MODES_29_BITS or canid > CAN_ID_MAX_NORMAL_11_BITS)
+        deadline = time.time() + self.response_timeout
+        while True:
+            try:
+                self.can_communicator.send(msg)
+                return
+            except CanOperationError as ex:
+                # the interface TX queue is full, wait for it to drain
+                if ex.error_code != errno.ENOBUFS or time.time() >= deadline:
+                    raise
+                time.sleep(0.001)
+
+    def _parse_response(self, msg: CanMessage) -> Optional[_AddressKey]:
+        """check whether a CAN message is a single frame response to a tester present probe
+
+        Returns:
+            Optional[_AddressKey]: the address of the responder, None if the message is not a response
+        """
+        if msg.is_error_frame or msg.is_remote_frame:
+            return None
+        if self._response_ids is not None and msg.arbitration_id not in self._response_ids:
+            return None
+        data = bytes(msg.data)
+        prefix_size = 1 if self.addressing_mode in PREFIXED_ADDRESSING_MODES else 0
+        if len(data) < prefix_size + 3:
+            return None
+        pci = data[prefix_size]
+        if pci >> 4 != 0:
+            return None
+        length = pci & 0x0F
+        payload_start = prefix_size + 1
+        if length == 0:
+            # CAN-FD single frame escape sequence
+            length = data[payload_start]
+            payload_start += 1
+        payload = data[payload_start:payload_start + length]
+        if payload[:2] == bytes([UdsSid.TesterPresent + UDS_POSITIVE_RESPONSE_OFFSET, 0x00]) \
+                or payload[:2] == bytes([UDS_NEGATIVE_RESPONSE_SID, UdsSid.TesterPresent]):
+            return msg.arbitration_id, data[0] if prefix_size else None
+        return None
@@ -0,0 +1,287 @@
+import threading
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanCommunicatorBase, CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_capture_buffer import FLAG_ERROR_FRAME, FLAG_EXTENDED_ID, FLAG_FD, FLAG_REMOTE_FRAME, CanCaptureBuffer
+from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import AddressingMode
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import ISOTP_MAX_12_BITS_LENGTH
+from cyclarity_in_vehicle_sdk.protocol.isotp.impl.isotp_utils import CAN_CLASSIC_MAX_DATA_LENGTH, PREFIXED_ADDRESSING_MODES
+from cyclarity_in_vehicle_sdk.protocol.isotp.models.isotp_models import ISOTP_REASSEMBLY_STATISTICS, ISOTP_TRANSFER
+
+PCI_SINGLE_FRAME = 0x0
+PCI_FIRST_FRAME = 0x1
+PCI_CONSECUTIVE_FRAME = 0x2
+PCI_FLOW_CONTROL = 0x3
+# N_Cr of ISO 15765-2, maximal time between consecutive frames of a transfer
+DEFAULT_CONSECUTIVE_FRAME_TIMEOUT = 1.0
+# the payload buffer of a transfer is allocated by its first frame length, which is bounded to limit the memory used
+DEFAULT_MAX_TRANSFER_SIZE = 0x100000
+
+TransferListener = Callable[[Sequence[ISOTP_TRANSFER]], None]
+# (arbitration ID, address extension byte) of a transfer
+_SessionKey = tuple[int, Optional[int]]
+
+
+class _Session():
+    """State of a multi frame transfer in progress, the payload buffer is allocated once by the first frame length
+    """
+    __slots__ = ("payload", "received", "next_sequence_number", "start_timestamp", "last_timestamp", "frames_count", "is_extended_id", "is_fd")
+
+    def __init__(self, length: int, timestamp: float, is_extended_id: bool, is_fd: bool):
+        self.payload = bytearray(length)
+        self.received = 0
+        self.next_sequence_number = 1
+        self.start_timestamp = timestamp
+        self.last_timestamp = timestamp
+        self.frames_count = 1
+        self.is_extended_id = is_extended_id
+        self.is_fd = is_fd
+
+    def write(self, data: bytes) -> None:
+        chunk = data[:len(self.payload) - self.received]
+        self.payload[self.received:self.received + len(chunk)] = chunk
+        self.received += len(chunk)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.received >= len(self.payload)
+
+
+class IsoTpReassembler():
+    """Passive reassembly of the ISO-TP transfers of all the addresses on a CAN bus at once.
+    Frames are consumed in reception order, single frames are emitted at once, and for multi frame
+    transfers only a small state per address in progress is kept (the expected sequence number and
+    the payload buffer). Both the 12 bits and the 32 bits (escape sequence) first frame lengths, and
+    the CAN-FD single frames are supported. Flow control frames are counted but not required,
+    thus a capture of a single direction is reassembled as well. First frames announcing more than
+    `max_transfer_size` bytes are ignored.
+    """
+    def __init__(self,
+                 addressing_mode: AddressingMode = AddressingMode.Normal_11bits,
+                 arbitration_ids: Optional[set[int]] = None,
+                 consecutive_frame_timeout: float = DEFAULT_CONSECUTIVE_FRAME_TIMEOUT,
+                 max_transfer_size: int = DEFAULT_MAX_TRANSFER_SIZE):
+        """
+        Args:
+            addressing_mode (AddressingMode, optional): addressing mode of the traffic, extended and mixed addressing
+                frames are prefixed by an address byte. Defaults to AddressingMode.Normal_11bits.
+            arbitration_ids (Optional[set[int]], optional): arbitration IDs to reassemble, None for all IDs. Defaults to None.
+            consecutive_frame_timeout (float, optional): maximal time in seconds between the frames of a transfer.
+                Defaults to DEFAULT_CONSECUTIVE_FRAME_TIMEOUT.
+            max_transfer_size (int, optional): maximal payload length of a multi frame transfer. Defaults to DEFAULT_MAX_TRANSFER_SIZE.
+        """
+        self.addressing_mode = addressing_mode
+        self.arbitration_ids = arbitration_ids
+        self.consecutive_frame_timeout = consecutive_frame_timeout
+        self.max_transfer_size = max_transfer_size
+        self._prefix_size = 1 if addressing_mode in PREFIXED_ADDRESSING_MODES else 0
+        self._sessions: dict[_SessionKey, _Session] = {}
+        self._statistics = ISOTP_REASSEMBLY_STATISTICS()
+        self._lock = threading.Lock()
+        self._listeners: list[TransferListener] = []
+        self._attached: list[CanCommunicatorBase] = []
+
+    def attach(self, communicator: CanCommunicatorBase) -> None:
+        """reassemble every CAN message received by the communicator, the transfers are passed to the transfer listeners
+
+        Args:
+            communicator (CanCommunicatorBase): the communicator to attach to
+        """
+        communicator.add_rx_listener(self.feed)
+        self._attached.append(communicator)
+
+    def detach(self) -> None:
+        """stop reassembling the messages of the attached communicators
+        """
+        for communicator in self._attached:
+            communicator.remove_rx_listener(self.feed)
+        self._attached.clear()
+
+    def add_transfer_listener(self, listener: TransferListener) -> None:
+        """adds a callback to be called with the transfers reassembled by each feed
+
+        Args:
+            listener (TransferListener): callback receiving a sequence of ISOTP_TRANSFER
+        """
+        self._listeners.append(listener)
+
+    def remove_transfer_listener(self, listener: TransferListener) -> None:
+        """removes a callback added with `add_transfer_listener`
+
+        Args:
+            listener (TransferListener): the callback to remove
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def feed(self, msgs: Sequence[CanMessage]) -> list[ISOTP_TRANSFER]:
+        """reassemble a batch of CAN messages
+
+        Args:
+            msgs (Sequence[CanMessage]): the captured CAN messages, in reception order
+
+        Returns:
+            list[ISOTP_TRANSFER]: the transfers completed by the batch
+        """
+        transfers: list[ISOTP_TRANSFER] = []
+        with self._lock:
+            for msg in msgs:
+                if msg.is_error_frame or msg.is_remote_frame:
+                    continue
+                self._process_frame(msg.arbitration_id, bytes(msg.data), msg.timestamp, msg.is_extended_id, msg.is_fd, transfers)
+        self._notify(transfers)
+        return transfers
+
+    def feed_capture(self, capture_buffer: CanCaptureBuffer, rows: Optional[np.ndarray] = None) -> list[ISOTP_TRANSFER]:
+        """reassemble the frames of a columnar capture, without converting them back into CAN messages
+
+        Args:
+            capture_buffer (CanCaptureBuffer): the capture buffer
+            rows (Optional[np.ndarray], optional): row offsets as returned by `CanCaptureBuffer.select`,
+                in capture order, None for all rows. Defaults to None.
+
+        Returns:
+            list[ISOTP_TRANSFER]: the transfers completed by the frames
+        """
+        if rows is None:
+            rows = np.arange(len(capture_buffer))
+        transfers: list[ISOTP_TRANSFER] = []
+        with self._lock:
+            for canid, timestamp, flags, payload in zip(capture_buffer.arbitration_id[rows].tolist(),
+                                                        capture_buffer.timestamp[rows].tolist(),
+                                                        capture_buffer.flags[rows].tolist(),
+                                                        capture_buffer.get_payloads(rows)):
+                if flags & (FLAG_ERROR_FRAME | FLAG_REMOTE_FRAME):
+                    continue
+                self._process_frame(canid, payload, timestamp, bool(flags & FLAG_EXTENDED_ID), bool(flags & FLAG_FD), transfers)
+        self._notify(transfers)
+        return transfers
+
+    def expire(self, now: float) -> int:
+        """abort the transfers that have not received a frame within the consecutive frame timeout
+
+        Args:
+            now (float): the current time, in the clock of the CAN messages timestamps
+
+        Returns:
+            int: amount of transfers aborted
+        """
+        with self._lock:
+            expired = [key for key, session in self._sessions.items() if now - session.last_timestamp > self.consecutive_frame_timeout]
+            for key in expired:
+                del self._sessions[key]
+            self._statistics.timed_out_transfers += len(expired)
+            return len(expired)
+
+    def reset(self) -> None:
+        """drop all the transfers in progress and clear the statistics
+        """
+        with self._lock:
+            self._sessions.clear()
+            self._statistics = ISOTP_REASSEMBLY_STATISTICS()
+
+    def get_statistics(self) -> ISOTP_REASSEMBLY_STATISTICS:
+        """get the counters of the reassembly
+
+        Returns:
+            ISOTP_REASSEMBLY_STATISTICS: the reassembly counters
+        """
+        with self._lock:
+            return self._statistics.model_copy(update={"active_sessions": len(self._sessions)})
+
+    def _notify(self, transfers: list[ISOTP_TRANSFER]) -> None:
+        if transfers:
+            for listener in list(self._listeners):
+                listener(transfers)
+
+    def _process_frame(self, canid: int, data: bytes, timestamp: float, is_extended_id: bool, is_fd: bool, transfers: list[ISOTP_TRANSFER]) -> None:
+        if self.arbitration_ids is not None and canid not in self.arbitration_ids:
+            return
+        prefix_size = self._prefix_size
+        if len(data) <= prefix_size:
+            self._statistics.invalid_frames += 1
+            return
+        key = (canid, data[0] if prefix_size else None)
+        pci = data[prefix_size]
+        pci_type = pci >> 4
+
+        if pci_type == PCI_CONSECUTIVE_FRAME:
+            session = self._sessions.get(key)
+            if session is None:
+                self._statistics.unexpected_frames += 1
+                return
+            if timestamp - session.last_timestamp > self.consecutive_frame_timeout:
+                del self._sessions[key]
+                self._statistics.timed_out_transfers += 1
+                self._statistics.unexpected_frames += 1
+                return
+            if pci & 0x0F != session.next_sequence_number:
+                del self._sessions[key]
+                self._statistics.sequence_errors += 1
+                return
+            session.write(data[prefix_size + 1:])
+            session.next_sequence_number = (session.next_sequence_number + 1) & 0x0F
+            session.last_timestamp = timestamp
+            session.frames_count += 1
+            if session.is_complete:
+                del self._sessions[key]
+                self._emit(key, bytes(session.payload), session.start_timestamp, timestamp, session.frames_count,
+                           session.is_extended_id, session.is_fd, transfers)
+            return
+
+        if pci_type == PCI_FLOW_CONTROL:
+            self._statistics.flow_control_frames += 1
+            return
+
+        if pci_type == PCI_SINGLE_FRAME:
+            length = pci & 0x0F
+            payload_start = prefix_size + 1
+            if length == 0 and len(data) > CAN_CLASSIC_MAX_DATA_LENGTH and len(data) > payload_start:
+                # CAN-FD single frame escape sequence
+                length = data[payload_start]
+                payload_start += 1
+            if length == 0 or payload_start + length > len(data):
+                self._statistics.invalid_frames += 1
+                return
+            self._abort_session(key)
+            self._emit(key, data[payload_start:payload_start + length], timestamp, timestamp, 1, is_extended_id, is_fd, transfers)
+            return
+
+        if pci_type == PCI_FIRST_FRAME and len(data) > prefix_size + 1:
+            length = ((pci & 0x0F) << 8) | data[prefix_size + 1]
+            payload_start = prefix_size + 2
+            if length == 0 and len(data) >= payload_start + 4:
+                # 32 bits first frame data length escape sequence, only valid for lengths beyond 12 bits
+                length = int.from_bytes(data[payload_start:payload_start + 4], "big")
+                payload_start += 4
+                if length <= ISOTP_MAX_12_BITS_LENGTH:
+                    length = 0
+            if length > self.max_transfer_size:
+                self._statistics.oversized_transfers += 1
+                return
+            if length > 0:
+                self._abort_session(key)
+                session = _Session(length, timestamp, is_extended_id, is_fd)
+                session.write(data[payload_start:])
+                self._sessions[key] = session
+                return
+
+        self._statistics.invalid_frames += 1
+
+    def _abort_session(self, key: _SessionKey) -> None:
+        if self._sessions.pop(key, None) is not None:
+            self._statistics.interrupted_transfers += 1
+
+    def _emit(self, key: _SessionKey, payload: bytes, start_timestamp: float, end_timestamp: float, frames_count: int,
+              is_extended_id: bool, is_fd: bool, transfers: list[ISOTP_TRANSFER]) -> None:
+        self._statistics.transfers += 1
+        transfers.append(ISOTP_TRANSFER(arbitration_id=key[0],
+                                        address_extension=key[1],
+                                        is_extended_id=is_extended_id,
+                                        is_fd=is_fd,
+                                        data=payload,
+                                        start_timestamp=start_timestamp,
+                                        end_timestamp=end_timestamp,
+                                        frames_count=frames_count))
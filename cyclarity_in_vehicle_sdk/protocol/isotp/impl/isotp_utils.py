@@ -0,0 +1,25 @@
+from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import AddressingMode
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import CAN_ID_MAX_NORMAL_11_BITS
+
+# addressing modes in which the frames are prefixed by a target address / address extension byte
+PREFIXED_ADDRESSING_MODES = (AddressingMode.Extended_11bits, AddressingMode.Extended_29bits,
+                             AddressingMode.Mixed_11bits, AddressingMode.Mixed_29bits)
+CAN_CLASSIC_MAX_DATA_LENGTH = 8
+# responses to the ISO 15765-4 legislated 11 bits IDs are sent on the request ID + 8
+NORMAL_11_BITS_RESPONSE_OFFSET = 8
+
+
+def is_likely_response_id(txid: int, rxid: int) -> bool:
+    """check whether a CAN ID follows the common convention for the responses to requests on another CAN ID
+
+    Args:
+        txid (int): the CAN ID of the requests
+        rxid (int): the CAN ID of the responses
+
+    Returns:
+        bool: True if rxid is the conventional response ID of txid
+    """
+    if txid <= CAN_ID_MAX_NORMAL_11_BITS:
+        return rxid == txid + NORMAL_11_BITS_RESPONSE_OFFSET
+    # 29 bits IDs of the form 0x18XX<target><source> are responded with the addresses swapped
+    return rxid == (txid & 0xFFFF0000) | ((txid & 0xFF) << 8) | ((txid >> 8) & 0xFF)
@@ -1,9 +1,53 @@
 from pydantic import Field, BaseModel
 from typing import Optional
+from isotp import AddressingMode
+
+from cyclarity_in_vehicle_sdk.utils.custom_types.hexbytes import HexBytes
 
 class ISOTP_PAIR(BaseModel):
     rxid: int
     txid: int
     support_uds: bool
+    addressing_mode: AddressingMode = Field(default=AddressingMode.Normal_11bits, description="The addressing mode the pair responded in")
+    tx_address_extension: Optional[int] = Field(default=None, description="The target address / address extension byte sent, for extended and mixed addressing")
+    rx_address_extension: Optional[int] = Field(default=None, description="The address byte of the responses, for extended and mixed addressing")
+    def __str__(self):
+        address_extension_str = f", tx address: {hex(self.tx_address_extension)}, rx address: {hex(self.rx_address_extension)}" if self.tx_address_extension is not None else str()
+        return f"[rxid: {hex(self.rxid)}, txid: {hex(self.txid)}{address_extension_str}]" + (" UDS supported" if self.support_uds else str())
+
+
+class ISOTP_TRANSFER(BaseModel):
+    """Model containing an ISO-TP payload reassembled from captured CAN frames
+    """
+    arbitration_id: int = Field(description="The arbitration ID the payload was sent on")
+    address_extension: Optional[int] = Field(default=None, description="The address byte of the frames, for extended and mixed addressing")
+    is_extended_id: bool = Field(default=False, description="Whether the frames had a 29 bits ID")
+    is_fd: bool = Field(default=False, description="Whether the frames were CAN-FD frames")
+    data: HexBytes = Field(description="The reassembled payload")
+    start_timestamp: float = Field(description="Timestamp of the single frame or first frame")
+    end_timestamp: float = Field(description="Timestamp of the last frame")
+    frames_count: int = Field(description="Amount of frames the payload was sent in, flow control frames excluded")
+
+    def __str__(self):
+        address_extension_str = f"/{hex(self.address_extension)}" if self.address_extension is not None else str()
+        return (f"{self.start_timestamp:.6f} {hex(self.arbitration_id)}{address_extension_str}: {self.data.hex()} "
+                f"({len(self.data)} bytes, {self.frames_count} frames, {(self.end_timestamp - self.start_timestamp) * 1000:.3f}ms)")
+
+
+class ISOTP_REASSEMBLY_STATISTICS(BaseModel):
+    """Model containing the counters of a passive ISO-TP reassembler
+    """
+    transfers: int = Field(default=0, description="Amount of payloads reassembled")
+    flow_control_frames: int = Field(default=0, description="Amount of flow control frames seen")
+    sequence_errors: int = Field(default=0, description="Amount of transfers aborted by an unexpected consecutive frame sequence number")
+    interrupted_transfers: int = Field(default=0, description="Amount of transfers aborted by a new single frame or first frame on the same address")
+    timed_out_transfers: int = Field(default=0, description="Amount of transfers aborted by a timeout between frames")
+    unexpected_frames: int = Field(default=0, description="Amount of consecutive frames without a transfer in progress")
+    invalid_frames: int = Field(default=0, description="Amount of frames that are not valid ISO-TP frames")
+    oversized_transfers: int = Field(default=0, description="Amount of first frames ignored for announcing more than the maximal transfer size")
+    active_sessions: int = Field(default=0, description="Amount of transfers in progress")
+
     def __str__(self):
-        return f"[rxid: {hex(self.rxid)}, txid: {hex(self.txid)}]" + (" UDS supported" if self.support_uds else str())
+        return (f"transfers: {self.transfers}, in progress: {self.active_sessions}, flow control frames: {self.flow_control_frames}, "
+                f"errors: sequence {self.sequence_errors}, interrupted {self.interrupted_transfers}, timed out {self.timed_out_transfers}, "
+                f"unexpected {self.unexpected_frames}, invalid {self.invalid_frames}, oversized {self.oversized_transfers}")
@@ -0,0 +1,204 @@
+import threading
+from typing import Callable, Optional, Sequence
+
+from cyclarity_in_vehicle_sdk.protocol.isotp.impl.isotp_reassembler import IsoTpReassembler
+from cyclarity_in_vehicle_sdk.protocol.isotp.impl.isotp_utils import is_likely_response_id
+from cyclarity_in_vehicle_sdk.protocol.isotp.models.isotp_models import ISOTP_PAIR, ISOTP_TRANSFER
+from cyclarity_in_vehicle_sdk.protocol.uds.base.uds_utils_base import RawUdsResponse, UdsResponseCode
+from cyclarity_in_vehicle_sdk.protocol.uds.models.uds_models import UDS_NEGATIVE_RESPONSE_SID, UDS_POSITIVE_RESPONSE_OFFSET, UDS_TRANSACTION, UdsSid
+
+# P2*server_max of ISO 14229-2, the maximal time for a response after a response pending
+DEFAULT_REQUEST_TIMEOUT = 5.0
+# OBD / UDS functional addressing request IDs, answered by any amount of ECUs
+DEFAULT_FUNCTIONAL_IDS = frozenset({0x7DF, 0x18DB33F1})
+
+TransactionListener = Callable[[Sequence[UDS_TRANSACTION]], None]
+
+_UDS_REQUEST_SIDS = frozenset(sid.value for sid in UdsSid)
+
+
+class _PendingRequest():
+    __slots__ = ("transfer", "sid", "pending_responses", "responded", "last_timestamp")
+
+    def __init__(self, transfer: ISOTP_TRANSFER):
+        self.transfer = transfer
+        self.sid = transfer.data[0]
+        self.pending_responses = 0
+        self.responded = False
+        # a response pending restarts the request timeout
+        self.last_timestamp = transfer.end_timestamp
+
+
+class UdsTransactionDecoder():
+    """Decodes reassembled ISO-TP payloads into a log of UDS transactions (a request and its final response).
+    Responses are matched to the oldest pending request of the same service sent on the paired CAN ID,
+    the pairs are either given or derived from the common conventions (response ID = request ID + 8 for 11 bits IDs,
+    swapped target and source addresses for 29 bits IDs), falling back to any pending request of the same service.
+    Requests on functional IDs remain pending until the request timeout, as they are answered by many ECUs.
+    """
+    def __init__(self,
+                 pairs: Optional[Sequence[ISOTP_PAIR]] = None,
+                 functional_ids: Optional[set[int]] = None,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        """
+        Args:
+            pairs (Optional[Sequence[ISOTP_PAIR]], optional): known ISO-TP pairs, e.g. found by IsoTpAddressScanner. Defaults to None.
+            functional_ids (Optional[set[int]], optional): functional addressing request IDs. Defaults to DEFAULT_FUNCTIONAL_IDS.
+            request_timeout (float, optional): time in seconds after which an unanswered request is logged without a response.
+                Defaults to DEFAULT_REQUEST_TIMEOUT.
+        """
+        self.functional_ids = set(functional_ids) if functional_ids is not None else set(DEFAULT_FUNCTIONAL_IDS)
+        self.request_timeout = request_timeout
+        self._response_ids_by_request_id = {pair.txid: pair.rxid for pair in pairs or []}
+        self._pending: list[_PendingRequest] = []
+        self._lock = threading.Lock()
+        self._listeners: list[TransactionListener] = []
+        self._attached: list[IsoTpReassembler] = []
+
+    def attach(self, reassembler: IsoTpReassembler) -> None:
+        """decode every transfer reassembled by the reassembler, the transactions are passed to the transaction listeners
+
+        Args:
+            reassembler (IsoTpReassembler): the reassembler to attach to
+        """
+        reassembler.add_transfer_listener(self.feed)
+        self._attached.append(reassembler)
+
+    def detach(self) -> None:
+        """stop decoding the transfers of the attached reassemblers
+        """
+        for reassembler in self._attached:
+            reassembler.remove_transfer_listener(self.feed)
+        self._attached.clear()
+
+    def add_transaction_listener(self, listener: TransactionListener) -> None:
+        """adds a callback to be called with the transactions completed by each feed
+
+        Args:
+            listener (TransactionListener): callback receiving a sequence of UDS_TRANSACTION
+        """
+        self._listeners.append(listener)
+
+    def remove_transaction_listener(self, listener: TransactionListener) -> None:
+        """removes a callback added with `add_transaction_listener`
+
+        Args:
+            listener (TransactionListener): the callback to remove
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def feed(self, transfers: Sequence[ISOTP_TRANSFER]) -> list[UDS_TRANSACTION]:
+        """decode a batch of reassembled transfers
+
+        Args:
+            transfers (Sequence[ISOTP_TRANSFER]): the transfers, in reception order
+
+        Returns:
+            list[UDS_TRANSACTION]: the transactions completed by the batch, including timed out requests
+        """
+        transactions: list[UDS_TRANSACTION] = []
+        with self._lock:
+            for transfer in transfers:
+                if not transfer.data:
+                    continue
+                self._expire(transfer.start_timestamp, transactions)
+                first_byte = transfer.data[0]
+                if first_byte == UDS_NEGATIVE_RESPONSE_SID or first_byte - UDS_POSITIVE_RESPONSE_OFFSET in _UDS_REQUEST_SIDS:
+                    self._on_response(transfer, transactions)
+                elif first_byte in _UDS_REQUEST_SIDS:
+                    self._pending.append(_PendingRequest(transfer))
+        self._notify(transactions)
+        return transactions
+
+    def flush(self, now: Optional[float] = None) -> list[UDS_TRANSACTION]:
+        """log the pending requests without a response
+
+        Args:
+            now (Optional[float], optional): the current time, in the clock of the transfers timestamps, only requests
+                older than the request timeout are flushed. None flushes all the pending requests. Defaults to None.
+
+        Returns:
+            list[UDS_TRANSACTION]: the unanswered requests
+        """
+        transactions: list[UDS_TRANSACTION] = []
+        with self._lock:
+            self._expire(now, transactions)
+        self._notify(transactions)
+        return transactions
+
+    def _notify(self, transactions: list[UDS_TRANSACTION]) -> None:
+        if transactions:
+            for listener in list(self._listeners):
+                listener(transactions)
+
+    def _expire(self, now: Optional[float], transactions: list[UDS_TRANSACTION]) -> None:
+        remaining = []
+        for pending in self._pending:
+            if now is None or now - pending.last_timestamp > self.request_timeout:
+                if not pending.responded:
+                    transactions.append(self._make_transaction(pending, None, None))
+            else:
+                remaining.append(pending)
+        self._pending = remaining
+
+    def _on_response(self, transfer: ISOTP_TRANSFER, transactions: list[UDS_TRANSACTION]) -> None:
+        response = RawUdsResponse.from_payload(transfer.data)
+        sid = transfer.data[1] if transfer.data[0] == UDS_NEGATIVE_RESPONSE_SID and len(transfer.data) > 1 \
+            else transfer.data[0] - UDS_POSITIVE_RESPONSE_OFFSET
+        pending = self._match(transfer, sid)
+        if response.valid and not response.positive and response.code == UdsResponseCode.RequestCorrectlyReceived_ResponsePending:
+            if pending:
+                pending.pending_responses += 1
+                pending.last_timestamp = transfer.end_timestamp
+            return
+
+        if pending is None:
+            transactions.append(self._make_transaction(None, transfer, response, sid))
+            return
+        transactions.append(self._make_transaction(pending, transfer, response))
+        if pending.transfer.arbitration_id in self.functional_ids:
+            pending.responded = True
+            pending.pending_responses = 0
+        else:
+            self._pending.remove(pending)
+
+    def _match(self, transfer: ISOTP_TRANSFER, sid: int) -> Optional[_PendingRequest]:
+        fallback = None
+        for pending in self._pending:
+            if pending.sid != sid:
+                continue
+            request_id = pending.transfer.arbitration_id
+            if request_id in self._response_ids_by_request_id:
+                if self._response_ids_by_request_id[request_id] == transfer.arbitration_id:
+                    return pending
+                continue
+            if is_likely_response_id(request_id, transfer.arbitration_id):
+                return pending
+            if fallback is None and request_id != transfer.arbitration_id:
+                fallback = pending
+        return fallback
+
+    @staticmethod
+    def _make_transaction(pending: Optional[_PendingRequest], transfer: Optional[ISOTP_TRANSFER],
+                          response: Optional[RawUdsResponse], sid: Optional[int] = None) -> UDS_TRANSACTION:
+        transaction = UDS_TRANSACTION(sid=pending.sid if pending else sid)
+        try:
+            transaction.service_name = UdsSid(transaction.sid).name
+        except ValueError:
+            pass
+        if pending:
+            transaction.request_id = pending.transfer.arbitration_id
+            transaction.request = pending.transfer.data
+            transaction.request_timestamp = pending.transfer.start_timestamp
+            transaction.pending_responses = pending.pending_responses
+        if transfer:
+            transaction.response_id = transfer.arbitration_id
+            transaction.response = transfer.data
+            transaction.response_timestamp = transfer.end_timestamp
+            transaction.valid = response.valid
+            transaction.positive = bool(response.valid and response.positive)
+            if response.valid and not response.positive:
+                transaction.response_code = response.code
+                transaction.response_code_name = response.code_name
+        return transaction
@@ -25,6 +25,9 @@ from udsoncan.services import (
 from cyclarity_in_vehicle_sdk.communication.doip.doip_communicator import (
     DoipCommunicator,
 )
+from cyclarity_in_vehicle_sdk.communication.doip.doip_session import (
+    DoipSessionTarget,
+)
 from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import (
     IsoTpCommunicator,
 )
@@ -89,7 +92,7 @@ class RawBytesCodec(DidCodec):
         raise DidCodec.ReadAllRemainingData
 
 class UdsUtils(UdsUtilsBase):
-    data_link_layer: Union[IsoTpCommunicator, DoipCommunicator]
+    data_link_layer: Union[IsoTpCommunicator, DoipCommunicator, DoipSessionTarget]
     attempts: int = Field(default=1, ge=1, description="Number of attempts to perform the UDS operation if no response was received")
     _crypto_utils: CryptoUtils = CryptoUtils()
 
@@ -46,6 +46,12 @@ class UdsSid(IntEnum):
     RequestFileTransfer = 0x38
 
 
+UDS_NEGATIVE_RESPONSE_SID = 0x7F
+# positive responses carry the request SID + 0x40
+UDS_POSITIVE_RESPONSE_OFFSET = 0x40
+UDS_RESPONSE_PENDING_NRC = 0x78
+
+
 @pydantic_enum_by_name
 class AuthenticationAction(Enum):
     """Types of authentication actions
@@ -284,4 +290,39 @@ class SESSION_INFO(BaseModel):
     elevation_info: Optional[ELEVATION_INFO] = Field(default=None, description="Elevation info for this UDS session")
     route_to_session: list[SESSION_ACCESS] = Field(default=[], description="The UDS session route to reach this session")
 
-DEFAULT_SESSION = SESSION_INFO(route_to_session=[SESSION_ACCESS(id=1)])
\ No newline at end of file
+DEFAULT_SESSION = SESSION_INFO(route_to_session=[SESSION_ACCESS(id=1)])
+
+class UDS_TRANSACTION(BaseModel):
+    """Model containing a UDS request and its response, decoded from captured traffic
+    """
+    request_id: Optional[int] = Field(default=None, description="CAN ID the request was sent on, None if the request was not captured")
+    response_id: Optional[int] = Field(default=None, description="CAN ID the response was sent on, None if no response was captured")
+    sid: int = Field(description="The service ID")
+    service_name: Optional[str] = Field(default=None, description="The name of the service")
+    request: Optional[HexBytes] = Field(default=None, description="The request payload")
+    response: Optional[HexBytes] = Field(default=None, description="The final response payload")
+    request_timestamp: Optional[float] = Field(default=None, description="Timestamp of the request")
+    response_timestamp: Optional[float] = Field(default=None, description="Timestamp of the final response")
+    valid: bool = Field(default=False, description="Whether the response is a valid UDS response")
+    positive: bool = Field(default=False, description="Whether the response is positive")
+    response_code: Optional[int] = Field(default=None, description="The negative response code")
+    response_code_name: Optional[str] = Field(default=None, description="The name of the negative response code")
+    pending_responses: int = Field(default=0, description="Amount of response pending negative responses before the final response")
+
+    @property
+    def latency(self) -> Optional[float]:
+        if self.request_timestamp is None or self.response_timestamp is None:
+            return None
+        return self.response_timestamp - self.request_timestamp
+
+    def __str__(self):
+        ids_str = "/".join(hex(canid) if canid is not None else "?" for canid in (self.request_id, self.response_id))
+        if self.response is None:
+            result_str = "no response"
+        elif self.positive:
+            result_str = f"positive: {self.response.hex()}"
+        else:
+            result_str = f"negative: {self.response_code_name or hex(self.response_code or 0)}"
+        latency_str = f", {self.latency * 1000:.3f}ms" if self.latency is not None else ""
+        request_str = self.request.hex() if self.request is not None else "?"
+        return f"{ids_str} {self.service_name or hex(self.sid)} {request_str} -> {result_str}{latency_str}"
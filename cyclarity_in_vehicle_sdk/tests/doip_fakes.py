@@ -0,0 +1,120 @@
+import queue
+from typing import Optional
+from unittest import TestCase, mock
+
+from doipclient import messages
+
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_stream_reader import DOIP_HEADER
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_utils import DoipUtils, RoutingActivationResponse
+
+CLIENT_ADDRESS = 0x0E80
+GATEWAY_ADDRESS = 0x1000
+UNKNOWN_ADDRESS = 0x1FFF
+SILENT_ADDRESS = 0x1EEE
+PENDING_ADDRESS = 0x1DDD
+UNREACHABLE_ADDRESS = 0x1CCC
+
+
+def pack(message: messages.DoIPMessage) -> bytes:
+    return DoipUtils._pack_doip_message(message)
+
+
+def unpack(data: bytes) -> messages.DoIPMessage:
+    _, _, payload_type, _ = DOIP_HEADER.unpack_from(data)
+    return messages.payload_type_to_message[payload_type].unpack(bytearray(data[DOIP_HEADER.size:]), len(data) - DOIP_HEADER.size)
+
+
+def patch_methods(test_case: TestCase, cls: type, **methods: dict) -> dict[str, mock.MagicMock]:
+    """patch methods of a class for the duration of a test
+
+    Args:
+        test_case (TestCase): the test the methods are patched for
+        cls (type): the class to patch
+        methods (dict): keyword arguments of `mock.patch.object` per method name, the mocks are autospecced unless replaced with `new`
+
+    Returns:
+        dict[str, mock.MagicMock]: the mocks by method name
+    """
+    mocks = {}
+    for name, kwargs in methods.items():
+        patcher = mock.patch.object(cls, name, **kwargs) if "new" in kwargs else mock.patch.object(cls, name, autospec=True, **kwargs)
+        mocks[name] = patcher.start()
+        test_case.addCleanup(patcher.stop)
+    return mocks
+
+
+class FakeGateway():
+    """emulates a DoIP gateway, the responses are held until `release_after` requests were received
+    and are then sent in reverse order. Targets other than `known_addresses` are unknown, if set.
+    Routing activation requests are accepted, once `recv_error` is set, the connection fails with it
+    """
+    def __init__(self, release_after: int = 1, known_addresses: Optional[set[int]] = None):
+        self.release_after = release_after
+        self.known_addresses = known_addresses
+        self.recv_error: Optional[Exception] = None
+        # the connection state reported by the communicators
+        self.connected = True
+        self.received = queue.Queue()
+        self.sent_messages = []
+        self._held = []
+
+    def send(self, communicator, data: bytes, timeout=None) -> int:
+        message = unpack(data)
+        self.sent_messages.append(message)
+        if type(message) is messages.RoutingActivationRequest:
+            self.push(messages.RoutingActivationResponse(message.source_address, GATEWAY_ADDRESS, RoutingActivationResponse.ResponseCode.Success))
+            return len(data)
+        if type(message) is not messages.DiagnosticMessage:
+            return len(data)
+
+        target = message.target_address
+        if target == UNKNOWN_ADDRESS or (self.known_addresses is not None and target not in self.known_addresses):
+            self.push(messages.DiagnosticMessageNegativeAcknowledgement(target, CLIENT_ADDRESS, 3, b""))
+            return len(data)
+        if target == UNREACHABLE_ADDRESS:
+            self.push(messages.DiagnosticMessageNegativeAcknowledgement(target, CLIENT_ADDRESS, 6, b""))
+            return len(data)
+        self.push(messages.DiagnosticMessagePositiveAcknowledgement(target, CLIENT_ADDRESS, 0, b""))
+        if target == SILENT_ADDRESS:
+            return len(data)
+        if target == PENDING_ADDRESS:
+            self.push(messages.DiagnosticMessage(target, CLIENT_ADDRESS, bytes([0x7F, message.user_data[0], 0x78])))
+        self._held.append(messages.DiagnosticMessage(target, CLIENT_ADDRESS, bytes([message.user_data[0] + 0x40]) + target.to_bytes(2, "big")))
+        if len(self._held) >= self.release_after:
+            self.release()
+        return len(data)
+
+    def release(self):
+        for response in reversed(self._held):
+            self.push(response)
+        self._held.clear()
+
+    def recv(self, communicator, recv_timeout: float, size: int = 4096) -> bytes:
+        if self.recv_error:
+            raise self.recv_error
+        try:
+            return self.received.get(timeout=recv_timeout)
+        except queue.Empty:
+            return bytes()
+
+    def is_open(self, communicator) -> bool:
+        return self.connected
+
+    def push(self, message: messages.DoIPMessage):
+        self.received.put(pack(message))
+
+    def sent(self, message_type: type) -> list:
+        return [message for message in self.sent_messages if type(message) is message_type]
+
+
+class FakeGatewayTestCase(TestCase):
+    """test case whose TCP communicators are connected to a `FakeGateway`, the mocks are kept in `mocks`
+    """
+    def setUp(self):
+        self.gateway = FakeGateway()
+        self.mocks = patch_methods(self, TcpCommunicator,
+                                   open={"return_value": True},
+                                   connect={"return_value": True},
+                                   close={"return_value": True},
+                                   **{name: {"side_effect": getattr(self.gateway, name)} for name in ("send", "recv", "is_open")})
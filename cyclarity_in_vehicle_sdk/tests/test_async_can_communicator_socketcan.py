@@ -0,0 +1,80 @@
+import asyncio
+import socket
+from unittest import TestCase, mock
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.async_can_communicator_socketcan import AsyncCanCommunicatorSocketCan
+
+test_m1 = CanMessage(arbitration_id=0x401, data=[0x44] * 6, is_extended_id=False)
+test_m2 = CanMessage(arbitration_id=0x404, data=[0x55] * 6, is_extended_id=True)
+
+
+class AsyncCanCommunicatorSocketCanUTs(TestCase):
+    def setUp(self):
+        # a socket pair emulates the readiness of the CAN socket, the frames are provided by the mocked communicator
+        self.local_sock, self.peer_sock = socket.socketpair()
+        self.local_sock.setblocking(False)
+        self.pending_batches = []
+        patcher = mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.async_can_communicator_socketcan.CanCommunicatorSocketCan")
+        mocked_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mocked_can_comm = mocked_class.return_value
+        self.mocked_can_comm.get_bus.return_value.fileno.return_value = self.local_sock.fileno()
+        self.mocked_can_comm.receive_batch.side_effect = self._receive_batch
+
+    def tearDown(self):
+        self.local_sock.close()
+        self.peer_sock.close()
+
+    def _receive_batch(self, max_frames, timeout):
+        self.local_sock.recv(1024)
+        return self.pending_batches.pop(0) if self.pending_batches else []
+
+    def _deliver(self, msgs):
+        self.pending_batches.append(msgs)
+        self.peer_sock.send(b"\x00")
+
+    def test_receive(self):
+        async def scenario():
+            async with AsyncCanCommunicatorSocketCan(channel="vcan0", support_fd=True) as can_comm:
+                asyncio.get_running_loop().call_later(0.05, self._deliver, [test_m1, test_m2])
+                first = await can_comm.receive(timeout=1)
+                second = await can_comm.receive(timeout=1)
+                third = await can_comm.receive(timeout=0.05)
+                return first, second, third
+
+        self.assertEqual(asyncio.run(scenario()), (test_m1, test_m2, None))
+
+    def test_iter_sniff(self):
+        async def scenario():
+            async with AsyncCanCommunicatorSocketCan(channel="vcan0", support_fd=True) as can_comm:
+                self._deliver([test_m1])
+                asyncio.get_running_loop().call_later(0.05, self._deliver, [test_m2, test_m1])
+                return [msg async for msg in can_comm.iter_sniff(sniff_time=0.2)]
+
+        self.assertEqual(asyncio.run(scenario()), [test_m1, test_m2, test_m1])
+
+    def test_rx_queue_overflow(self):
+        async def scenario():
+            async with AsyncCanCommunicatorSocketCan(channel="vcan0", support_fd=True, rx_queue_size=2) as can_comm:
+                self._deliver([test_m1, test_m1, test_m2])
+                await asyncio.sleep(0.05)
+                return await can_comm.receive_batch(timeout=0), can_comm.get_dropped_count()
+
+        self.assertEqual(asyncio.run(scenario()), ([test_m1, test_m2], 1))
+
+    def test_read_error_stops_reading(self):
+        async def scenario():
+            async with AsyncCanCommunicatorSocketCan(channel="vcan0", support_fd=True) as can_comm:
+                self._deliver([test_m1])
+                await asyncio.sleep(0.05)
+                self.mocked_can_comm.receive_batch.side_effect = OSError(100, "Network is down")
+                # the socket stays readable
+                self.peer_sock.send(b"\x00")
+                await asyncio.sleep(0.05)
+                msgs = await can_comm.receive_batch(timeout=1)
+                with self.assertRaises(OSError):
+                    await can_comm.receive(timeout=1)
+                return msgs, self.mocked_can_comm.receive_batch.call_count
+
+        self.assertEqual(asyncio.run(scenario()), ([test_m1], 2))
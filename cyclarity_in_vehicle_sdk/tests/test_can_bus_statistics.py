@@ -0,0 +1,71 @@
+from unittest import TestCase, mock
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_bus_statistics import CanBusStatistics
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+
+
+def make_msg(arbitration_id: int, timestamp: float, data: bytes) -> CanMessage:
+    return CanMessage(arbitration_id=arbitration_id, timestamp=timestamp, data=data, is_extended_id=False)
+
+
+class CanBusStatisticsUTs(TestCase):
+    def setUp(self):
+        self.statistics = CanBusStatistics(bitrate=500000)
+
+    def test_rate_and_jitter(self):
+        self.statistics.update_batch([make_msg(0x100, 0.0, b"\x00"), make_msg(0x100, 0.1, b"\x00")])
+        self.statistics.update_batch([make_msg(0x100, 0.2, b"\x00"), make_msg(0x100, 0.3, b"\x00")])
+        id_statistics = self.statistics.snapshot().ids[0x100]
+        self.assertEqual(id_statistics.count, 4)
+        self.assertAlmostEqual(id_statistics.rate, 10.0)
+        self.assertAlmostEqual(id_statistics.mean_period, 0.1)
+        self.assertAlmostEqual(id_statistics.period_jitter, 0.0)
+
+    def test_batch_equals_single_updates(self):
+        msgs = [make_msg(0x100 + (i % 3), i * 0.01 + (i % 2) * 0.002, bytes([i, 255 - i])) for i in range(30)]
+        batched = CanBusStatistics()
+        batched.update_batch(msgs)
+        single = CanBusStatistics()
+        for msg in msgs:
+            single.update(msg)
+        for canid, id_statistics in batched.snapshot().ids.items():
+            single_id_statistics = single.snapshot().ids[canid]
+            self.assertEqual(id_statistics.bit_flip_counts, single_id_statistics.bit_flip_counts)
+            self.assertAlmostEqual(id_statistics.period_jitter, single_id_statistics.period_jitter)
+
+    def test_bit_flips_and_dlc(self):
+        self.statistics.update_batch([make_msg(0x200, 0.0, b"\x01"), make_msg(0x200, 0.1, b"\x00\x80"), make_msg(0x200, 0.2, b"\x01\x80")])
+        id_statistics = self.statistics.snapshot().ids[0x200]
+        self.assertEqual(id_statistics.dlc_distribution, {1: 1, 2: 2})
+        self.assertEqual(id_statistics.bit_flip_counts[7], 2)
+        self.assertEqual(id_statistics.bit_flip_counts[8], 1)
+        self.assertEqual(sum(id_statistics.bit_flip_counts), 3)
+
+    def test_remote_frames_dlc(self):
+        remote_frame = CanMessage(arbitration_id=0x200, timestamp=0.1, is_remote_frame=True, dlc=8, is_extended_id=False)
+        self.statistics.update_batch([make_msg(0x200, 0.0, b"\x01"), remote_frame])
+        id_statistics = self.statistics.snapshot().ids[0x200]
+        self.assertEqual(id_statistics.dlc_distribution, {1: 1, 8: 1})
+        # a remote frame carries no payload bits
+        self.assertEqual(len(id_statistics.bit_flip_counts), 8)
+        self.assertEqual(self.statistics._total_bits, 2 * 47 + 8)
+
+    def test_constant_payload_has_no_entropy(self):
+        self.statistics.update_batch([make_msg(0x300, i * 0.1, b"\xAA" * 8) for i in range(10)])
+        self.assertEqual(self.statistics.snapshot().ids[0x300].payload_entropy, 0.0)
+
+    def test_bus_load(self):
+        self.statistics.update_batch([make_msg(0x100, i * 0.001, b"\x00" * 8) for i in range(1001)])
+        snapshot = self.statistics.snapshot()
+        self.assertAlmostEqual(snapshot.bus_load, 1001 * (47 + 64) / 500000, places=3)
+
+    def test_attach_to_communicator(self):
+        can_comm = CanCommunicatorSocketCan(channel="vcan0", support_fd=True)
+        can_comm._bus = mock.MagicMock()
+        can_comm._bus.recv.return_value = make_msg(0x100, 0.0, b"\x00")
+        self.statistics.attach(can_comm)
+        can_comm.receive()
+        self.statistics.detach()
+        can_comm.receive()
+        self.assertEqual(self.statistics.snapshot().total_frames, 1)
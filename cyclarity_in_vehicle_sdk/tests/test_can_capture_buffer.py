@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_capture_buffer import CanCaptureBuffer
+
+
+def make_msg(arbitration_id: int, timestamp: float, data: bytes = b"\x11\x22", **kwargs) -> CanMessage:
+    return CanMessage(arbitration_id=arbitration_id, timestamp=timestamp, data=data, **kwargs)
+
+
+class CanCaptureBufferUTs(TestCase):
+    def setUp(self):
+        self.capture_buffer = CanCaptureBuffer(capacity=8)
+        self.capture_buffer.extend([make_msg(0x3B1, 1.0),
+                                    make_msg(0x100, 1.5),
+                                    make_msg(0x3B1, 2.0, data=b"\x01" * 8),
+                                    make_msg(0x3B1, 3.0)])
+
+    def test_select_by_id(self):
+        rows = self.capture_buffer.select(arbitration_id=0x3B1)
+        self.assertEqual(rows.tolist(), [0, 2, 3])
+
+    def test_select_by_id_and_time(self):
+        rows = self.capture_buffer.select(arbitration_id=0x3B1, start_time=1.5, end_time=2.5)
+        self.assertEqual(rows.tolist(), [2])
+        self.assertEqual(self.capture_buffer.get_payloads(rows), [b"\x01" * 8])
+
+    def test_select_unknown_id(self):
+        self.assertEqual(len(self.capture_buffer.select(arbitration_id=0x7FF)), 0)
+
+    def test_index_across_batches(self):
+        self.capture_buffer.extend([make_msg(0x100, 4.0), make_msg(0x3B1, 5.0)])
+        self.assertEqual(self.capture_buffer.select(arbitration_id=0x3B1).tolist(), [0, 2, 3, 5])
+        self.assertEqual(self.capture_buffer.count_by_id(), {0x3B1: 4, 0x100: 2})
+
+    def test_capacity_overflow(self):
+        stored = self.capture_buffer.extend([make_msg(0x200, 10.0 + i) for i in range(6)])
+        self.assertEqual(stored, 4)
+        self.assertEqual(self.capture_buffer.dropped_count, 2)
+        self.assertTrue(self.capture_buffer.is_full)
+
+    def test_to_messages_round_trip(self):
+        msg = make_msg(0x1234567, 7.0, data=bytes(range(64)), is_extended_id=True, is_fd=True, bitrate_switch=True)
+        self.capture_buffer.append(msg)
+        restored = self.capture_buffer.to_messages(self.capture_buffer.select(arbitration_id=0x1234567))[0]
+        self.assertTrue(restored.equals(msg))
+
+    def test_remote_frame_keeps_dlc(self):
+        self.capture_buffer.append(CanMessage(arbitration_id=0x7DF, timestamp=6.0, is_remote_frame=True, dlc=4))
+        rows = self.capture_buffer.select(arbitration_id=0x7DF)
+        self.assertEqual(self.capture_buffer.get_payloads(rows), [b""])
+        remote_frame = self.capture_buffer.to_messages(rows)[0]
+        self.assertTrue(remote_frame.is_remote_frame)
+        self.assertEqual((remote_frame.dlc, bytes(remote_frame.data)), (4, b""))
@@ -1,10 +1,20 @@
+import ctypes
+import errno
+from itertools import chain, repeat
 import shlex
+import socket
+import struct
 import subprocess
+from typing import Optional
 from unittest import mock, TestCase
 
 import pytest
-from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
-from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from can import CanOperationError
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanCommunicatorBase, CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_ring_buffer import CanRingBuffer, OverflowPolicy
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan, CAN_INV_FILTER, MSK_ARBID, SIOCGHWTSTAMP, SIOCSHWTSTAMP, SO_TIMESTAMPING, _TimestampingSocketcanBus
+from can.interfaces.socketcan.constants import CAN_EFF_FLAG
+from can.interfaces.socketcan.socketcan import build_can_frame
 
 test_m1 = CanMessage(
         arbitration_id=0x401,
@@ -80,4 +90,276 @@ class TestCanCommunicatorSocketCan(TestCase):
         {sniffed_ids.add(msg.arbitration_id) for msg in msgs}
         self.assertEqual(len(sniffed_ids), 1)
         self.assertNotIn(test_m1.arbitration_id, sniffed_ids)
-        self.assertIn(test_m2.arbitration_id, sniffed_ids)
\ No newline at end of file
+        self.assertIn(test_m2.arbitration_id, sniffed_ids)
+
+class CanCommunicatorSocketCanFiltersUTs(TestCase):
+    def setUp(self) -> None:
+        self.can_comm = CanCommunicatorSocketCan(channel="vcan0", support_fd=True)
+        self.can_comm._bus = mock.MagicMock()
+        self.mocked_socket = self.can_comm._bus.socket
+
+    def _applied_filters(self) -> list[tuple[int, int]]:
+        filter_data = self.mocked_socket.setsockopt.call_args_list[-1].args[2]
+        values = struct.unpack(f"={len(filter_data) // 4}I", filter_data)
+        return list(zip(values[0::2], values[1::2]))
+
+    def _applied_join(self) -> int:
+        return self.mocked_socket.setsockopt.call_args_list[-2].args[2]
+
+    def test_blacklist_compiles_to_joined_inverted_filters(self):
+        self.can_comm.add_to_blacklist(canids=[test_m2.arbitration_id, test_m1.arbitration_id])
+        self.assertEqual(self._applied_filters(), [(test_m1.arbitration_id | CAN_INV_FILTER, MSK_ARBID | CAN_EFF_FLAG),
+                                                   (test_m2.arbitration_id | CAN_INV_FILTER, MSK_ARBID | CAN_EFF_FLAG)])
+        self.assertEqual(self._applied_join(), 1)
+
+    def test_allowlist_excludes_blacklisted_ids(self):
+        self.can_comm.add_to_blacklist(canids=[test_m1.arbitration_id])
+        self.can_comm.add_to_allowlist(canids=[test_m1.arbitration_id, test_m2.arbitration_id])
+        self.assertEqual(self._applied_filters(), [(test_m2.arbitration_id, MSK_ARBID | CAN_EFF_FLAG)])
+        self.assertEqual(self._applied_join(), 0)
+
+    def test_filters_match_the_frame_format(self):
+        self.can_comm.add_to_allowlist(canids=[0x123, 0x18DAF110])
+        self.assertEqual(self._applied_filters(), [(0x123, MSK_ARBID | CAN_EFF_FLAG),
+                                                   (0x18DAF110 | CAN_EFF_FLAG, MSK_ARBID | CAN_EFF_FLAG)])
+
+    def test_software_filtering_fallback(self):
+        self.mocked_socket.setsockopt.side_effect = OSError("not supported")
+        self.can_comm.add_to_blacklist(canids=[test_m1.arbitration_id])
+        self.can_comm._bus.recv.return_value = test_m1
+        self.assertIsNone(self.can_comm.receive())
+        self.can_comm._bus.recv.return_value = test_m2
+        self.assertEqual(self.can_comm.receive(), test_m2)
+
+    @mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.capture_message")
+    @mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.select.select")
+    def test_receive_batch_drains_socket(self, mocked_select, mocked_capture):
+        mocked_select.return_value = ([self.mocked_socket], [], [])
+        mocked_capture.side_effect = [test_m1, test_m2, test_m1, CanOperationError("empty", errno.EAGAIN)]
+        msgs = self.can_comm.receive_batch(max_frames=10, timeout=1)
+        self.assertEqual(msgs, [test_m1, test_m2, test_m1])
+        mocked_select.assert_called_once()
+
+    @mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.capture_message")
+    @mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.select.select")
+    def test_receive_batch_max_frames(self, mocked_select, mocked_capture):
+        mocked_select.return_value = ([self.mocked_socket], [], [])
+        mocked_capture.side_effect = [test_m1, test_m2, test_m1]
+        msgs = self.can_comm.receive_batch(max_frames=2, timeout=1)
+        self.assertEqual(len(msgs), 2)
+
+    def test_iter_sniff_yields_as_received(self):
+        self.can_comm.receive_batch = mock.MagicMock(side_effect=chain([[test_m1, test_m2], [], [test_m1]], repeat([])))
+        sniffed = self.can_comm.iter_sniff(sniff_time=None)
+        self.assertEqual([next(sniffed) for _ in range(3)], [test_m1, test_m2, test_m1])
+        sniffed.close()
+
+    def test_iter_sniff_with_ring_buffer(self):
+        self.can_comm.receive_batch = mock.MagicMock(side_effect=chain([[test_m1] * 5, [test_m2] * 5], repeat([])))
+        ring_buffer = CanRingBuffer(size=100)
+        batches = list(self.can_comm.iter_sniff(sniff_time=0.3, batches=True, ring_buffer=ring_buffer))
+        sniffed = [msg for batch in batches for msg in batch]
+        self.assertEqual(sniffed, [test_m1] * 5 + [test_m2] * 5)
+        self.assertEqual((ring_buffer.total_count, ring_buffer.dropped_count), (10, 0))
+
+    def test_iter_sniff_ring_buffer_bounds_memory(self):
+        self.can_comm.receive_batch = mock.MagicMock(side_effect=chain([[test_m1] * 5, [test_m2] * 5], repeat([])))
+        # the batches are larger than the buffer, thus messages are dropped whatever the consumer's pace
+        ring_buffer = CanRingBuffer(size=3, overflow_policy=OverflowPolicy.DropOldest)
+        sniffed = list(self.can_comm.iter_sniff(sniff_time=0.3, ring_buffer=ring_buffer))
+        self.assertEqual(ring_buffer.total_count, 10)
+        self.assertGreaterEqual(ring_buffer.dropped_count, 4)
+        self.assertEqual(len(sniffed) + ring_buffer.dropped_count, 10)
+        self.assertEqual(sniffed[-3:], [test_m2] * 3)
+
+
+def timestamped_frame(msg: CanMessage, timestamp: float, hardware_timestamp: float = 0.0, echo: bool = False):
+    def timespec(value: float) -> tuple[int, int]:
+        return int(value), round((value - int(value)) * 1e9)
+    scm_timestamping = struct.pack("@llllll", *timespec(timestamp), 0, 0, *timespec(hardware_timestamp))
+    msg_flags = (socket.MSG_CONFIRM | socket.MSG_DONTROUTE) if echo else 0
+    return build_can_frame(msg), [(socket.SOL_SOCKET, SO_TIMESTAMPING, scm_timestamping)], msg_flags, None
+
+
+class CanCommunicatorSocketCanTimestampingUTs(TestCase):
+    def setUp(self) -> None:
+        self.can_comm = CanCommunicatorSocketCan(channel="vcan0", support_fd=False, timestamping=True)
+        self.can_comm._bus = mock.MagicMock()
+        self.mocked_socket = self.can_comm._bus.socket
+        self.select_patcher = mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.select.select",
+                                         return_value=([self.mocked_socket], [], []))
+        self.select_patcher.start()
+
+    def tearDown(self) -> None:
+        self.select_patcher.stop()
+
+    def _feed(self, frames):
+        self.mocked_socket.recvmsg.side_effect = frames + [OSError(errno.EAGAIN, "empty")]
+
+    def test_timestamps_and_tx_echo(self):
+        self._feed([timestamped_frame(test_m1, 100.5, echo=True), timestamped_frame(test_m2, 100.75)])
+        msgs = self.can_comm.receive_batch(timeout=1)
+        self.assertEqual(len(msgs), 1)
+        self.assertEqual(msgs[0].arbitration_id, test_m2.arbitration_id)
+        self.assertEqual(msgs[0].data, test_m2.data)
+        self.assertAlmostEqual(msgs[0].timestamp, 100.75)
+        self.assertAlmostEqual(self.can_comm.get_tx_timestamp(test_m1.arbitration_id), 100.5)
+        self.assertIsNone(self.can_comm.get_tx_timestamp(test_m2.arbitration_id))
+
+    def test_tx_latency(self):
+        with mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.time.time", return_value=100.0):
+            self.can_comm.send(test_m1)
+        self._feed([timestamped_frame(test_m1, 100.0002, echo=True)])
+        self.can_comm.receive_batch(timeout=0)
+        tx_latency = self.can_comm.get_latency_statistics().tx_latency[test_m1.arbitration_id]
+        self.assertEqual(tx_latency.count, 1)
+        self.assertAlmostEqual(tx_latency.p50, 0.0002, delta=0.000005)
+
+    def test_failed_send_is_not_matched(self):
+        self.can_comm._bus.send.side_effect = [CanOperationError("No buffer space available"), None]
+        with mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.time.time", side_effect=[99.0, 100.0]):
+            with self.assertRaises(CanOperationError):
+                self.can_comm.send(test_m1)
+            self.can_comm.send(test_m1)
+        self._feed([timestamped_frame(test_m1, 100.0002, echo=True)])
+        self.can_comm.receive_batch(timeout=0)
+        tx_latency = self.can_comm.get_latency_statistics().tx_latency[test_m1.arbitration_id]
+        self.assertEqual(tx_latency.count, 1)
+        self.assertAlmostEqual(tx_latency.p50, 0.0002, delta=0.000005)
+
+    def test_response_latency(self):
+        self.can_comm.add_latency_pair(request_id=test_m1.arbitration_id, response_id=test_m2.arbitration_id)
+        self._feed([timestamped_frame(test_m2, 99.0),
+                    timestamped_frame(test_m1, 100.0, echo=True),
+                    timestamped_frame(test_m2, 100.001),
+                    timestamped_frame(test_m2, 100.002),
+                    timestamped_frame(test_m1, 101.0, hardware_timestamp=50.0, echo=True),
+                    timestamped_frame(test_m2, 101.009, hardware_timestamp=50.003)])
+        msgs = self.can_comm.receive_batch(timeout=0)
+        self.assertEqual(len(msgs), 4)
+        response_latency = self.can_comm.get_latency_statistics().response_latency[0]
+        self.assertEqual(response_latency.latency.count, 2)
+        self.assertAlmostEqual(response_latency.latency.min, 0.001, delta=0.00002)
+        self.assertAlmostEqual(response_latency.latency.max, 0.003, delta=0.00002)
+        self.can_comm.reset_latency_statistics()
+        self.assertEqual(self.can_comm.get_latency_statistics().response_latency[0].latency.count, 0)
+
+    def test_latency_pair_requires_timestamping(self):
+        can_comm = CanCommunicatorSocketCan(channel="vcan0", support_fd=False)
+        with self.assertRaises(RuntimeError):
+            can_comm.add_latency_pair(request_id=0x7E0, response_id=0x7E8)
+
+    def test_bus_readers_skip_tx_echoes(self):
+        bus = _TimestampingSocketcanBus.__new__(_TimestampingSocketcanBus)
+        bus._capture = self.can_comm._capture_timestamped_message
+        bus.socket, bus.channel, bus._is_filtered = self.mocked_socket, "vcan0", True
+        self._feed([timestamped_frame(test_m1, 100.5, echo=True), timestamped_frame(test_m2, 100.75)])
+        msg, _ = bus._recv_internal(timeout=1)
+        self.assertEqual((msg.arbitration_id, msg.channel), (test_m2.arbitration_id, "vcan0"))
+        self.assertAlmostEqual(self.can_comm.get_tx_timestamp(test_m1.arbitration_id), 100.5)
+
+    def test_hardware_timestamping_is_restored(self):
+        with self.assertRaises(ValueError):
+            CanCommunicatorSocketCan(channel="vcan0", support_fd=False, hardware_timestamping=True)
+        previous_config = struct.pack("@iii", 0, 0, 0)
+        configs_set = []
+
+        def ioctl(sock, request, ifreq):
+            _, address = struct.unpack("@16sP", ifreq)
+            if request == SIOCGHWTSTAMP:
+                ctypes.memmove(address, previous_config, len(previous_config))
+            elif request == SIOCSHWTSTAMP:
+                configs_set.append(ctypes.string_at(address, len(previous_config)))
+
+        can_comm = CanCommunicatorSocketCan(channel="vcan0", support_fd=False, timestamping=True, hardware_timestamping=True)
+        can_comm._bus = mock.MagicMock()
+        with mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.fcntl.ioctl", side_effect=ioctl):
+            can_comm._enable_timestamping()
+            self.assertTrue(can_comm.get_latency_statistics().hardware_timestamps)
+            can_comm.close()
+        self.assertEqual(configs_set, [struct.pack("@iii", 0, 1, 1), previous_config])
+        self.assertFalse(can_comm.get_latency_statistics().hardware_timestamps)
+
+    def test_no_hardware_timestamping_by_default(self):
+        with mock.patch("cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan.fcntl.ioctl") as ioctl:
+            self.can_comm._enable_timestamping()
+        ioctl.assert_not_called()
+        self.assertFalse(self.can_comm.get_latency_statistics().hardware_timestamps)
+
+
+class _LegacyCanCommunicator(CanCommunicatorBase):
+    """communicator implemented before the allowlist, the batched reception, the streaming sniff and the RX listeners were added to the base class
+    """
+    pending: list = []
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def send(self, can_msg: CanMessage, timeout: Optional[float] = None):
+        pass
+
+    def send_periodically(self, msgs, period: float, duration: Optional[float] = None):
+        pass
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[CanMessage]:
+        return self.pending.pop(0) if self.pending else None
+
+    def sniff(self, sniff_time: float) -> Optional[list[CanMessage]]:
+        return None
+
+    def add_to_blacklist(self, canids):
+        pass
+
+    def get_bus(self):
+        return None
+
+
+class CanCommunicatorBaseUTs(TestCase):
+    def test_legacy_communicator(self):
+        can_comm = _LegacyCanCommunicator()
+        with self.assertRaises(NotImplementedError):
+            can_comm.add_to_allowlist([0x123])
+        with self.assertRaises(NotImplementedError):
+            can_comm.add_rx_listener(mock.Mock())
+
+    def test_receive_batch_fallback(self):
+        can_comm = _LegacyCanCommunicator(pending=[test_m1, test_m2, test_m1])
+        self.assertEqual(can_comm.receive_batch(max_frames=2, timeout=0), [test_m1, test_m2])
+        self.assertEqual(can_comm.receive_batch(max_frames=2, timeout=0), [test_m1])
+        self.assertEqual(can_comm.receive_batch(max_frames=2, timeout=0), [])
+
+    def test_iter_sniff_fallback(self):
+        can_comm = _LegacyCanCommunicator(pending=[test_m1, test_m2])
+        self.assertEqual(list(can_comm.iter_sniff(sniff_time=0.05)), [test_m1, test_m2])
+        can_comm = _LegacyCanCommunicator(pending=[test_m1, test_m2])
+        self.assertEqual(list(can_comm.iter_sniff(sniff_time=0.05, batches=True)), [[test_m1, test_m2]])
+
+
+class CanRingBufferUTs(TestCase):
+    def test_drop_oldest(self):
+        ring_buffer = CanRingBuffer(size=3, overflow_policy=OverflowPolicy.DropOldest)
+        ring_buffer.put([test_m1, test_m1])
+        ring_buffer.put([test_m2, test_m2])
+        self.assertEqual(ring_buffer.dropped_count, 1)
+        self.assertEqual(ring_buffer.get(max_msgs=10, timeout=0), [test_m1, test_m2, test_m2])
+
+    def test_drop_newest(self):
+        ring_buffer = CanRingBuffer(size=3, overflow_policy=OverflowPolicy.DropNewest)
+        ring_buffer.put([test_m1, test_m1])
+        ring_buffer.put([test_m2, test_m2])
+        self.assertEqual(ring_buffer.dropped_count, 1)
+        self.assertEqual(ring_buffer.get(max_msgs=10, timeout=0), [test_m1, test_m1, test_m2])
+
+    def test_batch_larger_than_buffer(self):
+        ring_buffer = CanRingBuffer(size=2, overflow_policy=OverflowPolicy.DropOldest)
+        ring_buffer.put([test_m1, test_m1, test_m2, test_m2])
+        self.assertEqual(ring_buffer.dropped_count, 2)
+        self.assertEqual(ring_buffer.get(max_msgs=10, timeout=0), [test_m2, test_m2])
+
+    def test_get_after_close(self):
+        ring_buffer = CanRingBuffer(size=2)
+        ring_buffer.close()
+        self.assertEqual(ring_buffer.get(max_msgs=10), [])
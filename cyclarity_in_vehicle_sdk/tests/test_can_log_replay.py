@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+from unittest import TestCase, mock
+
+import pytest
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanCommunicatorBase, CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_log_replay import CanLogReplay
+
+CANDUMP_LOG = """(1700000000.000000) vcan0 123#1122
+(1700000000.010000) vcan0 456#33
+(1700000000.020000) vcan1 123#44
+(1700000000.030000) vcan0 789#
+"""
+
+
+class CanLogReplayUTs(TestCase):
+    def setUp(self):
+        self.can_comm = mock.MagicMock(spec=CanCommunicatorBase)
+        self.sent: list[tuple[float, CanMessage]] = []
+        self.can_comm.send.side_effect = lambda msg, *args, **kwargs: self.sent.append((time.perf_counter(), msg))
+        fd, self.log_file = tempfile.mkstemp(suffix=".log")
+        with os.fdopen(fd, "w") as log:
+            log.write(CANDUMP_LOG)
+
+    def tearDown(self):
+        os.remove(self.log_file)
+
+    def test_replay_timing(self):
+        replay = CanLogReplay(can_communicator=self.can_comm)
+        result = replay.replay(self.log_file)
+        self.assertEqual(result.frames_sent, 4)
+        self.assertEqual([msg.arbitration_id for _, msg in self.sent], [0x123, 0x456, 0x123, 0x789])
+        self.assertEqual(self.sent[0][1].data, bytearray(b"\x11\x22"))
+        self.assertTrue(all(msg.channel is None for _, msg in self.sent))
+        self.assertAlmostEqual(self.sent[-1][0] - self.sent[0][0], 0.03, delta=0.005)
+        self.assertEqual(result.timing_error.count, 4)
+        self.assertLess(result.timing_error.p50, 0.005)
+
+    def test_speed_factor(self):
+        replay = CanLogReplay(can_communicator=self.can_comm, speed_factor=3.0)
+        replay.replay(self.log_file)
+        self.assertAlmostEqual(self.sent[-1][0] - self.sent[0][0], 0.01, delta=0.005)
+
+    def test_remap_and_filters(self):
+        replay = CanLogReplay(can_communicator=self.can_comm,
+                              id_remap={0x123: 0x7DF},
+                              blocked_ids={0x789},
+                              channels={"vcan0"})
+        result = replay.replay(self.log_file)
+        self.assertEqual([msg.arbitration_id for _, msg in self.sent], [0x7DF, 0x456])
+        self.assertEqual(result.frames_skipped, 2)
+
+        self.sent.clear()
+        replay = CanLogReplay(can_communicator=self.can_comm, allowed_ids={0x456}, speed_factor=100)
+        replay.replay(self.log_file)
+        self.assertEqual([msg.arbitration_id for _, msg in self.sent], [0x456])
+
+    def test_max_frames_and_send_errors(self):
+        self.can_comm.send.side_effect = [None, Exception("Transmit buffer full"), None]
+        replay = CanLogReplay(can_communicator=self.can_comm, speed_factor=100)
+        result = replay.replay(self.log_file, max_frames=3)
+        self.assertEqual(result.frames_sent, 2)
+        self.assertEqual(result.send_errors, 1)
+        self.assertEqual(self.can_comm.send.call_count, 3)
+
+    def test_stop(self):
+        replay = CanLogReplay(can_communicator=self.can_comm, speed_factor=0.01)
+        self.can_comm.send.side_effect = lambda msg, *args, **kwargs: replay.stop()
+        start_time = time.perf_counter()
+        result = replay.replay(self.log_file)
+        self.assertEqual(result.frames_sent, 1)
+        self.assertLess(time.perf_counter() - start_time, 1)
+
+
+@pytest.mark.skip
+class CanLogReplayIntegrationTests(TestCase):
+    def test_replay_on_vcan(self):
+        fd, log_file = tempfile.mkstemp(suffix=".log")
+        with os.fdopen(fd, "w") as log:
+            log.write(CANDUMP_LOG)
+        try:
+            with CanCommunicatorSocketCan(channel="vcan0", support_fd=False) as sender, \
+                    CanCommunicatorSocketCan(channel="vcan0", support_fd=False) as receiver:
+                result = CanLogReplay(can_communicator=sender).replay(log_file)
+                received = receiver.sniff(sniff_time=0.1)
+        finally:
+            os.remove(log_file)
+        self.assertEqual(result.frames_sent, 4)
+        self.assertEqual([msg.arbitration_id for msg in received], [0x123, 0x456, 0x123, 0x789])
+        self.assertLess(result.timing_error.p99, 0.001)
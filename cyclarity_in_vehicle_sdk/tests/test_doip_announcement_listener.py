@@ -0,0 +1,96 @@
+import socket
+import time
+from unittest import TestCase, mock
+
+from doipclient import messages
+
+from cyclarity_in_vehicle_sdk.plugin.doip_monitor.doip_announcement_listener import DoipAnnouncementListener
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import pack_message
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_models import DoipEntityEventType
+
+VIN = "WVWZZZ1JZXW000001"
+GATEWAY_EID = b"\x00\x01\x02\x03\x04\x05"
+GATEWAY_IP = "192.168.1.20"
+
+
+def announcement(logical_address: int = 0x1000, eid: bytes = GATEWAY_EID) -> bytes:
+    return pack_message(messages.VehicleIdentificationResponse(VIN, logical_address, eid, bytes(6), 0))
+
+
+class DoipAnnouncementListenerUTs(TestCase):
+    def setUp(self):
+        self.notifier = mock.Mock()
+        self.listener = DoipAnnouncementListener(if_names=["eth0"])
+        self.listener.set_notifier(self.notifier, mock.Mock())
+
+    def _event_types(self) -> list[DoipEntityEventType]:
+        return [event.event_type for event in self.listener.get_events()]
+
+    def test_registry(self):
+        # an announcement burst at power up
+        for timestamp in (100.0, 100.5, 101.0):
+            self.listener.process_datagram(announcement(), GATEWAY_IP, "eth0", timestamp)
+        record = self.listener.process_datagram(announcement(0x1001, bytes(6)), "192.168.1.21", "eth0", 101.2)
+        self.assertEqual(record.first_seen, 101.2)
+        self.assertIsNone(self.listener.process_datagram(pack_message(messages.VehicleIdentificationRequest()), "192.168.1.10", "eth0"))
+        self.assertIsNone(self.listener.process_datagram(b"\x02\xFD", GATEWAY_IP, "eth0"))
+
+        self.assertEqual(self._event_types(), [DoipEntityEventType.NEW_ENTITY] * 2)
+        self.assertEqual(self.notifier.call_count, 2)
+        gateway = self.listener.get_entity(0x1000)
+        self.assertEqual((gateway.first_seen, gateway.last_seen, gateway.messages_received), (100.0, 101.0, 3))
+        self.assertEqual(gateway.identification.eid, GATEWAY_EID.hex())
+        self.assertIsNone(self.listener.get_entity(0x1FFF))
+        self.assertEqual(len(self.listener.get_entities()), 2)
+        self.assertEqual(self.listener.get_entities(max_age=60), [])
+        self.assertEqual(len(self.listener.get_events(clear=True)), 2)
+        self.assertEqual(self.listener.get_events(), [])
+
+    def test_reboot_and_logical_address_change(self):
+        for timestamp in (100.0, 100.5, 101.0):
+            self.listener.process_datagram(announcement(), GATEWAY_IP, "eth0", timestamp)
+        # a single identification response is not a reboot
+        self.listener.process_datagram(announcement(), GATEWAY_IP, "eth0", 150.0)
+        self.assertEqual(self._event_types(), [DoipEntityEventType.NEW_ENTITY])
+        # a new announcement burst, after a reboot with another logical address
+        for timestamp in (200.0, 200.5, 201.0):
+            self.listener.process_datagram(announcement(0x1010), GATEWAY_IP, "eth0", timestamp)
+        events = self.listener.get_events()
+        self.assertEqual([event.event_type for event in events],
+                         [DoipEntityEventType.NEW_ENTITY, DoipEntityEventType.LOGICAL_ADDRESS_CHANGED, DoipEntityEventType.REBOOT])
+        self.assertEqual(events[1].previous_logical_address, 0x1000)
+        self.assertEqual(events[1].entity.identification.target_address, 0x1010)
+        self.assertEqual(events[2].entity.reboots, 1)
+        self.assertIsNone(self.listener.get_entity(0x1000))
+        self.assertEqual(self.listener.get_entity(0x1010).messages_received, 7)
+
+    def test_responses_are_not_a_reboot(self):
+        for timestamp in (100.0, 100.5, 101.0):
+            self.listener.process_datagram(announcement(), GATEWAY_IP, "eth0", timestamp)
+        # responses to identification requests sent back to back
+        for timestamp in (150.0, 150.002, 160.0, 160.002, 160.004, 160.006):
+            self.listener.process_datagram(announcement(), GATEWAY_IP, "eth0", timestamp)
+        self.assertEqual(self._event_types(), [DoipEntityEventType.NEW_ENTITY])
+        self.assertEqual(self.listener.get_entity(0x1000).reboots, 0)
+
+    def test_listen(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        listener = DoipAnnouncementListener(if_names=["lo"], port=port, poll_interval=0.02)
+        try:
+            listener.setup()
+        except PermissionError:
+            self.skipTest("binding to a device requires CAP_NET_RAW")
+        self.addCleanup(listener.teardown)
+        listener.start()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(announcement(), ("127.0.0.1", port))
+        deadline = time.time() + 2
+        while not listener.get_entities() and time.time() < deadline:
+            time.sleep(0.01)
+        entities = listener.get_entities(max_age=60)
+        self.assertEqual(len(entities), 1)
+        self.assertEqual((entities[0].ip_address, entities[0].if_name), ("127.0.0.1", "lo"))
+        listener.teardown()
+        self.assertIsNone(listener._thread)
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from doipclient import DoIPClient, messages
+from doipclient.client import Parser
+
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import DEFAULT_PROTOCOL_VERSION, pack_diagnostic_message, pack_message, unpack_frame
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec_benchmark import DoipCodecBenchmark
+
+CLIENT_ADDRESS = 0x0E80
+TARGET_ADDRESS = 0x1001
+
+
+def doipclient_pack(message: messages.DoIPMessage) -> bytes:
+    return DoIPClient._pack_doip(DEFAULT_PROTOCOL_VERSION, messages.payload_message_to_type[type(message)], message.pack())
+
+
+class DoipCodecUTs(TestCase):
+    def setUp(self):
+        self.messages = [
+            messages.DiagnosticMessage(CLIENT_ADDRESS, TARGET_ADDRESS, b"\x22\xF1\x90"),
+            messages.DiagnosticMessagePositiveAcknowledgement(TARGET_ADDRESS, CLIENT_ADDRESS, 0, b"\x22\xF1\x90"),
+            messages.DiagnosticMessageNegativeAcknowledgement(TARGET_ADDRESS, CLIENT_ADDRESS, 3, b""),
+            messages.AliveCheckRequest(),
+            messages.AliveCheckResponse(CLIENT_ADDRESS),
+            messages.RoutingActivationResponse(CLIENT_ADDRESS, TARGET_ADDRESS, 0x10),
+        ]
+
+    def test_pack_matches_doipclient(self):
+        for message in self.messages:
+            self.assertEqual(pack_message(message), doipclient_pack(message), type(message).__name__)
+        self.assertEqual(pack_diagnostic_message(CLIENT_ADDRESS, TARGET_ADDRESS, b"\x3E\x00", protocol_version=0x03),
+                         DoIPClient._pack_doip(0x03, 0x8001, b"\x0E\x80\x10\x01\x3E\x00"))
+
+    def test_unpack_matches_doipclient(self):
+        for message in self.messages:
+            data = doipclient_pack(message)
+            expected = Parser().read_message(data)
+            unpacked = unpack_frame(data)
+            self.assertIs(type(unpacked), type(expected))
+            self.assertEqual(pack_message(unpacked), data, type(message).__name__)
+
+    def test_unpack_from_memoryview(self):
+        data = bytearray(pack_message(self.messages[0]) + pack_message(self.messages[1]))
+        with memoryview(data) as view:
+            unpacked = unpack_frame(view)
+        self.assertEqual(unpacked.user_data, b"\x22\xF1\x90")
+        # the receive buffer is not referenced by the message
+        data.clear()
+        self.assertEqual(unpacked.user_data, b"\x22\xF1\x90")
+
+    def test_unpack_invalid_frame(self):
+        data = pack_message(self.messages[0])
+        self.assertIsNone(unpack_frame(data[:5]))
+        self.assertIsNone(unpack_frame(data[:-1]))
+        self.assertIsNone(unpack_frame(b"\x02\x02" + data[2:]))
+
+    def test_benchmark(self):
+        result = DoipCodecBenchmark(iterations=2000).run()
+        self.assertLess(result.fast_parse_ns, result.doipclient_parse_ns)
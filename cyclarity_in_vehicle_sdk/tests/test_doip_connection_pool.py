@@ -0,0 +1,137 @@
+import threading
+import time
+from unittest import mock
+
+from doipclient import messages
+
+from cyclarity_in_vehicle_sdk.communication.ip.base.ip_communicator_base import IpVersion
+from cyclarity_in_vehicle_sdk.communication.ip.raw.raw_socket import Layer3RawSocket
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_connection_pool import DoipConnectionPool
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_utils import DoipUtils, RoutingActivationResponse
+from cyclarity_in_vehicle_sdk.tests.doip_fakes import CLIENT_ADDRESS, FakeGatewayTestCase
+
+SOURCE_IP = "192.168.1.10"
+TARGET_IP = "192.168.1.20"
+
+
+class DoipConnectionPoolUTs(FakeGatewayTestCase):
+    def test_hits_and_misses(self):
+        pool = DoipConnectionPool(keepalive_interval=None)
+        first = pool.acquire(SOURCE_IP, TARGET_IP)
+        pool.release(first)
+        second = pool.acquire(SOURCE_IP, TARGET_IP)
+        pool.release(second)
+        other = pool.acquire(SOURCE_IP, "192.168.1.21")
+        pool.release(other)
+        self.assertIs(first, second)
+        statistics = pool.get_statistics()
+        self.assertEqual((statistics.hits, statistics.misses, statistics.open_connections), (1, 2, 2))
+        # lookups do not probe the sockets
+        self.mocks["is_open"].assert_not_called()
+        pool.close()
+        self.assertEqual(pool.get_statistics().open_connections, 0)
+
+    def test_failed_connection_is_reconnected(self):
+        pool = DoipConnectionPool(keepalive_interval=None)
+        connection = pool.acquire(SOURCE_IP, TARGET_IP)
+        pool.release(connection, failed=True)
+        self.assertIsNot(pool.acquire(SOURCE_IP, TARGET_IP), connection)
+        statistics = pool.get_statistics()
+        self.assertEqual((statistics.misses, statistics.reconnects), (2, 1))
+
+    def test_max_size_and_idle_eviction(self):
+        pool = DoipConnectionPool(max_size=2, idle_timeout=0.1, keepalive_interval=None)
+        first = pool.acquire(SOURCE_IP, "192.168.1.21")
+        second = pool.acquire(SOURCE_IP, "192.168.1.22")
+        with self.assertRaises(RuntimeError):
+            pool.acquire(SOURCE_IP, "192.168.1.23")
+        pool.release(first)
+        pool.acquire(SOURCE_IP, "192.168.1.23")
+        self.assertEqual(pool.get_statistics().evictions, 1)
+        pool.release(second)
+        time.sleep(0.2)
+        pool.acquire(SOURCE_IP, "192.168.1.24")
+        statistics = pool.get_statistics()
+        # the third connection is still in use
+        self.assertEqual((statistics.evictions, statistics.open_connections), (2, 2))
+
+    def test_routing_activation_is_reused(self):
+        doip_utils = DoipUtils(raw_socket=Layer3RawSocket(if_name="lo", ip_version=IpVersion.IPv4),
+                               connection_pool=DoipConnectionPool(keepalive_interval=None))
+        for _ in range(3):
+            response = doip_utils.initiate_routing_activation_req(source_address=SOURCE_IP, target_address=TARGET_IP,
+                                                                  client_logical_address=CLIENT_ADDRESS, timeout=1)
+            self.assertEqual(response.response_code, RoutingActivationResponse.ResponseCode.Success)
+        self.assertEqual(len(self.gateway.sent(messages.RoutingActivationRequest)), 1)
+        statistics = doip_utils.connection_pool.get_statistics()
+        self.assertEqual((statistics.hits, statistics.misses, statistics.routing_activations_reused), (2, 1, 2))
+        # another client logical address is another connection
+        doip_utils.initiate_routing_activation_req(source_address=SOURCE_IP, target_address=TARGET_IP,
+                                                   client_logical_address=CLIENT_ADDRESS + 1, timeout=1)
+        self.assertEqual(len(self.gateway.sent(messages.RoutingActivationRequest)), 2)
+
+    def test_keepalive(self):
+        pool = DoipConnectionPool(keepalive_interval=0.02)
+        pool.open()
+        self.addCleanup(pool.close)
+        pool.release(pool.acquire(SOURCE_IP, TARGET_IP, client_logical_address=CLIENT_ADDRESS))
+        self.gateway.push(messages.AliveCheckRequest())
+        deadline = time.time() + 2
+        while not self.gateway.sent(messages.AliveCheckResponse) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.gateway.sent(messages.AliveCheckResponse)[0].source_address, CLIENT_ADDRESS)
+
+        self.gateway.connected = False
+        while pool.get_statistics().open_connections and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pool.get_statistics().open_connections, 0)
+        pool.release(pool.acquire(SOURCE_IP, TARGET_IP, client_logical_address=CLIENT_ADDRESS))
+        self.assertEqual(pool.get_statistics().reconnects, 1)
+
+    def test_connect_is_outside_of_the_lock(self):
+        pool = DoipConnectionPool(keepalive_interval=None)
+        connecting = threading.Event()
+        proceed = threading.Event()
+
+        def connect(communicator):
+            if str(communicator.destination_ip) == "192.168.1.21":
+                connecting.set()
+                proceed.wait(2)
+            return True
+        self.mocks["connect"].side_effect = connect
+        slow = threading.Thread(target=pool.acquire, args=(SOURCE_IP, "192.168.1.21"))
+        slow.start()
+        self.addCleanup(slow.join)
+        self.addCleanup(proceed.set)
+        self.assertTrue(connecting.wait(2))
+        # another target is connected while the first connect is in progress
+        pool.release(pool.acquire(SOURCE_IP, TARGET_IP))
+        self.assertFalse(proceed.is_set())
+        proceed.set()
+        slow.join()
+        self.assertEqual(pool.get_statistics().open_connections, 2)
+
+    def test_keepalive_is_outside_of_the_lock(self):
+        pool = DoipConnectionPool(keepalive_interval=0.01)
+        checking = threading.Event()
+        proceed = threading.Event()
+
+        def keep_alive(pool, connection):
+            checking.set()
+            proceed.wait(2)
+            return False
+        with mock.patch.object(DoipConnectionPool, "_keep_alive", autospec=True, side_effect=keep_alive):
+            first = pool.acquire(SOURCE_IP, TARGET_IP)
+            pool.release(first)
+            pool.open()
+            self.addCleanup(pool.close)
+            self.addCleanup(proceed.set)
+            self.assertTrue(checking.wait(2))
+            # acquiring another connection is not blocked by the keepalive
+            pool.release(pool.acquire(SOURCE_IP, "192.168.1.21"))
+            self.assertFalse(proceed.is_set())
+            # acquiring the checked connection waits for the keepalive, which found it closed
+            threading.Timer(0.05, proceed.set).start()
+            second = pool.acquire(SOURCE_IP, TARGET_IP)
+        self.assertIsNot(second, first)
+        self.assertEqual(pool.get_statistics().reconnects, 1)
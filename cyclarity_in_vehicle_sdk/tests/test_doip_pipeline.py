@@ -0,0 +1,221 @@
+import threading
+from unittest import mock
+
+from doipclient import messages
+
+from cyclarity_in_vehicle_sdk.communication.doip.doip_session import DoipSession
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_logical_address_scanner import DoipLogicalAddressScanner
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_models import DoipLogicalAddressStatus
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_pipeline import DoipNegativeAcknowledgeError, DoipPipeline
+from cyclarity_in_vehicle_sdk.protocol.uds.impl.uds_utils import UdsUtils
+from cyclarity_in_vehicle_sdk.protocol.uds.models.uds_models import UdsSid
+from cyclarity_in_vehicle_sdk.tests.doip_fakes import CLIENT_ADDRESS, PENDING_ADDRESS, SILENT_ADDRESS, UNKNOWN_ADDRESS, UNREACHABLE_ADDRESS, FakeGatewayTestCase
+
+
+class DoipPipelineUTs(FakeGatewayTestCase):
+    def _pipeline(self, **kwargs) -> DoipPipeline:
+        pipeline = DoipPipeline(tcp_communicator=TcpCommunicator(destination_ip="127.0.0.1", dport=13400, source_ip="127.0.0.1", sport=0),
+                                client_logical_address=CLIENT_ADDRESS,
+                                routing_activation_needed=False,
+                                **kwargs)
+        self.assertTrue(pipeline.open())
+        self.addCleanup(pipeline.close)
+        return pipeline
+
+    def test_responses_out_of_order(self):
+        self.gateway.release_after = 3
+        pipeline = self._pipeline()
+        futures = {target: pipeline.submit(b"\x3E\x00", target) for target in (0x1001, 0x1002, 0x1003)}
+        for target, future in futures.items():
+            self.assertEqual(future.result(timeout=2), b"\x7E" + target.to_bytes(2, "big"))
+
+    def test_serialized_per_target(self):
+        pipeline = self._pipeline()
+        first = pipeline.submit(b"\x22\xF1\x90", 0x1001)
+        second = pipeline.submit(b"\x22\xF1\x91", 0x1001)
+        self.assertEqual(first.result(timeout=2), b"\x62\x10\x01")
+        self.assertEqual(second.result(timeout=2), b"\x62\x10\x01")
+        diagnostic_messages = self.gateway.sent(messages.DiagnosticMessage)
+        self.assertEqual([bytes(message.user_data) for message in diagnostic_messages], [b"\x22\xF1\x90", b"\x22\xF1\x91"])
+
+    def test_window(self):
+        pipeline = self._pipeline(window=2, serialize_per_target=False)
+        futures = [pipeline.submit(b"\x3E\x00", SILENT_ADDRESS, timeout=0.3) for _ in range(3)]
+        self.assertEqual(pipeline.in_flight(), 2)
+        for future in futures:
+            with self.assertRaises(TimeoutError):
+                future.result(timeout=2)
+
+    def test_negative_acknowledge(self):
+        pipeline = self._pipeline()
+        with self.assertRaises(DoipNegativeAcknowledgeError) as context:
+            pipeline.submit(b"\x3E\x00", UNKNOWN_ADDRESS).result(timeout=2)
+        self.assertEqual(context.exception.nack_code, 3)
+        self.assertIsNone(pipeline.request(b"\x3E\x00", UNKNOWN_ADDRESS))
+
+    def test_response_pending(self):
+        pipeline = self._pipeline()
+        callback = mock.Mock()
+        acknowledge_callback = mock.Mock()
+        future = pipeline.submit(b"\x31\x01", PENDING_ADDRESS, callback=callback, acknowledge_callback=acknowledge_callback)
+        self.assertEqual(future.result(timeout=2), b"\x71" + PENDING_ADDRESS.to_bytes(2, "big"))
+        callback.assert_called_once_with(future)
+        acknowledge_callback.assert_called_once_with()
+
+    def test_alive_check(self):
+        pipeline = self._pipeline()
+        self.gateway.push(messages.AliveCheckRequest())
+        self.assertEqual(pipeline.request(b"\x3E\x00", 0x1001), b"\x7E\x10\x01")
+        alive_check_responses = self.gateway.sent(messages.AliveCheckResponse)
+        self.assertEqual(len(alive_check_responses), 1)
+        self.assertEqual(alive_check_responses[0].source_address, CLIENT_ADDRESS)
+
+    def test_close_fails_pending_requests(self):
+        pipeline = self._pipeline()
+        future = pipeline.submit(b"\x3E\x00", SILENT_ADDRESS, timeout=10)
+        pipeline.close()
+        with self.assertRaises(ConnectionError):
+            future.result(timeout=1)
+        with self.assertRaises(RuntimeError):
+            pipeline.submit(b"\x3E\x00", 0x1001)
+
+    def test_receive_failure_fails_all_requests(self):
+        pipeline = self._pipeline(window=1)
+        in_flight = pipeline.submit(b"\x3E\x00", SILENT_ADDRESS, timeout=10)
+        queued = pipeline.submit(b"\x3E\x00", 0x1001, timeout=10)
+        self.gateway.recv_error = ConnectionResetError("Connection reset by peer")
+        for future in (in_flight, queued):
+            with self.assertRaises(ConnectionError):
+                future.result(timeout=2)
+        # requests are refused once the connection is lost, instead of being queued forever
+        callback = mock.Mock()
+        future = pipeline.submit(b"\x3E\x00", 0x1001, callback=callback)
+        self.assertIsInstance(future.exception(timeout=0), ConnectionError)
+        callback.assert_called_once_with(future)
+
+    def test_cancel(self):
+        pipeline = self._pipeline(window=1)
+        in_flight = pipeline.submit(b"\x3E\x00", SILENT_ADDRESS, timeout=0.2)
+        queued = pipeline.submit(b"\x3E\x00", 0x1001)
+        # a request that was sent is no longer cancellable
+        self.assertFalse(in_flight.cancel())
+        self.assertTrue(queued.cancel())
+        with self.assertRaises(TimeoutError):
+            in_flight.result(timeout=2)
+        self.assertEqual(pipeline.request(b"\x3E\x00", 0x1002), b"\x7E\x10\x02")
+        diagnostic_messages = self.gateway.sent(messages.DiagnosticMessage)
+        self.assertEqual([message.target_address for message in diagnostic_messages], [SILENT_ADDRESS, 0x1002])
+
+    def test_failing_callback(self):
+        pipeline = self._pipeline()
+        future = pipeline.submit(b"\x3E\x00", 0x1001, acknowledge_callback=mock.Mock(side_effect=ValueError("callback failed")))
+        self.assertEqual(future.result(timeout=2), b"\x7E\x10\x01")
+        self.assertEqual(pipeline.request(b"\x3E\x00", 0x1002), b"\x7E\x10\x02")
+
+
+class DoipSessionUTs(FakeGatewayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = DoipSession(tcp_communicator=TcpCommunicator(destination_ip="127.0.0.1", dport=13400, source_ip="127.0.0.1", sport=0),
+                                   client_logical_address=CLIENT_ADDRESS,
+                                   routing_activation_needed=False)
+        self.assertTrue(self.session.open())
+        self.addCleanup(self.session.close)
+
+    def _uds_utils(self, target_logical_address: int) -> UdsUtils:
+        uds_utils = UdsUtils(data_link_layer=self.session.create_target(target_logical_address))
+        self.assertTrue(uds_utils.setup())
+        self.addCleanup(uds_utils.teardown)
+        return uds_utils
+
+    def test_targets_share_the_connection(self):
+        uds_utils = {target: self._uds_utils(target) for target in (0x1001, 0x1002, 0x1003)}
+        for target, utils in uds_utils.items():
+            response = utils.raw_uds_service(sid=UdsSid.TesterPresent, sub_function=0, timeout=1)
+            self.assertEqual(response.data, target.to_bytes(2, "big"))
+        TcpCommunicator.open.assert_called_once()
+        TcpCommunicator.close.assert_not_called()
+
+    def test_response_pending_is_forwarded(self):
+        uds_utils = self._uds_utils(PENDING_ADDRESS)
+        response = uds_utils.raw_uds_service(sid=UdsSid.RoutineControl, sub_function=1, data=b"\x02\x00", timeout=1)
+        self.assertTrue(response.positive)
+
+    def test_no_response(self):
+        target = self.session.create_target(SILENT_ADDRESS, response_timeout=0.2)
+        target.open()
+        self.assertEqual(target.send(b"\x3E\x00"), 2)
+        self.assertEqual(target.recv(recv_timeout=0.5), bytes())
+        target.close()
+        with self.assertRaises(RuntimeError):
+            target.send(b"\x3E\x00")
+
+    def test_late_response_is_dropped(self):
+        self.gateway.release_after = 2
+        target = self.session.create_target(0x1001)
+        target.open()
+        self.assertEqual(target.send(b"\x22\xF1\x90"), 3)
+        # the caller gives up on the request, the next request is sent once the late response arrives
+        self.assertEqual(target.recv(recv_timeout=0.05), bytes())
+        self.assertEqual(target.send(b"\x3E\x00"), 2)
+        self.gateway.release()
+        self.assertEqual(target.recv(recv_timeout=0.2), bytes())
+        self.gateway.release()
+        self.assertEqual(target.recv(recv_timeout=1), b"\x7E\x10\x01")
+
+    def test_queued_request_is_abandoned(self):
+        self.gateway.release_after = 2
+        target = self.session.create_target(0x1001)
+        target.open()
+        target.send(b"\x22\xF1\x90")
+        target.send(b"\x22\xF1\x91")
+        self.assertEqual(target.send(b"\x3E\x00"), 2)
+        self.gateway.release()
+        self.assertEqual(target.recv(recv_timeout=0.2), bytes())
+        self.gateway.release()
+        self.assertEqual(target.recv(recv_timeout=1), b"\x7E\x10\x01")
+        diagnostic_messages = self.gateway.sent(messages.DiagnosticMessage)
+        self.assertEqual([bytes(message.user_data) for message in diagnostic_messages], [b"\x22\xF1\x90", b"\x3E\x00"])
+
+
+class DoipLogicalAddressScannerUTs(FakeGatewayTestCase):
+    def test_scan(self):
+        self.gateway.known_addresses = {0x1001, 0x1010, SILENT_ADDRESS, PENDING_ADDRESS, UNREACHABLE_ADDRESS}
+        scanner = DoipLogicalAddressScanner(tcp_communicator=TcpCommunicator(destination_ip="127.0.0.1", dport=13400, source_ip="127.0.0.1", sport=0),
+                                            client_logical_address=CLIENT_ADDRESS,
+                                            target_addresses="1000-10FF,1CCC,1DDD,1EEE",
+                                            routing_activation_needed=False,
+                                            window=4,
+                                            response_timeout=0.2)
+        result = scanner.scan()
+        self.assertEqual(result.addresses_scanned, 0x100 + 3)
+        self.assertEqual(result.status_counts, {DoipLogicalAddressStatus.RESPONDED: 3,
+                                                DoipLogicalAddressStatus.ACKNOWLEDGED: 1,
+                                                DoipLogicalAddressStatus.UNKNOWN_TARGET: 0x100 - 2,
+                                                DoipLogicalAddressStatus.REJECTED: 1,
+                                                DoipLogicalAddressStatus.NO_ANSWER: 0})
+        probes = {probe.logical_address: probe for probe in result.probes}
+        self.assertEqual(list(probes), [0x1001, 0x1010, UNREACHABLE_ADDRESS, PENDING_ADDRESS, SILENT_ADDRESS])
+        self.assertEqual(probes[0x1001].uds_response, "7e1001")
+        self.assertLessEqual(probes[0x1001].ack_latency, probes[0x1001].response_latency)
+        self.assertEqual((probes[UNREACHABLE_ADDRESS].status, probes[UNREACHABLE_ADDRESS].nack_code), (DoipLogicalAddressStatus.REJECTED, 6))
+        self.assertEqual(probes[SILENT_ADDRESS].status, DoipLogicalAddressStatus.ACKNOWLEDGED)
+        self.assertIsNotNone(probes[SILENT_ADDRESS].ack_latency)
+        self.assertGreater(result.scan_rate, 0)
+        # a single connection for the whole scan
+        TcpCommunicator.connect.assert_called_once()
+
+    def test_connection_lost(self):
+        self.gateway.recv_error = ConnectionResetError("Connection reset by peer")
+        scanner = DoipLogicalAddressScanner(tcp_communicator=TcpCommunicator(destination_ip="127.0.0.1", dport=13400, source_ip="127.0.0.1", sport=0),
+                                            client_logical_address=CLIENT_ADDRESS,
+                                            target_addresses="1000-10FF",
+                                            routing_activation_needed=False,
+                                            window=4)
+        results = []
+        scan_thread = threading.Thread(target=lambda: results.append(scanner.scan()), daemon=True)
+        scan_thread.start()
+        scan_thread.join(timeout=5)
+        self.assertFalse(scan_thread.is_alive())
+        self.assertLess(results[0].addresses_scanned, 0x100)
@@ -0,0 +1,65 @@
+from unittest import TestCase, mock
+
+from doipclient import messages
+
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_utils import DoipUtils
+
+CLIENT_ADDRESS = 0x0E80
+TARGET_ADDRESS = 0x1001
+
+
+def pack(message: messages.DoIPMessage) -> bytes:
+    return DoipUtils._pack_doip_message(message)
+
+
+class DoipStreamReaderUTs(TestCase):
+    def setUp(self):
+        self.communicator = mock.MagicMock(spec=TcpCommunicator)
+        self.communicator._socket = object()
+        self.communicator.send.side_effect = lambda data, timeout=None: len(data)
+        self.ack = pack(messages.DiagnosticMessagePositiveAcknowledgement(TARGET_ADDRESS, CLIENT_ADDRESS, 0, b""))
+        self.response = pack(messages.DiagnosticMessage(TARGET_ADDRESS, CLIENT_ADDRESS, b"\x62\xF1\x90" + bytes(17)))
+
+    def _segments(self, *segments: bytes):
+        self.communicator.recv.side_effect = list(segments) + [b""] * 10
+
+    def _send_request(self) -> int:
+        return DoipUtils.send_uds_request(logger=mock.Mock(), communicator=self.communicator, payload=b"\x22\xF1\x90",
+                                          client_logical_address=CLIENT_ADDRESS, target_logical_address=TARGET_ADDRESS, timeout=1)
+
+    def test_acknowledgement_and_response_in_one_segment(self):
+        self._segments(self.ack + self.response)
+        self.assertTrue(self._send_request())
+        self.assertEqual(DoipUtils.read_uds_response(self.communicator, timeout=1), b"\x62\xF1\x90" + bytes(17))
+        self.assertEqual(self.communicator.recv.call_count, 1)
+
+    def test_message_split_across_segments(self):
+        data = self.ack + self.response
+        self._segments(data[:5], data[5:20], data[20:])
+        self._send_request()
+        self.assertEqual(DoipUtils.read_uds_response(self.communicator, timeout=1), b"\x62\xF1\x90" + bytes(17))
+        self.assertEqual(DoipUtils.get_stream_reader(self.communicator).pending(), 0)
+
+    def test_response_before_acknowledgement(self):
+        self._segments(self.response, self.ack)
+        self._send_request()
+        self.assertEqual(DoipUtils.read_uds_response(self.communicator, timeout=1), b"\x62\xF1\x90" + bytes(17))
+        self.assertEqual(self.communicator.recv.call_count, 2)
+
+    def test_reader_is_per_connection(self):
+        stream_reader = DoipUtils.get_stream_reader(self.communicator)
+        stream_reader.feed(self.response[:10])
+        self.assertIs(DoipUtils.get_stream_reader(self.communicator), stream_reader)
+        # a reconnection replaces the socket, the partial message must not be resumed
+        self.communicator._socket = object()
+        self._segments(self.response)
+        self.assertIsNot(DoipUtils.get_stream_reader(self.communicator), stream_reader)
+        self.assertEqual(DoipUtils.read_uds_response(self.communicator, timeout=1), b"\x62\xF1\x90" + bytes(17))
+
+    def test_bad_header_and_generic_nack(self):
+        stream_reader = DoipUtils.get_stream_reader(self.communicator)
+        self.assertEqual(stream_reader.feed(b"\x02\x02" + self.response[2:]), 0)
+        self._segments(pack(messages.GenericDoIPNegativeAcknowledge(messages.GenericDoIPNegativeAcknowledge.NackCodes.UnknownPayloadType)))
+        self.assertIsNone(DoipUtils.read_uds_response(self.communicator, timeout=1))
+        self.assertEqual(stream_reader.pending(), 0)
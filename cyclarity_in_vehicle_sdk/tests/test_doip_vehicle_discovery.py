@@ -0,0 +1,93 @@
+from ipaddress import ip_address
+from unittest import TestCase
+
+from doipclient import messages
+from py_pcapplusplus import LayerType
+
+from cyclarity_in_vehicle_sdk.communication.ip.base.ip_communicator_base import IpVersion
+from cyclarity_in_vehicle_sdk.communication.ip.raw.raw_socket import Layer3RawSocket
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_codec import pack_message
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_vehicle_discovery import DoipDiscoveryInterface, DoipVehicleDiscovery
+from cyclarity_in_vehicle_sdk.tests.doip_fakes import patch_methods
+from cyclarity_in_vehicle_sdk.utils.custom_types.range_set import DecNumberRangeSet
+
+SOURCE_PORT = 13400
+VIN = "WVWZZZ1JZXW000001"
+
+
+class FakeLayer():
+    def __init__(self, data: bytes = b"", **attributes):
+        self.data = data
+        self.__dict__.update(attributes)
+
+    def __bytes__(self):
+        return self.data
+
+
+class FakePacket():
+    def __init__(self, src_ip: str, message: messages.DoIPMessage, dst_port: int = SOURCE_PORT):
+        self.layers = {LayerType.IPv4Layer: FakeLayer(src_ip=src_ip),
+                       LayerType.UdpLayer: FakeLayer(dst_port=dst_port),
+                       LayerType.PayloadLayer: FakeLayer(pack_message(message))}
+
+    def get_layer(self, layer_type: LayerType):
+        return self.layers.get(layer_type)
+
+
+def identification(logical_address: int, eid: bytes, vin: str = VIN) -> messages.VehicleIdentificationResponse:
+    return messages.VehicleIdentificationResponse(vin, logical_address, eid, bytes(6), 0)
+
+
+class DoipVehicleDiscoveryUTs(TestCase):
+    def setUp(self):
+        self.sent_targets: dict[str, list[str]] = {}
+        self.responses: dict[str, list[FakePacket]] = {}
+        # not a mock, as the recorded calls would keep the packets alive after their layers
+        def send_receive_packets(raw_socket: Layer3RawSocket, packets, is_answer, timeout):
+            self.sent_targets[raw_socket.if_name] = [packet.get_layer(LayerType.IPv4Layer).dst_ip for packet in packets]
+            return [packet for packet in self.responses.get(raw_socket.if_name, []) if is_answer(packet)]
+        patch_methods(self, Layer3RawSocket,
+                      open={"return_value": True},
+                      close={"return_value": True},
+                      is_open={"return_value": False},
+                      send_receive_packets={"new": send_receive_packets})
+
+    def _interface(self, if_name: str, source_address: str, **kwargs) -> DoipDiscoveryInterface:
+        return DoipDiscoveryInterface(raw_socket=Layer3RawSocket(if_name=if_name, ip_version=IpVersion.IPv4),
+                                      source_address=source_address,
+                                      source_port=SOURCE_PORT,
+                                      **kwargs)
+
+    def test_target_addresses(self):
+        interface = self._interface("eth0", "192.168.1.10", hosts=DecNumberRangeSet("1-20"), targets=["10.0.0.1", "192.168.1.5"])
+        addresses = interface.get_target_addresses()
+        self.assertEqual(addresses[0], ip_address("192.168.1.255"))
+        self.assertNotIn(ip_address("192.168.1.10"), addresses)
+        self.assertEqual(len(addresses), 1 + 19 + 1)
+        self.assertEqual(addresses[-1], ip_address("10.0.0.1"))
+        with self.assertRaises(ValueError):
+            self._interface("eth0", "192.168.1.10", hosts=DecNumberRangeSet("250-256")).get_target_addresses()
+
+    def test_discovery_over_interfaces(self):
+        gateway = identification(0x1000, b"\x00\x01\x02\x03\x04\x05")
+        self.responses = {
+            # the gateway answers both the broadcast and the unicast requests
+            "eth0": [FakePacket("192.168.1.20", gateway), FakePacket("192.168.1.20", gateway),
+                     FakePacket("192.168.1.21", identification(0x1001, b"\x00\x01\x02\x03\x04\x06")),
+                     FakePacket("192.168.1.22", messages.EntityStatusResponse(0, 1, 0)),
+                     FakePacket("192.168.1.23", identification(0x1002, bytes(6)), dst_port=SOURCE_PORT + 1)],
+            "eth1": [FakePacket("10.0.0.20", gateway)],
+        }
+        discovery = DoipVehicleDiscovery(interfaces=[self._interface("eth0", "192.168.1.10", hosts=DecNumberRangeSet("1-254")),
+                                                     self._interface("eth1", "10.0.0.10", network_prefix=16, broadcast=True)],
+                                         response_window=0.1)
+        result = discovery.run()
+        self.assertEqual(result.requests_sent, 254 + 1)
+        self.assertEqual(self.sent_targets["eth1"], ["10.0.255.255"])
+        self.assertEqual(result.responses_received, 4)
+        self.assertEqual(len(result.entities), 2)
+        gateway_entity = next(entity for entity in result.entities if entity.identification.target_address == 0x1000)
+        self.assertEqual(gateway_entity.ip_addresses, ["192.168.1.20", "10.0.0.20"])
+        self.assertEqual(gateway_entity.if_names, ["eth0", "eth1"])
+        self.assertEqual(gateway_entity.identification.eid, "000102030405")
+        Layer3RawSocket.close.assert_called()
@@ -0,0 +1,85 @@
+import threading
+import time
+from unittest import TestCase, mock
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import AddressingMode
+from cyclarity_in_vehicle_sdk.protocol.isotp.impl.isotp_address_scanner import IsoTpAddressScanner
+from cyclarity_in_vehicle_sdk.utils.custom_types.range_set import HexNumberRangeSet
+
+
+class IsoTpAddressScannerUTs(TestCase):
+    def setUp(self):
+        # emulated ECUs: (request ID, address byte) -> (response ID, address byte)
+        self.ecus = {}
+        self.pending: list[CanMessage] = []
+        self.lock = threading.Lock()
+        self.sent_count = 0
+        for name, side_effect in (("open", None), ("close", None),
+                                  ("send", self._ecu_receive), ("receive_batch", self._receive_batch)):
+            patcher = mock.patch.object(CanCommunicatorSocketCan, name, side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.can_comm = CanCommunicatorSocketCan(channel="vcan0", support_fd=False)
+
+    def _ecu_receive(self, can_msg: CanMessage, timeout=None):
+        self.sent_count += 1
+        data = bytes(can_msg.data)
+        prefix = data[0] if len(data) > 3 and data[1:4] == b"\x02\x3E\x00" else None
+        responder = self.ecus.get((can_msg.arbitration_id, prefix))
+        if responder:
+            rxid, rx_prefix = responder
+            payload = (bytes([rx_prefix]) if rx_prefix is not None else b"") + b"\x02\x7E\x00"
+            with self.lock:
+                self.pending.append(CanMessage(arbitration_id=rxid, data=payload, is_extended_id=rxid > 0x7FF))
+
+    def _receive_batch(self, max_frames=256, timeout=None):
+        with self.lock:
+            msgs, self.pending = self.pending, []
+        if not msgs and timeout:
+            time.sleep(min(timeout, 0.002))
+        # background traffic is never mistaken for a response
+        return msgs + [CanMessage(arbitration_id=0x123, data=b"\x02\x7E\x01\x00")]
+
+    def test_scan_normal_11_bits(self):
+        self.ecus = {(0x7E0, None): (0x7E8, None), (0x7E1, None): (0x7E9, None), (0x745, None): (0x7C5, None)}
+        scanner = IsoTpAddressScanner(can_communicator=self.can_comm,
+                                      candidate_ids=HexNumberRangeSet("700-7FF"),
+                                      response_timeout=0.005)
+        pairs = scanner.scan()
+        self.assertEqual(sorted((pair.txid, pair.rxid) for pair in pairs), [(0x745, 0x7C5), (0x7E0, 0x7E8), (0x7E1, 0x7E9)])
+        self.assertTrue(all(pair.support_uds for pair in pairs))
+        # the candidates are swept once, a likely pair costs a single extra probe, bisecting a batch at most its size
+        self.assertLessEqual(self.sent_count, 256 + 2 + 64)
+
+    def test_scan_extended_addressing(self):
+        self.ecus = {(0x6F1, 0x40): (0x640, 0xF1)}
+        scanner = IsoTpAddressScanner(can_communicator=self.can_comm,
+                                      addressing_mode=AddressingMode.Extended_11bits,
+                                      candidate_ids=HexNumberRangeSet("6F0-6F1"),
+                                      address_extensions=HexNumberRangeSet("00-7F"),
+                                      response_timeout=0.005)
+        pairs = scanner.scan()
+        self.assertEqual(len(pairs), 1)
+        self.assertEqual((pairs[0].txid, pairs[0].tx_address_extension, pairs[0].rxid, pairs[0].rx_address_extension),
+                         (0x6F1, 0x40, 0x640, 0xF1))
+        address = scanner.get_address(pairs[0])
+        self.assertEqual(address.get_tx_arbitration_id(), 0x6F1)
+        self.assertEqual(address.get_tx_payload_prefix(), b"\x40")
+
+    def test_scan_29_bits(self):
+        self.ecus = {(0x18DA10F1, None): (0x18DAF110, None)}
+        scanner = IsoTpAddressScanner(can_communicator=self.can_comm,
+                                      addressing_mode=AddressingMode.Normal_29bits,
+                                      candidate_ids=HexNumberRangeSet("18DA00F1-18DA1FF1"),
+                                      batch_size=512,
+                                      response_timeout=0.005)
+        pairs = scanner.scan()
+        self.assertEqual([(pair.txid, pair.rxid) for pair in pairs], [(0x18DA10F1, 0x18DAF110)])
+
+    def test_unsupported_addressing_mode(self):
+        with self.assertRaises(ValueError):
+            IsoTpAddressScanner(can_communicator=self.can_comm,
+                                addressing_mode=AddressingMode.NormalFixed_29bits,
+                                candidate_ids=HexNumberRangeSet("0-FF"))
@@ -0,0 +1,141 @@
+from array import array
+import socket
+from unittest import TestCase, mock
+
+import can
+import isotp
+import pytest
+
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import Address, AddressingMode
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import CANFD_BRS, IsoTpCommunicator, _MemoryviewByteGenerator
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_throughput_benchmark import IsoTpThroughputBenchmark
+from cyclarity_in_vehicle_sdk.communication.isotp.models.isotp_tuning_models import ISOTP_THROUGHPUT_RESULT
+
+
+@mock.patch("cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator.isotp.socket")
+class IsoTpCommunicatorKernelSocketUTs(TestCase):
+    def _communicator(self, **kwargs) -> IsoTpCommunicator:
+        return IsoTpCommunicator(can_communicator=CanCommunicatorSocketCan(channel="vcan0", support_fd=True),
+                                 rxid=0x7E8, txid=0x7E0, use_kernel_isotp=True, **kwargs)
+
+    def test_open_maps_options(self, mocked_socket_class):
+        mocked_socket_class.flags = isotp.socket.flags
+        mocked_socket_class.LinkLayerProtocol = isotp.socket.LinkLayerProtocol
+        isotp_comm = self._communicator(padding_byte=0xCC, can_fd=True, bitrate_switch=True)
+        self.assertTrue(isotp_comm.open())
+        mocked_socket = mocked_socket_class.return_value
+        mocked_socket.set_opts.assert_called_once_with(optflag=isotp.socket.flags.WAIT_TX_DONE, txpad=0xCC, rxpad=0xCC)
+        mocked_socket.set_ll_opts.assert_called_once_with(mtu=isotp.socket.LinkLayerProtocol.CAN_FD, tx_dl=64, tx_flags=CANFD_BRS)
+        mocked_socket.bind.assert_called_once()
+        self.assertEqual(mocked_socket.bind.call_args.args[0], "vcan0")
+        isotp_comm.close()
+        mocked_socket.close.assert_called_once()
+
+    def test_send_recv(self, mocked_socket_class):
+        isotp_comm = self._communicator()
+        isotp_comm.open()
+        mocked_socket = mocked_socket_class.return_value
+        mocked_socket.send.return_value = 3
+        self.assertEqual(isotp_comm.send(b"\x22\xF1\x90"), 3)
+        mocked_socket.recv.return_value = b"\x62\xF1\x90"
+        self.assertEqual(isotp_comm.recv(recv_timeout=1), b"\x62\xF1\x90")
+        mocked_socket.recv.side_effect = socket.timeout()
+        self.assertEqual(isotp_comm.recv(recv_timeout=1), bytes())
+        mocked_socket.send.side_effect = OSError(70, "Communication error on send")
+        self.assertEqual(isotp_comm.send(b"\x3E\x00"), 0)
+
+    def test_set_address_rebinds(self, mocked_socket_class):
+        isotp_comm = self._communicator()
+        isotp_comm.open()
+        address = Address(rxid=0x18DAF110, txid=0x18DA10F1, addressing_mode=AddressingMode.Normal_29bits)
+        isotp_comm.set_address(address)
+        self.assertEqual(mocked_socket_class.call_count, 2)
+        self.assertEqual(mocked_socket_class.return_value.bind.call_args.kwargs["address"], address)
+
+
+class IsoTpCommunicatorLargePayloadUTs(TestCase):
+    def setUp(self):
+        # each CAN communicator gets its own end of a python-can virtual bus
+        self.buses = {}
+        for name, side_effect in (("open", self._open_virtual_bus), ("close", self._close_virtual_bus), ("get_bus", lambda comm: self.buses[id(comm)])):
+            patcher = mock.patch.object(CanCommunicatorSocketCan, name, autospec=True, side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _open_virtual_bus(self, comm):
+        self.buses[id(comm)] = can.Bus(interface="virtual", channel=self.id())
+
+    def _close_virtual_bus(self, comm):
+        self.buses.pop(id(comm)).shutdown()
+
+    def _peers(self, **kwargs) -> tuple[IsoTpCommunicator, IsoTpCommunicator]:
+        peers = tuple(IsoTpCommunicator(can_communicator=CanCommunicatorSocketCan(channel="vcan0", support_fd=True),
+                                        rxid=rxid, txid=txid, max_frame_size=0x10000, **kwargs)
+                      for rxid, txid in ((0x7E8, 0x7E0), (0x7E0, 0x7E8)))
+        for peer in peers:
+            peer.update_params({"stmin": 0, "blocksize": 0})
+        self.addCleanup(lambda: [peer.close() for peer in peers])
+        return peers
+
+    def test_memoryview_generator(self):
+        generator = _MemoryviewByteGenerator(memoryview(bytes(range(10))))
+        self.assertEqual(bytes(generator.consume(4)), bytes(range(4)))
+        self.assertEqual(bytes(generator.consume(8, enforce_exact=False)), bytes(range(4, 10)))
+        self.assertTrue(generator.depleted())
+        with self.assertRaises(isotp.BadGeneratorError):
+            _MemoryviewByteGenerator(memoryview(b"\x00")).consume(2)
+
+    def test_send_returns_byte_count(self):
+        sender, receiver = self._peers()
+        sender.open()
+        receiver.open()
+        payload = array("H", range(100))
+        self.assertEqual(sender.send(memoryview(payload)), 200)
+        self.assertEqual(receiver.recv(recv_timeout=1), payload.tobytes())
+
+    def test_large_payload_classic(self):
+        sender, receiver = self._peers()
+        result = IsoTpThroughputBenchmark(sender=sender, receiver=receiver, payload_size=5000, transfers=2).run()
+        self.assertEqual((result.transfers, result.failures, result.tx_data_length, result.can_fd), (2, 0, 8, False))
+
+    def test_large_payload_can_fd(self):
+        sender, receiver = self._peers(can_fd=True)
+        result = IsoTpThroughputBenchmark(sender=sender, receiver=receiver, payload_size=20000, transfers=2).run()
+        self.assertEqual((result.transfers, result.failures, result.tx_data_length, result.can_fd), (2, 0, 64, True))
+
+    def test_payload_exceeding_max_frame_size(self):
+        sender, receiver = self._peers()
+        with self.assertRaises(ValueError):
+            IsoTpThroughputBenchmark(sender=sender, receiver=receiver, payload_size=0x10001)
+
+
+@pytest.mark.skip
+class IsoTpThroughputBenchmarkVcanTests(TestCase):
+    """throughput over vcan0, set up with `ip link add dev vcan0 type vcan mtu 72 && ip link set up vcan0`
+    """
+    def _benchmark(self, use_kernel_isotp: bool, can_fd: bool) -> ISOTP_THROUGHPUT_RESULT:
+        sender, receiver = (IsoTpCommunicator(can_communicator=CanCommunicatorSocketCan(channel="vcan0", support_fd=can_fd),
+                                              rxid=rxid, txid=txid, can_fd=can_fd, use_kernel_isotp=use_kernel_isotp,
+                                              max_frame_size=0x10000)
+                            for rxid, txid in ((0x7E8, 0x7E0), (0x7E0, 0x7E8)))
+        for peer in (sender, receiver):
+            peer.update_params({"stmin": 0, "blocksize": 0})
+        try:
+            result = IsoTpThroughputBenchmark(sender=sender, receiver=receiver, payload_size=0x10000, transfers=5).run()
+        finally:
+            sender.close()
+            receiver.close()
+        self.assertEqual((result.transfers, result.failures), (5, 0))
+        self.assertGreater(result.bytes_per_second, 0)
+        return result
+
+    def test_python_stack(self):
+        classic = self._benchmark(use_kernel_isotp=False, can_fd=False)
+        fd = self._benchmark(use_kernel_isotp=False, can_fd=True)
+        self.assertGreater(fd.bytes_per_second, classic.bytes_per_second)
+
+    def test_kernel_stack(self):
+        classic = self._benchmark(use_kernel_isotp=True, can_fd=False)
+        fd = self._benchmark(use_kernel_isotp=True, can_fd=True)
+        self.assertGreater(fd.bytes_per_second, classic.bytes_per_second)
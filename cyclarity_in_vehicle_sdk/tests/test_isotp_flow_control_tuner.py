@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_communicator import IsoTpCommunicator
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_flow_control_tuner import IsoTpFlowControlTuner
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_profiles import load_profile, save_profile
+from cyclarity_in_vehicle_sdk.communication.isotp.models.isotp_tuning_models import ISOTP_FLOW_CONTROL_PROFILE
+
+
+class IsoTpFlowControlTunerUTs(TestCase):
+    def setUp(self):
+        self.profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profiles_dir.cleanup)
+        self.profiles_file = os.path.join(self.profiles_dir.name, "profiles.json")
+        self.fastest_tx_data_length = 64
+        # the stack is emulated, the transfer time depends on the parameters in use
+        for name in ("open", "close"):
+            patcher = mock.patch.object(IsoTpCommunicator, name, autospec=True, side_effect=self._set_open(name == "open"))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(IsoTpCommunicator, "send", autospec=True, side_effect=self._emulated_send)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(IsoTpCommunicator, "recv", autospec=True, side_effect=self._emulated_recv)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _set_open(is_open: bool):
+        def set_open(comm):
+            comm._active_params = comm._build_params() if is_open else None
+            comm._is_open = is_open
+            return True
+        return set_open
+
+    def _emulated_send(self, comm, data, timeout=None):
+        # the frames length paces only our sends
+        if len(data) > 8:
+            time.sleep(0.002 if comm.get_params()["tx_data_length"] == self.fastest_tx_data_length else 0.006)
+        return len(data)
+
+    @staticmethod
+    def _emulated_recv(comm, recv_timeout):
+        # the flow control paces only the ECU's sends
+        params = comm.get_params()
+        if params["blocksize"] == 0:
+            # the ECU overruns without flow control
+            return b""
+        transfer_time = 0.002
+        transfer_time += 0.004 if params["stmin"] else 0
+        transfer_time += 0.004 if params["blocksize"] < 16 else 0
+        time.sleep(transfer_time)
+        return b"\x62\xF1\x90" + bytes(200)
+
+    def _communicator(self, support_fd: bool) -> IsoTpCommunicator:
+        return IsoTpCommunicator(can_communicator=CanCommunicatorSocketCan(channel="vcan0", support_fd=support_fd),
+                                 rxid=0x7E8, txid=0x7E0, profiles_file=self.profiles_file)
+
+    def test_tune_and_persist(self):
+        tuner = IsoTpFlowControlTuner(isotp_communicator=self._communicator(support_fd=True), request="22f190",
+                                      download_request="3601" + "00" * 500, transfers_per_config=2)
+        profile = tuner.tune()
+        self.assertEqual((profile.can_fd, profile.tx_data_length, profile.stmin), (True, 64, 0))
+        self.assertGreaterEqual(profile.blocksize, 16)
+        self.assertEqual(profile.error_rate, 0)
+        self.assertGreater(profile.tx_throughput, 0)
+        self.assertEqual(load_profile(self.profiles_file, "vcan0", 0x7E0, 0x7E8), profile)
+
+        later_comm = self._communicator(support_fd=True)
+        params = later_comm.get_params()
+        self.assertEqual((params["can_fd"], params["tx_data_length"], params["blocksize"]), (True, 64, profile.blocksize))
+
+    def test_classic_can_channel(self):
+        tuner = IsoTpFlowControlTuner(isotp_communicator=self._communicator(support_fd=False), request="22f190", transfers_per_config=1)
+        profile = tuner.tune()
+        self.assertEqual((profile.can_fd, profile.tx_data_length), (False, 8))
+        # without a download request the transmission is not measured
+        self.assertIsNone(profile.tx_throughput)
+
+    def test_frames_length_is_tuned_on_transmission(self):
+        # shorter frames are faster to send to this ECU
+        self.fastest_tx_data_length = 32
+        tuner = IsoTpFlowControlTuner(isotp_communicator=self._communicator(support_fd=True), request="22f190",
+                                      download_request="3601" + "00" * 500, transfers_per_config=1)
+        profile = tuner.tune()
+        self.assertEqual((profile.can_fd, profile.tx_data_length), (True, 32))
+
+    def test_can_fd_profile_ignored_on_classic_channel(self):
+        save_profile(self.profiles_file, ISOTP_FLOW_CONTROL_PROFILE(channel="vcan0", txid=0x7E0, rxid=0x7E8, stmin=0xF1,
+                                                                    blocksize=32, tx_data_length=64, can_fd=True))
+        isotp_comm = self._communicator(support_fd=False)
+        params = isotp_comm.get_params()
+        self.assertEqual((params["stmin"], params["blocksize"]), (0xF1, 32))
+        self.assertNotIn("tx_data_length", params)
+        isotp_comm.update_params({"blocksize": 4})
+        self.assertEqual(isotp_comm.get_params()["blocksize"], 4)
+
+    def test_explicit_can_fd_takes_precedence(self):
+        save_profile(self.profiles_file, ISOTP_FLOW_CONTROL_PROFILE(channel="vcan0", txid=0x7E0, rxid=0x7E8, stmin=0xF1,
+                                                                    blocksize=32, tx_data_length=8, can_fd=False))
+        isotp_comm = IsoTpCommunicator(can_communicator=CanCommunicatorSocketCan(channel="vcan0", support_fd=True),
+                                       rxid=0x7E8, txid=0x7E0, can_fd=True, profiles_file=self.profiles_file)
+        params = isotp_comm.get_params()
+        self.assertEqual((params["can_fd"], params["tx_data_length"], params["blocksize"]), (True, 64, 32))
@@ -0,0 +1,139 @@
+import socket
+import threading
+from unittest import TestCase, mock
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.isotp.impl.isotp_mux import IsoTpMux
+
+LONG_RESPONSE = bytes([0x62, 0xF1, 0x90]) + b"WDD1234567890ABCD"
+
+
+class IsoTpMuxUTs(TestCase):
+    def setUp(self):
+        # a socket pair emulates the readiness of the CAN socket, frames are exchanged with an emulated ECU
+        self.local_sock, self.peer_sock = socket.socketpair()
+        self.local_sock.setblocking(False)
+        self.pending_frames: list[CanMessage] = []
+        self.sent_frames: list[CanMessage] = []
+        self.frames_lock = threading.Lock()
+        self.receive_errors: list[Exception] = []
+        # the bus is not opened, thus the allowlist is kept without applying kernel filters
+        for name, side_effect in (("open", None), ("close", None),
+                                  ("send", self._ecu_receive), ("receive_batch", self._receive_batch)):
+            patcher = mock.patch.object(CanCommunicatorSocketCan, name, side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(CanCommunicatorSocketCan, "get_bus")
+        patcher.start().return_value.socket = self.local_sock
+        self.addCleanup(patcher.stop)
+        self.mux = IsoTpMux(can_communicator=CanCommunicatorSocketCan(channel="vcan0", support_fd=False))
+
+    def tearDown(self):
+        self.mux.close()
+        self.local_sock.close()
+        self.peer_sock.close()
+
+    def _receive_batch(self, max_frames=256, timeout=None):
+        if self.receive_errors:
+            raise self.receive_errors.pop(0)
+        try:
+            self.local_sock.recv(4096)
+        except BlockingIOError:
+            pass
+        with self.frames_lock:
+            frames, self.pending_frames = self.pending_frames, []
+        return frames
+
+    def _ecu_send(self, arbitration_id: int, data: bytes):
+        with self.frames_lock:
+            self.pending_frames.append(CanMessage(arbitration_id=arbitration_id, data=data, is_extended_id=False))
+        self.peer_sock.send(b"\x00")
+
+    def _ecu_receive(self, can_msg: CanMessage, timeout=None):
+        self.sent_frames.append(can_msg)
+        data = bytes(can_msg.data)
+        if can_msg.arbitration_id == 0x7E0 and data[:4] == b"\x03\x22\xF1\x90":
+            # first frame of the long response, the rest is sent once flow control is received
+            self._ecu_send(0x7E8, bytes([0x10, len(LONG_RESPONSE)]) + LONG_RESPONSE[:6])
+        elif can_msg.arbitration_id == 0x7E0 and data[0] == 0x30:
+            self._ecu_send(0x7E8, b"\x21" + LONG_RESPONSE[6:13])
+            self._ecu_send(0x7E8, b"\x22" + LONG_RESPONSE[13:20])
+        elif can_msg.arbitration_id == 0x7E1 and data[:2] == b"\x02\x3E":
+            self._ecu_send(0x7E9, b"\x02\x7E\x00")
+        elif can_msg.arbitration_id == 0x7E1 and data[0] == 0x10:
+            self._ecu_send(0x7E9, b"\x30\x00\x00")
+
+    def test_routing_by_arbitration_id(self):
+        self.mux.open()
+        engine = self.mux.create_channel(rxid=0x7E8, txid=0x7E0)
+        gateway = self.mux.create_channel(rxid=0x7E9, txid=0x7E1)
+        engine.open()
+        gateway.open()
+        self.assertEqual(len(self.mux.get_channels()), 2)
+        self.assertEqual(gateway.send(b"\x3E\x00"), 2)
+        self.assertEqual(gateway.recv(recv_timeout=1), b"\x7E\x00")
+        self.assertEqual(engine.recv(recv_timeout=0.1), bytes())
+
+    def test_multi_frame_response_flow_control(self):
+        with self.mux:
+            engine = self.mux.create_channel(rxid=0x7E8, txid=0x7E0)
+            engine.open()
+            engine.send(b"\x22\xF1\x90")
+            self.assertEqual(engine.recv(recv_timeout=1), LONG_RESPONSE)
+            self.assertEqual(self.sent_frames[1].data[0], 0x30)
+
+    def test_multi_frame_request(self):
+        with self.mux:
+            gateway = self.mux.create_channel(rxid=0x7E9, txid=0x7E1)
+            gateway.open()
+            payload = bytes(range(20))
+            self.assertEqual(gateway.send(payload, timeout=1), len(payload))
+            sent_payload = bytes(self.sent_frames[0].data[2:]) + b"".join(bytes(frame.data[1:]) for frame in self.sent_frames[1:])
+            self.assertEqual(sent_payload[:len(payload)], payload)
+
+    def test_can_fd_frames_length(self):
+        mux = IsoTpMux(can_communicator=CanCommunicatorSocketCan(channel="vcan0", support_fd=True), can_fd=True)
+        with mux:
+            gateway = mux.create_channel(rxid=0x7E9, txid=0x7E1)
+            gateway.open()
+            payload = bytes(range(20))
+            self.assertEqual(gateway.send(payload, timeout=1), len(payload))
+        # a single CAN-FD frame, with the escaped single frame length
+        self.assertEqual(len(self.sent_frames), 1)
+        self.assertEqual(bytes(self.sent_frames[0].data[:2 + len(payload)]), bytes([0x00, len(payload)]) + payload)
+
+    def test_closed_channel_is_detached(self):
+        with self.mux:
+            gateway = self.mux.create_channel(rxid=0x7E9, txid=0x7E1)
+            gateway.open()
+            gateway.close()
+            self.assertEqual(self.mux.get_channels(), [])
+            with self.assertRaises(RuntimeError):
+                gateway.send(b"\x3E\x00")
+
+    def test_detached_channel_is_filtered_out(self):
+        allowlist_ids = self.mux.can_communicator.allowlist_ids
+        with self.mux:
+            engine = self.mux.create_channel(rxid=0x7E8, txid=0x7E0)
+            gateway = self.mux.create_channel(rxid=0x7E9, txid=0x7E1)
+            engine.open()
+            gateway.open()
+            self.assertEqual(allowlist_ids, {0x7E8, 0x7E9})
+            engine.close()
+            self.assertEqual(allowlist_ids, {0x7E9})
+            # an empty allowlist would allow every ID
+            gateway.close()
+            self.assertEqual(allowlist_ids, {0x7E9})
+            engine.open()
+            self.assertEqual(allowlist_ids, {0x7E8})
+
+    def test_dispatch_survives_receive_errors(self):
+        with self.mux:
+            gateway = self.mux.create_channel(rxid=0x7E9, txid=0x7E1)
+            gateway.open()
+            self.receive_errors = [OSError("Network is down")] * 2
+            self.peer_sock.send(b"\x00")
+            self.assertEqual(gateway.send(b"\x3E\x00"), 2)
+            self.assertEqual(gateway.recv(recv_timeout=1), b"\x7E\x00")
+            self.assertEqual(self.receive_errors, [])
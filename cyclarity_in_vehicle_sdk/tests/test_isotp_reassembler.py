@@ -0,0 +1,174 @@
+from unittest import TestCase
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_capture_buffer import CanCaptureBuffer
+from cyclarity_in_vehicle_sdk.communication.isotp.base.isotp_communicator_base import AddressingMode
+from cyclarity_in_vehicle_sdk.protocol.isotp.impl.isotp_reassembler import IsoTpReassembler
+from cyclarity_in_vehicle_sdk.protocol.uds.impl.uds_transaction_decoder import UdsTransactionDecoder
+
+
+def segment(canid: int, payload: bytes, timestamp: float, frame_length: int = 8, prefix: bytes = b"", escape_length: bool = False) -> list[CanMessage]:
+    """split a payload into ISO-TP frames, as sent by a tester or an ECU"""
+    is_fd = frame_length > 8
+    space = frame_length - len(prefix)
+    if len(payload) <= space - 1 and len(payload) <= 7:
+        frames = [prefix + bytes([len(payload)]) + payload]
+    elif len(payload) <= space - 2 and is_fd:
+        frames = [prefix + bytes([0, len(payload)]) + payload]
+    else:
+        if escape_length or len(payload) > 0xFFF:
+            header = bytes([0x10, 0x00]) + len(payload).to_bytes(4, "big")
+        else:
+            header = bytes([0x10 | (len(payload) >> 8), len(payload) & 0xFF])
+        first_size = space - len(header)
+        frames = [prefix + header + payload[:first_size]]
+        sequence_number = 1
+        for offset in range(first_size, len(payload), space - 1):
+            frames.append(prefix + bytes([0x20 | sequence_number]) + payload[offset:offset + space - 1])
+            sequence_number = (sequence_number + 1) & 0x0F
+    return [CanMessage(arbitration_id=canid, data=frame, timestamp=timestamp + i * 0.001, is_extended_id=canid > 0x7FF, is_fd=is_fd)
+            for i, frame in enumerate(frames)]
+
+
+def flow_control(canid: int, timestamp: float) -> CanMessage:
+    return CanMessage(arbitration_id=canid, data=bytes([0x30, 0x00, 0x00]), timestamp=timestamp, is_extended_id=False)
+
+
+class IsoTpReassemblerUTs(TestCase):
+    def setUp(self):
+        self.reassembler = IsoTpReassembler()
+
+    def test_single_and_multi_frame(self):
+        payload = bytes(range(100))
+        transfers = self.reassembler.feed(segment(0x7E0, b"\x22\xF1\x90", 1.0) + segment(0x7E8, payload, 1.01))
+        self.assertEqual([transfer.data for transfer in transfers], [b"\x22\xF1\x90", payload])
+        self.assertEqual(transfers[1].frames_count, 15)
+        self.assertAlmostEqual(transfers[1].start_timestamp, 1.01)
+        self.assertAlmostEqual(transfers[1].end_timestamp, 1.024)
+
+    def test_interleaved_sessions_across_batches(self):
+        payloads = {canid: bytes([canid & 0xFF]) * (50 + canid % 200) for canid in range(0x100, 0x500)}
+        streams = [segment(canid, payload, 0.0) for canid, payload in payloads.items()]
+        frames = [frame for frames in zip(*[stream[:8] for stream in streams]) for frame in frames]
+        frames += [frame for stream in streams for frame in stream[8:]]
+        transfers = []
+        for i in range(0, len(frames), 100):
+            transfers += self.reassembler.feed(frames[i:i + 100])
+        self.assertEqual({transfer.arbitration_id: transfer.data for transfer in transfers}, payloads)
+        self.assertEqual(self.reassembler.get_statistics().active_sessions, 0)
+
+    def test_large_can_fd_transfer(self):
+        payload = bytes(i & 0xFF for i in range(10000))
+        transfers = self.reassembler.feed(segment(0x7E8, payload, 0.0, frame_length=64) + [flow_control(0x7E0, 0.0)])
+        self.assertEqual(transfers[0].data, payload)
+        self.assertTrue(transfers[0].is_fd)
+        self.assertEqual(self.reassembler.get_statistics().flow_control_frames, 1)
+
+        fd_single_frame = segment(0x7E8, bytes(40), 1.0, frame_length=64)
+        self.assertEqual(self.reassembler.feed(fd_single_frame)[0].data, bytes(40))
+
+    def test_escape_sequence_first_frame(self):
+        payload = bytes(i & 0xFF for i in range(5000))
+        self.assertEqual(self.reassembler.feed(segment(0x7E8, payload, 0.0, escape_length=True))[0].data, payload)
+        # the escape sequence is only valid for lengths that do not fit in 12 bits
+        self.assertEqual(self.reassembler.feed(segment(0x7E8, payload[:200], 1.0, escape_length=True)), [])
+        statistics = self.reassembler.get_statistics()
+        self.assertEqual((statistics.invalid_frames, statistics.active_sessions), (1, 0))
+
+    def test_max_transfer_size(self):
+        reassembler = IsoTpReassembler(max_transfer_size=1000)
+        oversized_frames = segment(0x7E8, bytes(5000), 0.0)
+        payload = bytes(range(200)) * 5
+        transfers = reassembler.feed(oversized_frames[:3] + segment(0x7E8, payload, 1.0))
+        self.assertEqual([transfer.data for transfer in transfers], [payload])
+        statistics = reassembler.get_statistics()
+        self.assertEqual((statistics.oversized_transfers, statistics.unexpected_frames, statistics.interrupted_transfers), (1, 2, 0))
+
+    def test_extended_addressing(self):
+        reassembler = IsoTpReassembler(addressing_mode=AddressingMode.Extended_11bits)
+        payload = bytes(range(30))
+        frames = segment(0x600, payload, 0.0, prefix=b"\x10")
+        other_frames = segment(0x600, payload[::-1], 0.0, prefix=b"\x20")
+        transfers = reassembler.feed([frame for pair in zip(frames, other_frames) for frame in pair])
+        self.assertEqual({(transfer.address_extension, transfer.data) for transfer in transfers},
+                         {(0x10, payload), (0x20, payload[::-1])})
+
+    def test_errors(self):
+        frames = segment(0x7E8, bytes(30), 0.0)
+        # missing consecutive frame
+        self.assertEqual(self.reassembler.feed(frames[:2] + frames[3:]), [])
+        statistics = self.reassembler.get_statistics()
+        self.assertEqual(statistics.sequence_errors, 1)
+        self.assertEqual(statistics.unexpected_frames, 1)
+        # a new transfer interrupting one in progress
+        transfers = self.reassembler.feed(frames[:2] + segment(0x7E8, b"\x01", 0.1))
+        self.assertEqual(transfers[0].data, b"\x01")
+        self.assertEqual(self.reassembler.get_statistics().interrupted_transfers, 1)
+        # a transfer stalled
+        self.reassembler.feed(frames[:2])
+        self.assertEqual(self.reassembler.expire(now=5.0), 1)
+        self.assertEqual(self.reassembler.get_statistics().timed_out_transfers, 1)
+
+    def test_capture_buffer(self):
+        capture_buffer = CanCaptureBuffer(capacity=100)
+        capture_buffer.extend(segment(0x7E0, b"\x22\xF1\x90", 0.0) + segment(0x7E8, bytes(range(20)), 0.01))
+        transfers = self.reassembler.feed_capture(capture_buffer, capture_buffer.select(arbitration_id=0x7E8))
+        self.assertEqual([transfer.data for transfer in transfers], [bytes(range(20))])
+
+    def test_listener(self):
+        received = []
+        self.reassembler.add_transfer_listener(received.extend)
+        self.reassembler.feed(segment(0x7E0, b"\x3E\x00", 0.0))
+        self.reassembler.remove_transfer_listener(received.extend)
+        self.reassembler.feed(segment(0x7E0, b"\x3E\x00", 0.0))
+        self.assertEqual(len(received), 1)
+
+
+class UdsTransactionDecoderUTs(TestCase):
+    def setUp(self):
+        self.reassembler = IsoTpReassembler()
+        self.decoder = UdsTransactionDecoder()
+        self.decoder.attach(self.reassembler)
+        self.transactions = []
+        self.decoder.add_transaction_listener(self.transactions.extend)
+
+    def test_transaction_log(self):
+        vin = b"\x62\xF1\x90" + b"1HGCM82633A004352"
+        self.reassembler.feed(segment(0x7E0, b"\x22\xF1\x90", 0.0)
+                              + segment(0x7E8, vin, 0.01)
+                              + segment(0x7E0, b"\x10\x03", 0.1)
+                              + segment(0x7E8, b"\x7F\x10\x78", 0.11)
+                              + segment(0x7E8, b"\x7F\x10\x22", 0.2))
+        self.assertEqual(len(self.transactions), 2)
+        read_did, session_control = self.transactions
+        self.assertEqual((read_did.request_id, read_did.response_id, read_did.service_name), (0x7E0, 0x7E8, "ReadDataByIdentifier"))
+        self.assertEqual(read_did.response, vin)
+        self.assertTrue(read_did.positive)
+        self.assertAlmostEqual(read_did.latency, 0.01 + 0.002)
+        self.assertFalse(session_control.positive)
+        self.assertEqual(session_control.response_code_name, "ConditionsNotCorrect")
+        self.assertEqual(session_control.pending_responses, 1)
+
+    def test_concurrent_ecus_matched_by_pair(self):
+        self.reassembler.feed(segment(0x7E0, b"\x3E\x00", 0.0)
+                              + segment(0x7E1, b"\x3E\x00", 0.0)
+                              + segment(0x7E9, b"\x7E\x00", 0.01)
+                              + segment(0x7E8, b"\x7E\x00", 0.02))
+        self.assertEqual({(transaction.request_id, transaction.response_id) for transaction in self.transactions},
+                         {(0x7E0, 0x7E8), (0x7E1, 0x7E9)})
+
+    def test_functional_request_and_timeout(self):
+        self.reassembler.feed(segment(0x7DF, b"\x3E\x00", 0.0)
+                              + segment(0x7E8, b"\x7E\x00", 0.01)
+                              + segment(0x7E9, b"\x7E\x00", 0.02)
+                              + segment(0x7E0, b"\x11\x01", 1.0))
+        self.assertEqual([transaction.response_id for transaction in self.transactions], [0x7E8, 0x7E9])
+        unanswered = self.decoder.flush(now=10.0)
+        self.assertEqual([transaction.request for transaction in unanswered], [b"\x11\x01"])
+        self.assertIsNone(unanswered[0].response)
+        self.assertEqual(self.decoder.flush(), [])
+
+    def test_response_without_request(self):
+        self.reassembler.feed(segment(0x7E8, b"\x50\x03\x00\x32\x01\xF4", 0.0))
+        self.assertIsNone(self.transactions[0].request)
+        self.assertEqual(self.transactions[0].service_name, "DiagnosticSessionControl")
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from cyclarity_in_vehicle_sdk.utils.latency.latency_histogram import LatencyHistogram
+
+
+class LatencyHistogramUTs(TestCase):
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        self.assertEqual(histogram.to_model().count, 0)
+
+    def test_exact_small_values(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.record_ns(value)
+        self.assertEqual(histogram.percentile(50), 50e-9)
+        self.assertEqual(histogram.percentile(100), 100e-9)
+
+    def test_relative_error(self):
+        histogram = LatencyHistogram(precision_bits=7)
+        values = [i * 1e-6 for i in range(1, 10001)]
+        for value in values:
+            histogram.record(value)
+        distribution = histogram.to_model()
+        self.assertEqual(distribution.count, len(values))
+        self.assertAlmostEqual(distribution.min, 1e-6)
+        self.assertAlmostEqual(distribution.max, 10e-3)
+        self.assertAlmostEqual(distribution.mean, sum(values) / len(values))
+        for percentile, expected in ((50, 5e-3), (90, 9e-3), (99, 9.9e-3)):
+            self.assertLess(abs(histogram.percentile(percentile) - expected) / expected, 1 / 64)
+
+    def test_negative_and_huge_values(self):
+        histogram = LatencyHistogram()
+        histogram.record(-1.0)
+        histogram.record(1e9)
+        self.assertEqual(histogram.percentile(0), 0.0)
+        self.assertGreater(histogram.percentile(100), 1e8)
+
+    def test_merge_and_reset(self):
+        first = LatencyHistogram()
+        second = LatencyHistogram()
+        first.record(0.001)
+        second.record(0.003)
+        first.merge(second)
+        self.assertEqual(first.count, 2)
+        self.assertAlmostEqual(first.to_model().max, 0.003)
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram(precision_bits=5))
+        first.reset()
+        self.assertEqual(first.count, 0)
@@ -0,0 +1,58 @@
+import time
+from itertools import chain, repeat
+from unittest import TestCase, mock
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.multi_channel_can_communicator import MultiChannelCanCommunicator, RoutedFrameCorrelator
+
+
+def make_msg(channel: str, arbitration_id: int, timestamp: float, data: bytes = b"\x01\x02") -> CanMessage:
+    return CanMessage(channel=channel, arbitration_id=arbitration_id, timestamp=timestamp, data=data, is_extended_id=False)
+
+
+class MultiChannelCanCommunicatorUTs(TestCase):
+    def setUp(self):
+        self.multi_can_comm = MultiChannelCanCommunicator(channels=["can0", "can1"], support_fd=False, reorder_window=0.05)
+        self.multi_can_comm._selector = mock.MagicMock()
+        self.can0 = mock.MagicMock()
+        self.can1 = mock.MagicMock()
+        self.multi_can_comm._communicators = {"can0": self.can0, "can1": self.can1}
+        self.multi_can_comm._poll = mock.MagicMock(return_value=[self.can0, self.can1])
+
+    def test_receive_batch_merges_by_timestamp(self):
+        self.can0.receive_batch.return_value = [make_msg("can0", 0x100, 1.0), make_msg("can0", 0x100, 3.0)]
+        self.can1.receive_batch.return_value = [make_msg("can1", 0x200, 2.0)]
+        msgs = self.multi_can_comm.receive_batch(timeout=1)
+        self.assertEqual([(msg.channel, msg.timestamp) for msg in msgs], [("can0", 1.0), ("can1", 2.0), ("can0", 3.0)])
+
+    def test_iter_sniff_orders_across_reads(self):
+        # can1 frame that was read later, but has an earlier timestamp
+        now = time.time()
+        self.can0.receive_batch.side_effect = chain([[make_msg("can0", 0x100, now + 0.002)]], repeat([]))
+        self.can1.receive_batch.side_effect = chain([[], [make_msg("can1", 0x100, now + 0.001)]], repeat([]))
+        msgs = list(self.multi_can_comm.iter_sniff(sniff_time=0.1))
+        self.assertEqual([msg.channel for msg in msgs], ["can1", "can0"])
+
+
+class RoutedFrameCorrelatorUTs(TestCase):
+    def test_gateway_delay(self):
+        correlator = RoutedFrameCorrelator(max_delay=0.01)
+        correlator.update([make_msg("can0", 0x100, 1.000),
+                           make_msg("can1", 0x100, 1.002),
+                           make_msg("can2", 0x100, 1.003),
+                           make_msg("can0", 0x100, 1.100),
+                           make_msg("can1", 0x100, 1.104),
+                           make_msg("can1", 0x100, 1.105)])
+        latencies = {(latency.source_channel, latency.destination_channel): latency for latency in correlator.get_latencies()}
+        self.assertEqual(set(latencies), {("can0", "can1"), ("can0", "can2")})
+        self.assertEqual(latencies[("can0", "can1")].count, 2)
+        self.assertAlmostEqual(latencies[("can0", "can1")].mean_delay, 0.003)
+        self.assertAlmostEqual(latencies[("can0", "can1")].max_delay, 0.004)
+
+    def test_no_correlation_beyond_max_delay_or_payload(self):
+        correlator = RoutedFrameCorrelator(max_delay=0.01)
+        correlator.update([make_msg("can0", 0x100, 1.000),
+                           make_msg("can1", 0x100, 1.020),
+                           make_msg("can0", 0x200, 2.000, data=b"\x01"),
+                           make_msg("can1", 0x200, 2.001, data=b"\x02")])
+        self.assertEqual(correlator.get_latencies(), [])
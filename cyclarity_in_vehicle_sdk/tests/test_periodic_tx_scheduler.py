@@ -0,0 +1,69 @@
+import time
+from unittest import TestCase, mock
+
+from can import ModifiableCyclicTaskABC
+
+from cyclarity_in_vehicle_sdk.communication.can.base.can_communicator_base import CanMessage
+from cyclarity_in_vehicle_sdk.communication.can.impl.can_communicator_socketcan import CanCommunicatorSocketCan
+from cyclarity_in_vehicle_sdk.communication.can.impl.periodic_tx_scheduler import PeriodicTxScheduler
+
+alive_msg = CanMessage(arbitration_id=0x3B1, data=b"\x00\x00", is_extended_id=False)
+
+
+class PeriodicTxSchedulerUTs(TestCase):
+    def setUp(self):
+        self.can_comm = CanCommunicatorSocketCan(channel="vcan0", support_fd=False)
+        self.can_comm._bus = mock.MagicMock()
+        self.can_comm._bus.send_periodic.side_effect = lambda **kwargs: mock.MagicMock(spec=ModifiableCyclicTaskABC)
+        self.scheduler = PeriodicTxScheduler(can_communicator=self.can_comm)
+
+    def test_add_and_stop(self):
+        first = self.scheduler.add(alive_msg, period=0.01)
+        second = self.scheduler.add([alive_msg, alive_msg], period=0.1)
+        self.assertEqual(self.scheduler.get_handles(), [first, second])
+        task = self.scheduler._entries[first].task
+        self.scheduler.stop(first)
+        task.stop.assert_called_once()
+        self.assertEqual(self.scheduler.get_handles(), [second])
+        self.scheduler.stop_all()
+        self.assertEqual(self.scheduler.get_handles(), [])
+
+    def test_modify_payload(self):
+        handle = self.scheduler.add(alive_msg, period=0.01)
+        self.scheduler.modify_payload(handle, b"\x01\xAA")
+        modified_msgs = self.scheduler._entries[handle].task.modify_data.call_args.args[0]
+        self.assertEqual(modified_msgs[0].data, bytearray(b"\x01\xAA"))
+        self.assertEqual(modified_msgs[0].arbitration_id, alive_msg.arbitration_id)
+        self.assertEqual(alive_msg.data, bytearray(b"\x00\x00"))
+
+    def test_modify_payload_wrong_count(self):
+        handle = self.scheduler.add([alive_msg, alive_msg], period=0.01)
+        with self.assertRaises(ValueError):
+            self.scheduler.modify_payload(handle, b"\x01\x02")
+
+    def test_statistics_from_tx_echo(self):
+        handle = self.scheduler.add(alive_msg, period=0.01)
+        self.can_comm._notify_rx_listeners([CanMessage(arbitration_id=0x3B1, timestamp=t, is_rx=False) for t in (1.0, 1.01, 1.021, 1.03)]
+                                           + [CanMessage(arbitration_id=0x3B1, timestamp=1.035, is_rx=True)])
+        statistics = self.scheduler.get_statistics(handle)
+        self.assertEqual(statistics.sent_count, 4)
+        self.assertAlmostEqual(statistics.achieved_period, 0.01)
+        self.assertAlmostEqual(statistics.max_deviation, 0.001)
+
+    def test_statistics_of_transmissions_on_the_same_id(self):
+        first = self.scheduler.add(alive_msg, period=0.01)
+        second = self.scheduler.add(CanMessage(arbitration_id=0x3B1, data=b"\x01\x00", is_extended_id=False), period=0.02)
+        self.can_comm._notify_rx_listeners([CanMessage(arbitration_id=0x3B1, timestamp=t, data=b"\x00\x00", is_rx=False) for t in (1.0, 1.01, 1.02)]
+                                           + [CanMessage(arbitration_id=0x3B1, timestamp=t, data=b"\x01\x00", is_rx=False) for t in (1.005, 1.025)])
+        first_statistics, second_statistics = self.scheduler.get_statistics(first), self.scheduler.get_statistics(second)
+        self.assertEqual((first_statistics.sent_count, second_statistics.sent_count), (3, 2))
+        self.assertAlmostEqual(first_statistics.achieved_period, 0.01)
+        self.assertAlmostEqual(second_statistics.achieved_period, 0.02)
+
+    def test_finished_transmission_is_dropped(self):
+        handle = self.scheduler.add(alive_msg, period=0.01, duration=0.05)
+        self.assertEqual(self.scheduler.get_handles(), [handle])
+        time.sleep(0.1)
+        self.assertEqual(self.scheduler.get_handles(), [])
+        with self.assertRaises(ValueError):
+            self.scheduler.get_statistics(handle)
@@ -0,0 +1,108 @@
+import socket
+import struct
+from unittest import TestCase, mock
+
+from cyclarity_in_vehicle_sdk.communication.doip.doip_communicator import DoipCommunicator
+from cyclarity_in_vehicle_sdk.communication.ip.tcp.tcp import TcpCommunicator
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_stream_reader import DOIP_HEADER
+from cyclarity_in_vehicle_sdk.protocol.doip.impl.doip_utils import DoipUtils
+from cyclarity_in_vehicle_sdk.tests.doip_fakes import patch_methods
+
+
+class TcpCommunicatorUTs(TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.addCleanup(self.server.close)
+        self.communicator = TcpCommunicator(destination_ip="127.0.0.1", dport=self.server.getsockname()[1], source_ip="127.0.0.1", sport=0)
+        self.assertTrue(self.communicator.open())
+        self.assertFalse(self.communicator.is_open())
+        self.assertTrue(self.communicator.connect())
+        self.addCleanup(self.communicator.close)
+        self.peer, _ = self.server.accept()
+        self.addCleanup(self.peer.close)
+
+    def test_state_is_tracked_without_syscalls(self):
+        self.assertTrue(self.communicator.is_open())
+        with mock.patch.object(self.communicator, "_socket") as sock:
+            self.assertTrue(self.communicator.is_open())
+        sock.recv.assert_not_called()
+
+    def test_peer_close_after_pending_data(self):
+        self.peer.sendall(b"\x02\xFD")
+        self.peer.close()
+        # the data sent before the close is still read, with pending data the connection is open
+        self.assertEqual(self.communicator.recv(recv_timeout=1), b"\x02\xFD")
+        self.assertTrue(self.communicator.is_open())
+        self.assertEqual(self.communicator.recv(recv_timeout=1), b"")
+        self.assertFalse(self.communicator.is_open())
+
+    def test_application_data_is_not_a_close(self):
+        self.peer.sendall(b"\x02\xFD")
+        self.assertEqual(self.communicator.recv(recv_timeout=0.05, size=1), b"\x02")
+        self.assertTrue(self.communicator.is_open())
+        self.assertEqual(self.communicator.recv(recv_timeout=0.05), b"\xFD")
+        self.assertEqual(self.communicator.recv(recv_timeout=0.05), b"")
+        self.assertTrue(self.communicator.is_open())
+
+    def test_peer_reset(self):
+        # abortive close
+        self.peer.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.peer.close()
+        self.assertEqual(self.communicator.recv(recv_timeout=1), b"")
+        self.assertFalse(self.communicator.is_open())
+        self.assertEqual(self.communicator.send(b"\x02\xFD"), 0)
+        self.assertTrue(self.communicator.close())
+
+
+class DoipCommunicatorPeerCloseUTs(TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(2)
+        self.server.settimeout(2)
+        self.addCleanup(self.server.close)
+        self.communicator = DoipCommunicator(tcp_communicator=TcpCommunicator(destination_ip="127.0.0.1", dport=self.server.getsockname()[1], source_ip="127.0.0.1", sport=0),
+                                             client_logical_address=0x0E80,
+                                             target_logical_address=0x1001,
+                                             routing_activation_needed=False)
+        self.assertTrue(self.communicator.open())
+        self.addCleanup(self.communicator.close)
+
+    def _accept(self) -> socket.socket:
+        peer, _ = self.server.accept()
+        self.addCleanup(peer.close)
+        peer.settimeout(2)
+        return peer
+
+    def test_reconnect_after_peer_closed_while_idle(self):
+        # the entity closes the connection while idle, the next request is still accepted by the local stack
+        self._accept().close()
+        self.assertGreater(self.communicator.send(b"\x3E\x00", timeout=0.2), 0)
+        header = self._accept().recv(DOIP_HEADER.size)
+        self.assertEqual(DOIP_HEADER.unpack(header)[2], 0x8001)
+        self.assertTrue(self.communicator.tcp_communicator.is_open())
+
+
+class DoipCommunicatorReconnectUTs(TestCase):
+    def setUp(self):
+        self.mocks = patch_methods(self, TcpCommunicator, **{name: {"return_value": True} for name in ("open", "connect", "close")})
+        self.communicator = DoipCommunicator(tcp_communicator=TcpCommunicator(destination_ip="127.0.0.1", dport=13400, source_ip="127.0.0.1", sport=0),
+                                             client_logical_address=0x0E80,
+                                             target_logical_address=0x1001,
+                                             routing_activation_needed=False)
+
+    def test_reconnect_on_send_failure(self):
+        with mock.patch.object(TcpCommunicator, "is_open", autospec=True, side_effect=[True, False]), \
+                mock.patch.object(DoipUtils, "send_uds_request", side_effect=[0, 14]) as send_uds_request:
+            self.assertEqual(self.communicator.send(b"\x3E\x00"), 14)
+        self.assertEqual(send_uds_request.call_count, 2)
+        self.mocks["connect"].assert_called_once()
+
+    def test_no_reconnect_while_open(self):
+        with mock.patch.object(TcpCommunicator, "is_open", autospec=True, return_value=True), \
+                mock.patch.object(DoipUtils, "send_uds_request", return_value=14):
+            for _ in range(3):
+                self.assertEqual(self.communicator.send(b"\x3E\x00"), 14)
+        self.mocks["connect"].assert_not_called()
@@ -0,0 +1,148 @@
+import threading
+from typing import Optional
+
+import numpy as np
+
+from cyclarity_in_vehicle_sdk.utils.latency.models import LATENCY_DISTRIBUTION
+
+NANOSECONDS_IN_SECOND = 1_000_000_000
+_MAX_VALUE_BITS = 64
+
+
+class LatencyHistogram():
+    """Constant memory latency histogram with logarithmic buckets (HDR histogram style).
+    Values are recorded in nanoseconds, values below 2^precision_bits nanoseconds are counted exactly,
+    larger values are counted in buckets with a relative width of 2^-(precision_bits - 1).
+    """
+    def __init__(self, precision_bits: int = 7):
+        """
+        Args:
+            precision_bits (int, optional): amount of significant bits kept per value,
+                7 bits bounds the relative error of the percentiles to 1.6%. Defaults to 7.
+        """
+        if not 2 <= precision_bits <= 16:
+            raise ValueError(f"precision_bits must be between 2 and 16, got {precision_bits}")
+        self.precision_bits = precision_bits
+        self._sub_buckets = 1 << precision_bits
+        self._half_sub_buckets = self._sub_buckets >> 1
+        self._counts = np.zeros(self._sub_buckets + (_MAX_VALUE_BITS - precision_bits) * self._half_sub_buckets, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._count = 0
+        self._total = 0
+        self._min: Optional[int] = None
+        self._max: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        """amount of values recorded
+        """
+        return self._count
+
+    def record(self, value: float) -> None:
+        """record a value
+
+        Args:
+            value (float): value in seconds, negative values are recorded as 0
+        """
+        self.record_ns(int(value * NANOSECONDS_IN_SECOND))
+
+    def record_ns(self, value: int) -> None:
+        """record a value
+
+        Args:
+            value (int): value in nanoseconds, negative values are recorded as 0
+        """
+        value = min(max(value, 0), (1 << (_MAX_VALUE_BITS - 1)) - 1)
+        index = self._bucket_index(value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._total += value
+            if self._min is None or value < self._min:
+                self._min = value
+            if self._max is None or value > self._max:
+                self._max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """add the values recorded by another histogram
+
+        Args:
+            other (LatencyHistogram): histogram with the same precision
+        """
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        with other._lock:
+            counts = other._counts.copy()
+            count, total, other_min, other_max = other._count, other._total, other._min, other._max
+        if not count:
+            return
+        with self._lock:
+            self._counts += counts
+            self._count += count
+            self._total += total
+            self._min = other_min if self._min is None else min(self._min, other_min)
+            self._max = other_max if self._max is None else max(self._max, other_max)
+
+    def reset(self) -> None:
+        """clear all the recorded values
+        """
+        with self._lock:
+            self._counts[:] = 0
+            self._count = 0
+            self._total = 0
+            self._min = None
+            self._max = None
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """get a percentile of the recorded values
+
+        Args:
+            percentile (float): the percentile, between 0 and 100
+
+        Returns:
+            Optional[float]: the value in seconds, None if no values were recorded
+        """
+        with self._lock:
+            return self._percentile(percentile)
+
+    def to_model(self) -> LATENCY_DISTRIBUTION:
+        """get the distribution of the recorded values
+
+        Returns:
+            LATENCY_DISTRIBUTION: count, min, max, mean and percentiles of the recorded values, in seconds
+        """
+        with self._lock:
+            if not self._count:
+                return LATENCY_DISTRIBUTION(count=0)
+            return LATENCY_DISTRIBUTION(
+                count=self._count,
+                min=self._min / NANOSECONDS_IN_SECOND,
+                max=self._max / NANOSECONDS_IN_SECOND,
+                mean=self._total / self._count / NANOSECONDS_IN_SECOND,
+                p50=self._percentile(50),
+                p90=self._percentile(90),
+                p99=self._percentile(99),
+                p999=self._percentile(99.9),
+            )
+
+    def _percentile(self, percentile: float) -> Optional[float]:
+        if not self._count:
+            return None
+        rank = max(1, int(np.ceil(self._count * min(max(percentile, 0.0), 100.0) / 100)))
+        index = int(np.searchsorted(np.cumsum(self._counts), rank))
+        low, high = self._bucket_range(index)
+        value = min(max((low + high) // 2, self._min), self._max)
+        return value / NANOSECONDS_IN_SECOND
+
+    def _bucket_index(self, value: int) -> int:
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self.precision_bits
+        return self._sub_buckets + (shift - 1) * self._half_sub_buckets + (value >> shift) - self._half_sub_buckets
+
+    def _bucket_range(self, index: int) -> tuple[int, int]:
+        if index < self._sub_buckets:
+            return index, index
+        shift = (index - self._sub_buckets) // self._half_sub_buckets + 1
+        mantissa = (index - self._sub_buckets) % self._half_sub_buckets + self._half_sub_buckets
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
@@ -0,0 +1,22 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class LATENCY_DISTRIBUTION(BaseModel):
+    """Model containing the distribution of measured latencies, in seconds
+    """
+    count: int = Field(description="Amount of measurements")
+    min: Optional[float] = Field(default=None, description="Minimal measured value")
+    max: Optional[float] = Field(default=None, description="Maximal measured value")
+    mean: Optional[float] = Field(default=None, description="Mean of the measured values")
+    p50: Optional[float] = Field(default=None, description="Median of the measured values")
+    p90: Optional[float] = Field(default=None, description="90th percentile of the measured values")
+    p99: Optional[float] = Field(default=None, description="99th percentile of the measured values")
+    p999: Optional[float] = Field(default=None, description="99.9th percentile of the measured values")
+
+    def __str__(self):
+        if not self.count:
+            return "count: 0"
+        return (f"count: {self.count}, min: {self.min * 1e6:.1f}us, mean: {self.mean * 1e6:.1f}us, "
+                f"p50: {self.p50 * 1e6:.1f}us, p90: {self.p90 * 1e6:.1f}us, p99: {self.p99 * 1e6:.1f}us, "
+                f"p99.9: {self.p999 * 1e6:.1f}us, max: {self.max * 1e6:.1f}us")